@@ -44,6 +44,28 @@ def add_indexes():
             else:
                 raise e
         
+        # Add index for keyset (cursor) pagination of the transaction list
+        # Column order, directions and the NULL-safe created_at expression match
+        # the ORDER BY in get_user_transactions
+        try:
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_transactions_keyset_232143 
+                ON transactions_232143 (
+                    user_id_232143,
+                    transaction_date_232143 DESC,
+                    (COALESCE(created_at_232143, '-infinity'::timestamp)) DESC,
+                    transaction_id_232143 DESC
+                )
+            """)
+            # Superseded by the index above (it sorted NULL created_at first)
+            cursor.execute("DROP INDEX IF EXISTS idx_transactions_user_keyset")
+            print("✅ Added index idx_transactions_keyset_232143")
+        except Exception as e:
+            if "already exists" in str(e).lower():
+                print("ℹ️ Index idx_transactions_keyset_232143 already exists")
+            else:
+                raise e
+        
         db.commit()
         print("✅ Indexes added successfully")
 
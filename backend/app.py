@@ -13,6 +13,9 @@ from routes.goal_routes import goal_bp
 from routes.budget_routes import budget_bp
 from routes.data_routes import data_bp
 from routes.recurring_transactions_routes import recurring_bp
+from routes.admin_routes import admin_bp
+from routes.dashboard_routes import dashboard_bp
+from routes.job_routes import job_bp
 
 # Fix encoding issues on Windows
 if sys.platform == 'win32':
@@ -79,6 +82,9 @@ def create_app():
     app.register_blueprint(budget_bp, url_prefix=f"{config.Config.API_PREFIX}/budgets")
     app.register_blueprint(data_bp, url_prefix=f"{config.Config.API_PREFIX}/data")
     app.register_blueprint(recurring_bp, url_prefix=f"{config.Config.API_PREFIX}/recurring-transactions")
+    app.register_blueprint(admin_bp, url_prefix=f"{config.Config.API_PREFIX}/admin")
+    app.register_blueprint(dashboard_bp, url_prefix=f"{config.Config.API_PREFIX}/dashboard")
+    app.register_blueprint(job_bp, url_prefix=f"{config.Config.API_PREFIX}/jobs")
     
     # Health check route
     @app.route('/')
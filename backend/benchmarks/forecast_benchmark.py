@@ -0,0 +1,130 @@
+"""
+Benchmark the expense forecasting engines on synthetic spending histories
+
+Generates --series daily expense histories shaped like real users' (a base
+level, weekend and payday bumps, a slow trend, days without spending and
+the occasional large purchase), holds out the last --horizon days and
+forecasts them from the rest with:
+
+    moving_average  the old fallback: mean of the last 7 days x horizon
+    holt_winters    services/forecast_engine.py (the default engine)
+    prophet         services/forecast_fit.py, inline (skipped if not installed)
+
+For each engine it reports the latency per forecast, the mean absolute
+error of the daily values, the absolute percentage error of the horizon
+total (what /data/forecast users see) and how often the actual daily value
+fell inside the 80% interval. No database is needed.
+
+Usage:
+    python benchmarks/forecast_benchmark.py [--series 200] [--days 120] [--horizon 30]
+"""
+
+import argparse
+import importlib.util
+import os
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.forecast_engine import holt_winters_forecast
+
+PROPHET_KWARGS = {
+    'daily_seasonality': True,
+    'weekly_seasonality': True,
+    'yearly_seasonality': False,
+    'changepoint_prior_scale': 0.05,
+}
+
+def synthetic_series(rng, days):
+    """One user's daily expense totals in IDR"""
+    t = np.arange(days)
+    base = rng.uniform(50_000, 400_000)
+    weekday = rng.uniform(0.6, 1.4, 7)
+    weekday /= weekday.mean()
+    trend = 1 + rng.normal(0, 0.002) * t
+    values = base * weekday[t % 7] * trend
+    # Payday (25th-ish) bump, roughly monthly
+    values[(t % 30) == 24] *= rng.uniform(1.5, 3)
+    values *= rng.lognormal(0, 0.35, days)
+    # Days with no spending at all
+    values[rng.random(days) < rng.uniform(0, 0.4)] = 0
+    # Occasional large one-off purchases
+    spikes = rng.random(days) < 0.02
+    values[spikes] += base * rng.uniform(3, 10, spikes.sum())
+    return np.maximum(values, 0)
+
+def to_points(values, start):
+    return [(start + timedelta(days=i), float(v)) for i, v in enumerate(values)]
+
+def moving_average(points, horizon):
+    avg = float(np.mean([y for _, y in points[-7:]]))
+    return [{'yhat': avg, 'yhat_lower': avg * 0.8, 'yhat_upper': avg * 1.2} for _ in range(horizon)]
+
+def holt_winters(points, horizon):
+    return holt_winters_forecast(points, horizon)
+
+def prophet(points, horizon):
+    from services.forecast_fit import fit_and_predict
+    return fit_and_predict([(d.isoformat(), y) for d, y in points], horizon, PROPHET_KWARGS)
+
+def evaluate(engine, histories, horizon):
+    timings, daily_errors, total_errors, inside = [], [], [], []
+    start = date(2026, 1, 1)
+    for values in histories:
+        train, actual = values[:-horizon], values[-horizon:]
+        points = to_points(train, start)
+        started = time.perf_counter()
+        rows = engine(points, horizon)
+        timings.append((time.perf_counter() - started) * 1000)
+
+        yhat = np.array([row['yhat'] for row in rows])
+        lower = np.array([row['yhat_lower'] for row in rows])
+        upper = np.array([row['yhat_upper'] for row in rows])
+        daily_errors.append(np.abs(yhat - actual).mean())
+        if actual.sum() > 0:
+            total_errors.append(abs(yhat.sum() - actual.sum()) / actual.sum() * 100)
+        inside.append(((actual >= lower) & (actual <= upper)).mean() * 100)
+
+    timings.sort()
+    return {
+        'median_ms': statistics.median(timings),
+        'p95_ms': timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        'daily_mae': statistics.mean(daily_errors),
+        'total_ape': statistics.median(total_errors),
+        'coverage': statistics.mean(inside),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark expense forecasting engines')
+    parser.add_argument('--series', type=int, default=200, help='Synthetic users')
+    parser.add_argument('--days', type=int, default=120, help='History length per user')
+    parser.add_argument('--horizon', type=int, default=30, help='Held-out days to forecast')
+    parser.add_argument('--prophet-series', type=int, default=20,
+                        help='Users to run Prophet on (it is slow)')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    histories = [synthetic_series(rng, args.days) for _ in range(args.series)]
+
+    engines = [('moving_average', moving_average, histories),
+               ('holt_winters', holt_winters, histories)]
+    if importlib.util.find_spec('prophet') is not None:
+        engines.append(('prophet', prophet, histories[:args.prophet_series]))
+    else:
+        print("ℹ️ prophet is not installed, skipping it")
+
+    print(f"\n📊 {args.series} users, {args.days - args.horizon} days of history, "
+          f"forecasting {args.horizon} days:\n")
+    print(f"{'engine':<16} {'users':>5} {'median ms':>10} {'p95 ms':>8} "
+          f"{'daily MAE':>11} {'total APE %':>12} {'80% cover %':>12}")
+    for name, engine, series in engines:
+        result = evaluate(engine, series, args.horizon)
+        print(f"{name:<16} {len(series):>5} {result['median_ms']:>10.2f} {result['p95_ms']:>8.2f} "
+              f"{result['daily_mae']:>11,.0f} {result['total_ape']:>12.1f} {result['coverage']:>12.1f}")
+
+if __name__ == '__main__':
+    main()
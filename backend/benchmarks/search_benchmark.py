@@ -0,0 +1,178 @@
+"""
+Benchmark transaction description search on a synthetic table
+
+Builds an UNLOGGED copy of the transactions search columns with --rows rows
+(default 1,000,000) spread over --users users, indexes it the same way as
+add_indexes.py and migrations/add_transaction_search.sql, then times the
+three search modes used by TransactionModel:
+
+    exact     description LIKE '%term%'                  (legacy, case-sensitive)
+    contains  f_unaccent(lower(description)) LIKE ...   (trigram GIN)
+    fuzzy     contains OR word-similarity, ranked       (trigram GIN)
+
+Requires the pg_trgm, unaccent and btree_gin extensions and f_unaccent()
+(run migrations/add_transaction_search.py first). The table is dropped
+afterwards unless --keep is given.
+
+Usage:
+    python benchmarks/search_benchmark.py [--rows 1000000] [--users 100] [--runs 20]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import psycopg2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+
+TABLE = 'bench_search_transactions'
+
+MERCHANTS = [
+    'INDOMARET', 'Alfamart', 'Alfamidi', 'Superindo', 'Hypermart', 'Lotte Mart',
+    'GoFood', 'GrabFood', 'ShopeePay', 'Tokopedia', 'Gojek', 'Grab',
+    'Warung Makan Sederhana', 'Warteg Bahari', 'Kopi Kenangan', 'Janji Jiwa',
+    'Café Tjikini', 'Pertamina SPBU', 'PLN Token Listrik', 'Telkomsel Pulsa',
+    'BPJS Kesehatan', 'Apotek Kimia Farma', 'Bakmi GM', 'Sate Khas Senayan',
+]
+SUFFIXES = ['Cabang', 'Pusat', 'Jl. Sudirman', 'Tebet', 'Kemang', 'BSD', 'Depok', 'Bekasi']
+
+QUERIES = [
+    # (label, search mode, term)
+    ('merchant, exact case', 'exact', 'INDOMARET'),
+    ('merchant, lower case', 'contains', 'indomaret'),
+    ('accent-insensitive', 'contains', 'cafe tjikini'),
+    ('typo', 'fuzzy', 'indomart'),
+    ('short term', 'contains', 'spbu'),
+    ('no match', 'contains', 'zzqx'),
+]
+
+def connect(dsn):
+    if dsn:
+        return psycopg2.connect(dsn)
+    if Config.DATABASE_URL:
+        return psycopg2.connect(Config.DATABASE_URL)
+    return psycopg2.connect(
+        host=Config.POSTGRES_HOST,
+        user=Config.POSTGRES_USER,
+        password=Config.POSTGRES_PASSWORD,
+        database=Config.POSTGRES_DB,
+        port=Config.POSTGRES_PORT
+    )
+
+def build_table(cursor, rows, users):
+    print(f"🔄 Generating {rows:,} rows for {users} users...")
+    started = time.perf_counter()
+    cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    cursor.execute(f"""
+        CREATE UNLOGGED TABLE {TABLE} (
+            transaction_id_232143 BIGINT PRIMARY KEY,
+            user_id_232143 VARCHAR(36) NOT NULL,
+            description_232143 VARCHAR(500) NOT NULL,
+            transaction_date_232143 DATE NOT NULL,
+            created_at_232143 TIMESTAMP NOT NULL
+        )
+    """)
+    # Fixed seed so every run searches the same data
+    cursor.execute("SELECT setseed(0.42)")
+    cursor.execute(f"""
+        INSERT INTO {TABLE}
+        SELECT
+            i,
+            'user-' || (i %% %(users)s),
+            (%(merchants)s::text[])[1 + floor(random() * %(n_merchants)s)::int] || ' ' ||
+                (%(suffixes)s::text[])[1 + floor(random() * %(n_suffixes)s)::int] || ' ' || (i %% 97),
+            DATE '2020-01-01' + (i %% 2000)::int,
+            TIMESTAMP '2020-01-01' + i * INTERVAL '1 second'
+        FROM generate_series(1::bigint, %(rows)s) AS i
+    """, {
+        'rows': rows, 'users': users,
+        'merchants': MERCHANTS, 'n_merchants': len(MERCHANTS),
+        'suffixes': SUFFIXES, 'n_suffixes': len(SUFFIXES),
+    })
+    print(f"   loaded in {time.perf_counter() - started:.1f}s, building indexes...")
+    started = time.perf_counter()
+    cursor.execute(f"CREATE INDEX ON {TABLE} (user_id_232143, transaction_date_232143)")
+    cursor.execute(f"""
+        CREATE INDEX ON {TABLE} USING gin (
+            user_id_232143, f_unaccent(lower(description_232143)) gin_trgm_ops
+        )
+    """)
+    cursor.execute(f"ANALYZE {TABLE}")
+    print(f"   indexed in {time.perf_counter() - started:.1f}s")
+
+def search_sql(mode):
+    """Same predicates and ordering as TransactionModel for each search mode"""
+    expr = "f_unaccent(lower(description_232143))"
+    order = "transaction_date_232143 DESC, created_at_232143 DESC"
+    if mode == 'exact':
+        where = "description_232143 LIKE %(raw_pattern)s"
+    elif mode == 'contains':
+        where = f"{expr} LIKE f_unaccent(lower(%(pattern)s))"
+    else:
+        where = f"({expr} LIKE f_unaccent(lower(%(pattern)s)) OR f_unaccent(lower(%(term)s)) <%% {expr})"
+        order = f"word_similarity(f_unaccent(lower(%(term)s)), {expr}) DESC, " + order
+    return f"""
+        SELECT transaction_id_232143, description_232143 FROM {TABLE}
+        WHERE user_id_232143 = %(user_id)s AND {where}
+        ORDER BY {order}
+        LIMIT 20
+    """
+
+def time_query(cursor, sql, args, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        cursor.execute(sql, args)
+        cursor.fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    return statistics.median(timings), p95
+
+def scan_type(cursor, sql, args):
+    cursor.execute("EXPLAIN " + sql, args)
+    plan = "\n".join(row[0] for row in cursor.fetchall())
+    for node in ('Bitmap Index Scan', 'Index Scan', 'Seq Scan'):
+        if node in plan:
+            return node
+    return '?'
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark transaction description search')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--dsn', help='Database URL (default: DATABASE_URL from config)')
+    parser.add_argument('--keep', action='store_true', help=f'Keep {TABLE} afterwards')
+    args = parser.parse_args()
+
+    db = connect(args.dsn)
+    db.autocommit = True
+    try:
+        with db.cursor() as cursor:
+            build_table(cursor, args.rows, args.users)
+            user_id = 'user-1'
+            print(f"\n📊 Searching one user's {args.rows // args.users:,} rows, "
+                  f"{args.runs} runs each (LIMIT 20):\n")
+            print(f"{'query':<24} {'mode':<9} {'term':<14} {'rows':>5} {'median ms':>10} {'p95 ms':>8}  plan")
+            for label, mode, term in QUERIES:
+                sql = search_sql(mode)
+                escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+                query_args = {'user_id': user_id, 'pattern': f'%{escaped}%',
+                              'raw_pattern': f'%{term}%', 'term': term}
+                cursor.execute(sql, query_args)
+                found = len(cursor.fetchall())
+                median, p95 = time_query(cursor, sql, query_args, args.runs)
+                print(f"{label:<24} {mode:<9} {term:<14} {found:>5} {median:>10.2f} {p95:>8.2f}  "
+                      f"{scan_type(cursor, sql, query_args)}")
+    finally:
+        if not args.keep:
+            with db.cursor() as cursor:
+                cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        db.close()
+
+if __name__ == '__main__':
+    main()
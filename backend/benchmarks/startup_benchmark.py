@@ -0,0 +1,113 @@
+"""
+Benchmark web worker start-up: import time and RSS of create_app()
+
+Every gunicorn worker (including each one recycled by --max-requests) imports
+the app and calls create_app(). This starts --runs fresh interpreters and in
+each measures:
+
+    import      `from app import create_app`
+    create_app  building the app (blueprints, connection pool)
+    RSS         resident memory once the app is ready
+    loaded      which of numpy / pandas / sklearn / prophet got imported
+
+With --analytics it then runs one Holt-Winters forecast and one anomaly
+scan on synthetic data, and reports what that first analytics request adds,
+i.e. the cost that was moved off start-up onto the analytics code paths.
+
+create_app() opens the database pool, so DATABASE_URL (or the POSTGRES_*
+settings) must point at a reachable database.
+
+Usage:
+    python benchmarks/startup_benchmark.py [--runs 5] [--analytics]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ('numpy', 'pandas', 'sklearn', 'prophet')
+
+# Runs in a fresh interpreter so nothing is already imported
+CHILD = r'''
+import io, json, os, sys, time
+from contextlib import redirect_stdout
+
+def rss_mb():
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+result = {'baseline_mb': rss_mb()}
+with redirect_stdout(io.StringIO()):
+    started = time.perf_counter()
+    from app import create_app
+    result['import_ms'] = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    app = create_app()
+    result['create_app_ms'] = (time.perf_counter() - started) * 1000
+result['rss_mb'] = rss_mb()
+result['loaded'] = [m for m in HEAVY_MODULES if m in sys.modules]
+
+if ANALYTICS:
+    from datetime import date, timedelta
+    with redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        from services.forecast_engine import holt_winters_forecast
+        from services.anomaly_detector import AnomalyDetector
+        points = [(date(2026, 1, 1) + timedelta(days=i), 100000.0 + (i % 7) * 20000) for i in range(90)]
+        holt_winters_forecast(points, 30)
+        AnomalyDetector.detect_fraud(None, [{'amount_232143': 50000 + i * 1000} for i in range(90)])
+        result['analytics_ms'] = (time.perf_counter() - started) * 1000
+    result['analytics_rss_mb'] = rss_mb()
+    result['analytics_loaded'] = [m for m in HEAVY_MODULES if m in sys.modules]
+
+print(json.dumps(result))
+'''
+
+def run_child(analytics):
+    code = f"HEAVY_MODULES = {HEAVY_MODULES!r}\nANALYTICS = {analytics!r}\n" + CHILD
+    output = subprocess.run(
+        [sys.executable, '-c', code],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark create_app() start-up cost')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--analytics', action='store_true',
+                        help='Also time the first forecast and anomaly scan')
+    args = parser.parse_args()
+
+    print(f"🔄 Starting {args.runs} fresh interpreters...")
+    runs = [run_child(args.analytics) for _ in range(args.runs)]
+
+    def median(key):
+        return statistics.median(run[key] for run in runs)
+
+    print(f"\n📊 create_app() start-up, median of {args.runs} runs:\n")
+    print(f"   import:      {median('import_ms'):8.1f} ms")
+    print(f"   create_app:  {median('create_app_ms'):8.1f} ms")
+    print(f"   RSS:         {median('rss_mb'):8.1f} MB (interpreter alone {median('baseline_mb'):.1f} MB)")
+    print(f"   loaded:      {', '.join(runs[0]['loaded']) or 'none of ' + ', '.join(HEAVY_MODULES)}")
+    if args.analytics:
+        print(f"\n📊 First analytics request in that worker:\n")
+        print(f"   time:        {median('analytics_ms'):8.1f} ms")
+        print(f"   RSS:         {median('analytics_rss_mb'):8.1f} MB "
+              f"(+{median('analytics_rss_mb') - median('rss_mb'):.1f} MB)")
+        print(f"   loaded:      {', '.join(runs[0]['analytics_loaded']) or 'none'}")
+
+if __name__ == '__main__':
+    main()
@@ -26,6 +26,106 @@ class Config:
     MYSQL_DB = os.getenv('MYSQL_DB', 'financial_db_232143')
     MYSQL_PORT = int(os.getenv('MYSQL_PORT', 3306))
     
+    # Connection Pool Configuration
+    # Connections idle longer than this are pinged before being handed out;
+    # recently used connections are trusted and stale ones are caught on error
+    DB_POOL_VALIDATE_IDLE_SECONDS = float(os.getenv('DB_POOL_VALIDATE_IDLE_SECONDS', 60))
+    # When every connection is checked out, requests wait in a FIFO queue for up
+    # to DB_POOL_CHECKOUT_TIMEOUT seconds before getting a 503 (0 = fail fast).
+    # At most DB_POOL_MAX_WAITERS requests may wait at once per worker.
+    DB_POOL_CHECKOUT_TIMEOUT = float(os.getenv('DB_POOL_CHECKOUT_TIMEOUT', 3))
+    DB_POOL_MAX_WAITERS = int(os.getenv('DB_POOL_MAX_WAITERS', 32))
+    
+    # Pool sizing: per-worker pools are derived from the gunicorn layout so the
+    # whole deployment stays within DB_MAX_CONNECTIONS server connections.
+    # WEB_CONCURRENCY / GUNICORN_THREADS must match the gunicorn command line.
+    WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', 4))
+    GUNICORN_THREADS = int(os.getenv('GUNICORN_THREADS', 2))
+    DB_INSTANCE_COUNT = int(os.getenv('DB_INSTANCE_COUNT', 1))
+    DB_MAX_CONNECTIONS = int(os.getenv('DB_MAX_CONNECTIONS', 20))
+    DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', 1))
+    DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', 0))  # 0 = derive from the above
+    
+    # 'session', 'transaction' (PgBouncer/Supavisor transaction pooling) or
+    # 'auto' (transaction when DATABASE_URL uses the pooler port 6543)
+    DB_POOL_MODE = os.getenv('DB_POOL_MODE', 'auto').lower()
+    # Server-side statement timeout, set once per connection (session mode only)
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 0))
+    
+    # Query instrumentation
+    # Statements slower than DB_SLOW_QUERY_MS are logged with their fingerprint;
+    # DB_EXPLAIN_SLOW_QUERIES also logs EXPLAIN (ANALYZE, BUFFERS) for slow reads
+    # (this re-runs the query, so enable it only while investigating)
+    DB_SLOW_QUERY_MS = float(os.getenv('DB_SLOW_QUERY_MS', 200))
+    DB_EXPLAIN_SLOW_QUERIES = os.getenv('DB_EXPLAIN_SLOW_QUERIES', 'False').lower() == 'true'
+    # Requests issuing this many queries, or repeating one statement this often, are flagged
+    DB_REQUEST_QUERY_WARN = int(os.getenv('DB_REQUEST_QUERY_WARN', 25))
+    DB_REPEATED_QUERY_WARN = int(os.getenv('DB_REPEATED_QUERY_WARN', 5))
+    
+    # Analytics
+    # Serve summaries and category totals from daily_rollups_232143. Enable
+    # only after migrations/add_daily_rollups.py (creates and backfills the
+    # table); False re-aggregates raw transactions
+    ANALYTICS_USE_ROLLUPS = os.getenv('ANALYTICS_USE_ROLLUPS', 'False').lower() == 'true'
+    
+    # Transaction search: contains/fuzzy modes use f_unaccent() and the trigram
+    # index. Enable only after migrations/add_transaction_search.py; False
+    # falls back to ILIKE
+    SEARCH_USE_TRIGRAM = os.getenv('SEARCH_USE_TRIGRAM', 'False').lower() == 'true'
+    
+    # Online anomaly alerts: every transaction write also updates the running
+    # per-category stats in category_stats_232143. Enable only after
+    # migrations/add_category_stats.py and migrations/add_anomaly_scan.py (the
+    # alert's notification dedupe key). A new expense this many standard
+    # deviations above its category mean, with at least ANOMALY_ALERT_MIN_COUNT
+    # earlier ones, raises a spending_insight notification.
+    ANOMALY_STATS_ENABLED = os.getenv('ANOMALY_STATS_ENABLED', 'False').lower() == 'true'
+    ANOMALY_ALERT_Z_SCORE = float(os.getenv('ANOMALY_ALERT_Z_SCORE', 4.0))
+    ANOMALY_ALERT_MIN_COUNT = int(os.getenv('ANOMALY_ALERT_MIN_COUNT', 10))
+    
+    # Analytics result cache (services/cache_service.py)
+    # Entries are invalidated exactly by per-user data versions bumped on every
+    # write; the TTL only bounds memory. Without CACHE_REDIS_URL each worker keeps
+    # an in-process LRU and versions live in user_data_versions_232143, so enable
+    # it only after migrations/add_user_data_versions.py (or with Redis).
+    CACHE_ENABLED = os.getenv('CACHE_ENABLED', 'False').lower() == 'true'
+    CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', '')
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 2048))
+    CACHE_TTL_SECONDS = int(os.getenv('CACHE_TTL_SECONDS', 86400))
+    
+    # Stored recommendations (ai_recommendations_232143) are served until they
+    # expire or the user's data changes, then regenerated in the background
+    # while the old set is still returned
+    RECOMMENDATIONS_TTL_HOURS = int(os.getenv('RECOMMENDATIONS_TTL_HOURS', 24))
+    RECOMMENDATIONS_MODEL_VERSION = os.getenv('RECOMMENDATIONS_MODEL_VERSION', 'rules-prophet-1')
+    
+    # Background jobs (jobs_232143, drained by worker.py). Enable only after
+    # migrations/add_jobs.py with a worker running. With JOBS_ENABLED off,
+    # recommendation refreshes run on an in-process thread instead and
+    # /api/v1/jobs rejects submissions with 503.
+    JOBS_ENABLED = os.getenv('JOBS_ENABLED', 'False').lower() == 'true'
+    JOB_POLL_INTERVAL_SECONDS = float(os.getenv('JOB_POLL_INTERVAL_SECONDS', 2))
+    JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 3))
+    JOB_RETRY_BASE_SECONDS = int(os.getenv('JOB_RETRY_BASE_SECONDS', 30))
+    # Running jobs locked longer than this are assumed orphaned by a dead worker
+    JOB_LOCK_TIMEOUT_SECONDS = int(os.getenv('JOB_LOCK_TIMEOUT_SECONDS', 900))
+    JOB_RETENTION_DAYS = int(os.getenv('JOB_RETENTION_DAYS', 7))
+    
+    # Forecasting engine: 'holt_winters' (NumPy, services/forecast_engine.py) or
+    # 'prophet' (slower, opt-in; falls back to holt_winters when unavailable).
+    # POST /data/forecast and data.forecast jobs can also ask for an engine.
+    FORECAST_ENGINE = os.getenv('FORECAST_ENGINE', 'holt_winters')
+    
+    # Prophet fits run in spawned fit processes (services/forecast_pool.py), one
+    # per concurrent fit and at most FORECAST_POOL_WORKERS per process. When all
+    # are busy, or after the timeout, callers fall back to their cheap estimator.
+    FORECAST_POOL_WORKERS = int(os.getenv('FORECAST_POOL_WORKERS', 1))
+    FORECAST_FIT_TIMEOUT_SECONDS = float(os.getenv('FORECAST_FIT_TIMEOUT_SECONDS', 20))
+    
+    # GET /data/export?format=ndjson streams the backup from server-side cursors,
+    # holding at most this many rows of a section in memory
+    EXPORT_STREAM_CHUNK_SIZE = int(os.getenv('EXPORT_STREAM_CHUNK_SIZE', 1000))
+    
     # JWT Configuration
     # ⚠️ SECURITY WARNING: The default value below is ONLY for development!
     # In production, you MUST set JWT_SECRET_KEY environment variable with a strong,
@@ -34,6 +134,10 @@ class Config:
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'dev-secret-key-232143-change-in-production')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(days=7)
     
+    # Admin Configuration
+    # Comma-separated user IDs allowed to call the /admin operational endpoints
+    ADMIN_USER_IDS = [u.strip() for u in os.getenv('ADMIN_USER_IDS', '').split(',') if u.strip()]
+    
     # API Configuration
     API_PREFIX = '/api/v1'
     DEBUG = os.getenv('DEBUG', 'True').lower() == 'true'
@@ -36,6 +36,24 @@ CREATE TABLE ai_recommendations_232143 (
   PRIMARY KEY (recommendation_id_232143)
 );
 
+-- ============================================================
+-- Table: anomaly_scan_checkpoints_232143
+-- ============================================================
+-- Progress of the nightly anomaly scan (scan_anomalies.py), one row per scan
+-- and shard; a restarted scan resumes after last_user_id_232143.
+CREATE TABLE anomaly_scan_checkpoints_232143 (
+  scan_id_232143 VARCHAR(64) NOT NULL,
+  shard_232143 INTEGER NOT NULL,
+  shard_count_232143 INTEGER NOT NULL,
+  last_user_id_232143 VARCHAR(36) DEFAULT NULL,
+  users_scanned_232143 BIGINT NOT NULL DEFAULT 0,
+  notifications_created_232143 BIGINT NOT NULL DEFAULT 0,
+  started_at_232143 TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
+  updated_at_232143 TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
+  finished_at_232143 TIMESTAMP NULL DEFAULT NULL,
+  PRIMARY KEY (scan_id_232143, shard_232143)
+);
+
 -- ============================================================
 -- Table: bill_payments_232143
 -- ============================================================
@@ -98,6 +116,38 @@ CREATE TABLE categories_232143 (
   PRIMARY KEY (category_id_232143)
 );
 
+-- ============================================================
+-- Table: category_stats_232143
+-- ============================================================
+-- Running amount stats (Welford count, mean, M2) per user, type and category,
+-- updated by TransactionModel on every write. category_key_232143 is '' for
+-- uncategorized transactions.
+CREATE TABLE category_stats_232143 (
+  user_id_232143 VARCHAR(36) NOT NULL,
+  type_232143 VARCHAR(20) NOT NULL,
+  category_key_232143 VARCHAR(36) NOT NULL DEFAULT '',
+  count_232143 BIGINT NOT NULL DEFAULT 0,
+  mean_232143 DOUBLE PRECISION NOT NULL DEFAULT 0,
+  m2_232143 DOUBLE PRECISION NOT NULL DEFAULT 0,
+  updated_at_232143 TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (user_id_232143, type_232143, category_key_232143)
+);
+
+-- ============================================================
+-- Table: daily_rollups_232143
+-- ============================================================
+-- Per-user daily totals maintained by the maintain_daily_rollups triggers.
+-- category_key_232143 is '' for uncategorized transactions.
+CREATE TABLE daily_rollups_232143 (
+  user_id_232143 VARCHAR(36) NOT NULL,
+  rollup_date_232143 DATE NOT NULL,
+  category_key_232143 VARCHAR(36) NOT NULL DEFAULT '',
+  type_232143 VARCHAR(20) NOT NULL,
+  total_amount_232143 DECIMAL(17,2) NOT NULL DEFAULT 0,
+  transaction_count_232143 INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (user_id_232143, rollup_date_232143, category_key_232143, type_232143)
+);
+
 -- ============================================================
 -- Table: financial_goals_232143
 -- ============================================================
@@ -160,6 +210,32 @@ CREATE TABLE financial_obligations_232143 (
   PRIMARY KEY (obligation_id_232143)
 );
 
+-- ============================================================
+-- Table: jobs_232143
+-- ============================================================
+-- Background job queue drained by worker.py (FOR UPDATE SKIP LOCKED).
+-- dedupe_key_232143 allows one queued or running job per key.
+CREATE TABLE jobs_232143 (
+  job_id_232143 VARCHAR(36) NOT NULL DEFAULT gen_random_uuid()::text,
+  user_id_232143 VARCHAR(36) DEFAULT NULL,
+  job_type_232143 VARCHAR(50) NOT NULL,
+  payload_232143 JSONB DEFAULT NULL,
+  status_232143 VARCHAR(20) NOT NULL DEFAULT 'queued' CHECK (status_232143 IN ('queued','running','succeeded','failed','cancelled')),
+  priority_232143 INTEGER NOT NULL DEFAULT 0,
+  attempts_232143 INTEGER NOT NULL DEFAULT 0,
+  max_attempts_232143 INTEGER NOT NULL DEFAULT 3,
+  run_at_232143 TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  locked_at_232143 TIMESTAMP NULL DEFAULT NULL,
+  locked_by_232143 VARCHAR(100) DEFAULT NULL,
+  dedupe_key_232143 VARCHAR(255) DEFAULT NULL,
+  result_232143 JSONB DEFAULT NULL,
+  error_232143 TEXT DEFAULT NULL,
+  created_at_232143 TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
+  updated_at_232143 TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
+  finished_at_232143 TIMESTAMP NULL DEFAULT NULL,
+  PRIMARY KEY (job_id_232143)
+);
+
 -- ============================================================
 -- Table: location_intelligence_232143
 -- ============================================================
@@ -189,6 +265,8 @@ CREATE TABLE location_intelligence_232143 (
 -- ============================================================
 -- Table: notifications_232143
 -- ============================================================
+-- dedupe_key_232143 allows one notification per key and user (e.g. one
+-- anomaly alert per transaction).
 CREATE TABLE notifications_232143 (
   notification_id_232143 VARCHAR(36) NOT NULL DEFAULT gen_random_uuid()::text,
   user_id_232143 VARCHAR(36) NOT NULL,
@@ -203,6 +281,7 @@ CREATE TABLE notifications_232143 (
   read_at_232143 TIMESTAMP NULL DEFAULT NULL,
   priority_232143 VARCHAR(20) DEFAULT 'normal' CHECK (priority_232143 IN ('low','normal','high')),
   category_232143 VARCHAR(100) DEFAULT NULL,
+  dedupe_key_232143 VARCHAR(255) DEFAULT NULL,
   created_at_232143 TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
   PRIMARY KEY (notification_id_232143)
 );
@@ -274,6 +353,17 @@ CREATE TABLE transactions_232143 (
   PRIMARY KEY (transaction_id_232143)
 );
 
+-- ============================================================
+-- Table: user_data_versions_232143
+-- ============================================================
+-- Bumped on every write to a user's data; part of every analytics cache key
+CREATE TABLE user_data_versions_232143 (
+  user_id_232143 VARCHAR(36) NOT NULL,
+  version_232143 BIGINT NOT NULL DEFAULT 0,
+  updated_at_232143 TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (user_id_232143)
+);
+
 -- ============================================================
 -- Table: users_232143
 -- ============================================================
@@ -337,6 +427,12 @@ CREATE INDEX idx_goals_type_232143 ON financial_goals_232143(goal_type_232143);
 -- financial_obligations_232143 indexes
 CREATE INDEX idx_obligations_user_232143 ON financial_obligations_232143(user_id_232143);
 
+-- jobs_232143 indexes
+CREATE INDEX idx_jobs_dequeue_232143 ON jobs_232143(priority_232143 DESC, run_at_232143) WHERE status_232143 = 'queued';
+CREATE INDEX idx_jobs_user_232143 ON jobs_232143(user_id_232143, created_at_232143);
+CREATE INDEX idx_jobs_running_232143 ON jobs_232143(locked_at_232143) WHERE status_232143 = 'running';
+CREATE UNIQUE INDEX idx_jobs_dedupe_232143 ON jobs_232143(dedupe_key_232143) WHERE status_232143 IN ('queued','running');
+
 -- location_intelligence_232143 indexes
 CREATE INDEX idx_location_coords_232143 ON location_intelligence_232143(latitude_232143, longitude_232143);
 CREATE INDEX idx_location_type_232143 ON location_intelligence_232143(place_type_232143);
@@ -349,6 +445,7 @@ CREATE INDEX idx_notifications_type_232143 ON notifications_232143(type_232143);
 CREATE INDEX idx_notifications_unread_232143 ON notifications_232143(is_read_232143);
 CREATE INDEX idx_notifications_created_232143 ON notifications_232143(created_at_232143);
 CREATE INDEX idx_notifications_priority_232143 ON notifications_232143(priority_232143);
+CREATE UNIQUE INDEX idx_notifications_dedupe_232143 ON notifications_232143(user_id_232143, dedupe_key_232143) WHERE dedupe_key_232143 IS NOT NULL;
 
 -- obligation_payments_232143 indexes
 CREATE INDEX idx_obligation_payments_obligation_232143 ON obligation_payments_232143(obligation_id_232143);
@@ -372,6 +469,7 @@ CREATE INDEX idx_transactions_recurring_232143 ON transactions_232143(is_recurri
 CREATE INDEX idx_transactions_created_232143 ON transactions_232143(created_at_232143);
 CREATE INDEX idx_transaction_date_user ON transactions_232143(user_id_232143, transaction_date_232143);
 CREATE INDEX idx_type_date ON transactions_232143(type_232143, transaction_date_232143);
+CREATE INDEX idx_transactions_keyset_232143 ON transactions_232143(user_id_232143, transaction_date_232143 DESC, (COALESCE(created_at_232143, '-infinity'::timestamp)) DESC, transaction_id_232143 DESC);
 
 -- users_232143 indexes
 CREATE INDEX idx_users_email_232143 ON users_232143(email_232143);
@@ -398,6 +496,14 @@ ALTER TABLE categories_232143
   ADD CONSTRAINT categories_232143_fk_parent FOREIGN KEY (parent_category_id_232143) 
   REFERENCES categories_232143(category_id_232143);
 
+ALTER TABLE category_stats_232143
+  ADD CONSTRAINT category_stats_232143_fk_user FOREIGN KEY (user_id_232143) 
+  REFERENCES users_232143(user_id_232143) ON DELETE CASCADE;
+
+ALTER TABLE daily_rollups_232143
+  ADD CONSTRAINT daily_rollups_232143_fk_user FOREIGN KEY (user_id_232143) 
+  REFERENCES users_232143(user_id_232143) ON DELETE CASCADE;
+
 ALTER TABLE financial_goals_232143
   ADD CONSTRAINT financial_goals_232143_fk_user FOREIGN KEY (user_id_232143) 
   REFERENCES users_232143(user_id_232143) ON DELETE CASCADE;
@@ -406,6 +512,10 @@ ALTER TABLE financial_obligations_232143
   ADD CONSTRAINT financial_obligations_232143_fk_user FOREIGN KEY (user_id_232143) 
   REFERENCES users_232143(user_id_232143) ON DELETE CASCADE;
 
+ALTER TABLE jobs_232143
+  ADD CONSTRAINT jobs_232143_fk_user FOREIGN KEY (user_id_232143) 
+  REFERENCES users_232143(user_id_232143) ON DELETE CASCADE;
+
 ALTER TABLE notifications_232143
   ADD CONSTRAINT notifications_232143_fk_user FOREIGN KEY (user_id_232143) 
   REFERENCES users_232143(user_id_232143) ON DELETE CASCADE;
@@ -434,6 +544,10 @@ ALTER TABLE transactions_232143
   ADD CONSTRAINT transactions_232143_fk_predicted_category FOREIGN KEY (predicted_category_id_232143) 
   REFERENCES categories_232143(category_id_232143);
 
+ALTER TABLE user_data_versions_232143
+  ADD CONSTRAINT user_data_versions_232143_fk_user FOREIGN KEY (user_id_232143) 
+  REFERENCES users_232143(user_id_232143) ON DELETE CASCADE;
+
 -- ============================================================
 -- Functions and Triggers for updated_at
 -- ============================================================
@@ -497,6 +611,143 @@ CREATE TRIGGER after_transaction_insert_232143
     AFTER INSERT ON transactions_232143
     FOR EACH ROW EXECUTE FUNCTION update_budget_spent_amount();
 
+-- ============================================================
+-- Triggers for daily_rollups_232143
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION maintain_daily_rollups()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO daily_rollups_232143 AS r (
+            user_id_232143, rollup_date_232143, category_key_232143, type_232143,
+            total_amount_232143, transaction_count_232143
+        )
+        SELECT user_id_232143, transaction_date_232143, COALESCE(category_id_232143, ''), type_232143,
+               SUM(amount_232143), COUNT(*)
+        FROM new_rows
+        GROUP BY 1, 2, 3, 4
+        ORDER BY 1, 2, 3, 4
+        ON CONFLICT (user_id_232143, rollup_date_232143, category_key_232143, type_232143) DO UPDATE
+        SET total_amount_232143 = r.total_amount_232143 + EXCLUDED.total_amount_232143,
+            transaction_count_232143 = r.transaction_count_232143 + EXCLUDED.transaction_count_232143;
+
+    ELSIF TG_OP = 'UPDATE' THEN
+        -- New values minus old values; rows whose rollup key and amount did
+        -- not change net to zero and are skipped
+        INSERT INTO daily_rollups_232143 AS r (
+            user_id_232143, rollup_date_232143, category_key_232143, type_232143,
+            total_amount_232143, transaction_count_232143
+        )
+        SELECT user_id, rollup_date, category_key, type, SUM(amount), SUM(n)
+        FROM (
+            SELECT user_id_232143 AS user_id, transaction_date_232143 AS rollup_date,
+                   COALESCE(category_id_232143, '') AS category_key, type_232143 AS type,
+                   amount_232143 AS amount, 1 AS n
+            FROM new_rows
+            UNION ALL
+            SELECT user_id_232143, transaction_date_232143, COALESCE(category_id_232143, ''), type_232143,
+                   -amount_232143, -1
+            FROM old_rows
+        ) delta
+        GROUP BY 1, 2, 3, 4
+        HAVING SUM(n) <> 0 OR SUM(amount) <> 0
+        ORDER BY 1, 2, 3, 4
+        ON CONFLICT (user_id_232143, rollup_date_232143, category_key_232143, type_232143) DO UPDATE
+        SET total_amount_232143 = r.total_amount_232143 + EXCLUDED.total_amount_232143,
+            transaction_count_232143 = r.transaction_count_232143 + EXCLUDED.transaction_count_232143;
+
+        DELETE FROM daily_rollups_232143 r
+        USING old_rows o
+        WHERE r.user_id_232143 = o.user_id_232143
+          AND r.rollup_date_232143 = o.transaction_date_232143
+          AND r.category_key_232143 = COALESCE(o.category_id_232143, '')
+          AND r.type_232143 = o.type_232143
+          AND r.transaction_count_232143 <= 0;
+
+    ELSIF TG_OP = 'DELETE' THEN
+        -- UPDATE rather than upsert: when a user is deleted the cascade has
+        -- already removed their rollup rows and there is nothing to subtract from
+        UPDATE daily_rollups_232143 r
+        SET total_amount_232143 = r.total_amount_232143 - d.amount,
+            transaction_count_232143 = r.transaction_count_232143 - d.n
+        FROM (
+            SELECT user_id_232143, transaction_date_232143, COALESCE(category_id_232143, '') AS category_key,
+                   type_232143, SUM(amount_232143) AS amount, COUNT(*) AS n
+            FROM old_rows
+            GROUP BY 1, 2, 3, 4
+        ) d
+        WHERE r.user_id_232143 = d.user_id_232143
+          AND r.rollup_date_232143 = d.transaction_date_232143
+          AND r.category_key_232143 = d.category_key
+          AND r.type_232143 = d.type_232143;
+
+        DELETE FROM daily_rollups_232143 r
+        USING old_rows o
+        WHERE r.user_id_232143 = o.user_id_232143
+          AND r.rollup_date_232143 = o.transaction_date_232143
+          AND r.category_key_232143 = COALESCE(o.category_id_232143, '')
+          AND r.type_232143 = o.type_232143
+          AND r.transaction_count_232143 <= 0;
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER daily_rollups_insert_232143
+    AFTER INSERT ON transactions_232143
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_daily_rollups();
+
+CREATE TRIGGER daily_rollups_update_232143
+    AFTER UPDATE ON transactions_232143
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_daily_rollups();
+
+CREATE TRIGGER daily_rollups_delete_232143
+    AFTER DELETE ON transactions_232143
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_daily_rollups();
+
+-- ============================================================
+-- Transaction description search (pg_trgm, unaccent, btree_gin)
+-- ============================================================
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+
+-- unaccent() is only STABLE (it resolves its dictionary through search_path),
+-- so it cannot appear in an index expression. Wrap it with the dictionary
+-- schema-qualified; the schema is looked up because Supabase installs
+-- extensions into "extensions" rather than "public".
+DO $$
+DECLARE
+    ext_schema text;
+BEGIN
+    SELECT n.nspname INTO ext_schema
+    FROM pg_extension e
+    JOIN pg_namespace n ON n.oid = e.extnamespace
+    WHERE e.extname = 'unaccent';
+
+    EXECUTE format(
+        'CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text '
+        'LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT '
+        'AS %L',
+        format('SELECT %I.unaccent(%L::regdictionary, $1)', ext_schema, quote_ident(ext_schema) || '.unaccent')
+    );
+END
+$$;
+
+-- One GIN index serves "user_id = ? AND <normalized description> LIKE '%term%'"
+-- and the trigram similarity operators used by fuzzy search.
+-- btree_gin provides the GIN opclass for the user_id column.
+CREATE INDEX IF NOT EXISTS idx_transactions_description_trgm
+ON transactions_232143 USING gin (
+    user_id_232143,
+    f_unaccent(lower(description_232143)) gin_trgm_ops
+);
+
 -- ============================================================
 -- View: user_financial_summary_232143
 -- ============================================================
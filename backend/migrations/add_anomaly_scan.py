@@ -0,0 +1,62 @@
+"""
+Migration script for the nightly anomaly scan (scan_anomalies.py)
+Creates anomaly_scan_checkpoints_232143 and adds notifications_232143.dedupe_key_232143,
+which the scan and the write-time anomaly alert use to notify once per transaction
+"""
+
+import sys
+from rebuild_rollups import connect
+
+def run_migration():
+    """Create the checkpoint table and the notification dedupe key"""
+    print("🔄 Starting migration: Adding anomaly scan checkpoints...")
+
+    db = connect()
+    try:
+        with db.cursor() as cursor:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS anomaly_scan_checkpoints_232143 (
+                  scan_id_232143 VARCHAR(64) NOT NULL,
+                  shard_232143 INTEGER NOT NULL,
+                  shard_count_232143 INTEGER NOT NULL,
+                  last_user_id_232143 VARCHAR(36) DEFAULT NULL,
+                  users_scanned_232143 BIGINT NOT NULL DEFAULT 0,
+                  notifications_created_232143 BIGINT NOT NULL DEFAULT 0,
+                  started_at_232143 TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
+                  updated_at_232143 TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
+                  finished_at_232143 TIMESTAMP NULL DEFAULT NULL,
+                  PRIMARY KEY (scan_id_232143, shard_232143)
+                )
+            """)
+            cursor.execute("""
+                ALTER TABLE notifications_232143
+                ADD COLUMN IF NOT EXISTS dedupe_key_232143 VARCHAR(255) DEFAULT NULL
+            """)
+            cursor.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_notifications_dedupe_232143
+                ON notifications_232143(user_id_232143, dedupe_key_232143)
+                WHERE dedupe_key_232143 IS NOT NULL
+            """)
+            db.commit()
+
+        print("\n✅ Migration completed successfully!")
+        print("\n📊 Added:")
+        print("   - table anomaly_scan_checkpoints_232143")
+        print("   - column notifications_232143.dedupe_key_232143")
+        print("   - index idx_notifications_dedupe_232143")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        import traceback
+        traceback.print_exc()
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("  ANOMALY SCAN MIGRATION")
+    print("=" * 60)
+    run_migration()
+    print("=" * 60)
@@ -0,0 +1,78 @@
+"""
+Migration script to add running per-category transaction stats
+Creates category_stats_232143 and backfills it from transactions_232143
+
+Safe to re-run: the backfill recomputes every row, which also repairs any
+drift (e.g. after transactions were changed outside TransactionModel).
+"""
+
+import sys
+from config import Config
+from rebuild_rollups import connect
+
+def run_migration():
+    """Create category_stats_232143 and fill it from existing transactions"""
+    print("🔄 Starting migration: Adding category stats...")
+
+    db = connect()
+    try:
+        with db.cursor() as cursor:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS category_stats_232143 (
+                  user_id_232143 VARCHAR(36) NOT NULL,
+                  type_232143 VARCHAR(20) NOT NULL,
+                  category_key_232143 VARCHAR(36) NOT NULL DEFAULT '',
+                  count_232143 BIGINT NOT NULL DEFAULT 0,
+                  mean_232143 DOUBLE PRECISION NOT NULL DEFAULT 0,
+                  m2_232143 DOUBLE PRECISION NOT NULL DEFAULT 0,
+                  updated_at_232143 TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
+                  PRIMARY KEY (user_id_232143, type_232143, category_key_232143),
+                  CONSTRAINT category_stats_232143_fk_user FOREIGN KEY (user_id_232143)
+                    REFERENCES users_232143(user_id_232143) ON DELETE CASCADE
+                )
+            """)
+            db.commit()
+        print("✅ Table category_stats_232143 created")
+
+        print("🔄 Backfilling stats from existing transactions...")
+        with db.cursor() as cursor:
+            # Writers update the stats in the same statement as the transaction,
+            # so while this lock is held they wait and apply after the rebuild
+            cursor.execute("LOCK TABLE category_stats_232143 IN SHARE ROW EXCLUSIVE MODE")
+            cursor.execute("DELETE FROM category_stats_232143")
+            # M2 = n * population variance
+            cursor.execute("""
+                INSERT INTO category_stats_232143 (
+                    user_id_232143, type_232143, category_key_232143,
+                    count_232143, mean_232143, m2_232143
+                )
+                SELECT user_id_232143, type_232143, COALESCE(category_id_232143, ''),
+                       COUNT(*), AVG(amount_232143)::float8,
+                       COALESCE(VAR_POP(amount_232143) * COUNT(*), 0)::float8
+                FROM transactions_232143
+                GROUP BY 1, 2, 3
+            """)
+            rows = cursor.rowcount
+        db.commit()
+
+        print("\n✅ Migration completed successfully!")
+        print(f"\n📊 Backfilled {rows} category stats rows")
+        if not Config.ANOMALY_STATS_ENABLED:
+            print("\n💡 Set ANOMALY_STATS_ENABLED=True (after migrations/add_anomaly_scan.py) to maintain")
+            print("   the stats and raise anomaly alerts")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        import traceback
+        traceback.print_exc()
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("  CATEGORY STATS MIGRATION")
+    print("=" * 60)
+    run_migration()
+    print("=" * 60)
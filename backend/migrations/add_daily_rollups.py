@@ -0,0 +1,52 @@
+"""
+Migration script to add the daily transaction rollup (PostgreSQL version)
+Creates daily_rollups_232143 and its triggers, then backfills it
+"""
+
+import sys
+import os
+from config import Config
+from rebuild_rollups import connect, rebuild_all
+
+def run_migration():
+    """Create the rollup table and triggers, then backfill every user"""
+    print("🔄 Starting migration: Adding daily rollups...")
+
+    db = connect()
+    try:
+        migration_file = os.path.join(os.path.dirname(__file__), 'add_daily_rollups.sql')
+        with open(migration_file, 'r', encoding='utf-8') as f:
+            sql_content = f.read()
+
+        # Run the file as one batch: the function body contains semicolons
+        with db.cursor() as cursor:
+            cursor.execute(sql_content)
+        db.commit()
+        print("✅ Table daily_rollups_232143 and triggers created")
+
+        print("🔄 Backfilling rollups from existing transactions...")
+        rebuild_all(db)
+
+        print("\n✅ Migration completed successfully!")
+        print("\n📊 Triggers added:")
+        print("   - daily_rollups_insert_232143")
+        print("   - daily_rollups_update_232143")
+        print("   - daily_rollups_delete_232143")
+        if not Config.ANALYTICS_USE_ROLLUPS:
+            print("\n💡 Set ANALYTICS_USE_ROLLUPS=True to serve analytics from the rollup")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        import traceback
+        traceback.print_exc()
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("  DAILY ROLLUPS MIGRATION")
+    print("=" * 60)
+    run_migration()
+    print("=" * 60)
@@ -0,0 +1,119 @@
+-- Per-user daily rollup of transactions, maintained by triggers
+-- PostgreSQL version
+--
+-- One row per (user, date, category, type) with the sum and count of the
+-- matching transactions. Analytics read this instead of re-aggregating
+-- transactions_232143, so their cost depends on days, not transactions.
+-- category_key_232143 is '' for uncategorized rows (primary keys cannot be NULL).
+
+CREATE TABLE IF NOT EXISTS daily_rollups_232143 (
+  user_id_232143 VARCHAR(36) NOT NULL,
+  rollup_date_232143 DATE NOT NULL,
+  category_key_232143 VARCHAR(36) NOT NULL DEFAULT '',
+  type_232143 VARCHAR(20) NOT NULL,
+  total_amount_232143 DECIMAL(17,2) NOT NULL DEFAULT 0,
+  transaction_count_232143 INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (user_id_232143, rollup_date_232143, category_key_232143, type_232143),
+  CONSTRAINT daily_rollups_232143_fk_user FOREIGN KEY (user_id_232143)
+    REFERENCES users_232143(user_id_232143) ON DELETE CASCADE
+);
+
+-- Statement-level triggers: a bulk insert/update/delete applies one grouped
+-- delta per affected rollup row instead of one upsert per transaction.
+CREATE OR REPLACE FUNCTION maintain_daily_rollups()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO daily_rollups_232143 AS r (
+            user_id_232143, rollup_date_232143, category_key_232143, type_232143,
+            total_amount_232143, transaction_count_232143
+        )
+        SELECT user_id_232143, transaction_date_232143, COALESCE(category_id_232143, ''), type_232143,
+               SUM(amount_232143), COUNT(*)
+        FROM new_rows
+        GROUP BY 1, 2, 3, 4
+        ORDER BY 1, 2, 3, 4
+        ON CONFLICT (user_id_232143, rollup_date_232143, category_key_232143, type_232143) DO UPDATE
+        SET total_amount_232143 = r.total_amount_232143 + EXCLUDED.total_amount_232143,
+            transaction_count_232143 = r.transaction_count_232143 + EXCLUDED.transaction_count_232143;
+
+    ELSIF TG_OP = 'UPDATE' THEN
+        -- New values minus old values; rows whose rollup key and amount did
+        -- not change net to zero and are skipped
+        INSERT INTO daily_rollups_232143 AS r (
+            user_id_232143, rollup_date_232143, category_key_232143, type_232143,
+            total_amount_232143, transaction_count_232143
+        )
+        SELECT user_id, rollup_date, category_key, type, SUM(amount), SUM(n)
+        FROM (
+            SELECT user_id_232143 AS user_id, transaction_date_232143 AS rollup_date,
+                   COALESCE(category_id_232143, '') AS category_key, type_232143 AS type,
+                   amount_232143 AS amount, 1 AS n
+            FROM new_rows
+            UNION ALL
+            SELECT user_id_232143, transaction_date_232143, COALESCE(category_id_232143, ''), type_232143,
+                   -amount_232143, -1
+            FROM old_rows
+        ) delta
+        GROUP BY 1, 2, 3, 4
+        HAVING SUM(n) <> 0 OR SUM(amount) <> 0
+        ORDER BY 1, 2, 3, 4
+        ON CONFLICT (user_id_232143, rollup_date_232143, category_key_232143, type_232143) DO UPDATE
+        SET total_amount_232143 = r.total_amount_232143 + EXCLUDED.total_amount_232143,
+            transaction_count_232143 = r.transaction_count_232143 + EXCLUDED.transaction_count_232143;
+
+        DELETE FROM daily_rollups_232143 r
+        USING old_rows o
+        WHERE r.user_id_232143 = o.user_id_232143
+          AND r.rollup_date_232143 = o.transaction_date_232143
+          AND r.category_key_232143 = COALESCE(o.category_id_232143, '')
+          AND r.type_232143 = o.type_232143
+          AND r.transaction_count_232143 <= 0;
+
+    ELSIF TG_OP = 'DELETE' THEN
+        -- UPDATE rather than upsert: when a user is deleted the cascade has
+        -- already removed their rollup rows and there is nothing to subtract from
+        UPDATE daily_rollups_232143 r
+        SET total_amount_232143 = r.total_amount_232143 - d.amount,
+            transaction_count_232143 = r.transaction_count_232143 - d.n
+        FROM (
+            SELECT user_id_232143, transaction_date_232143, COALESCE(category_id_232143, '') AS category_key,
+                   type_232143, SUM(amount_232143) AS amount, COUNT(*) AS n
+            FROM old_rows
+            GROUP BY 1, 2, 3, 4
+        ) d
+        WHERE r.user_id_232143 = d.user_id_232143
+          AND r.rollup_date_232143 = d.transaction_date_232143
+          AND r.category_key_232143 = d.category_key
+          AND r.type_232143 = d.type_232143;
+
+        DELETE FROM daily_rollups_232143 r
+        USING old_rows o
+        WHERE r.user_id_232143 = o.user_id_232143
+          AND r.rollup_date_232143 = o.transaction_date_232143
+          AND r.category_key_232143 = COALESCE(o.category_id_232143, '')
+          AND r.type_232143 = o.type_232143
+          AND r.transaction_count_232143 <= 0;
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS daily_rollups_insert_232143 ON transactions_232143;
+DROP TRIGGER IF EXISTS daily_rollups_update_232143 ON transactions_232143;
+DROP TRIGGER IF EXISTS daily_rollups_delete_232143 ON transactions_232143;
+
+CREATE TRIGGER daily_rollups_insert_232143
+    AFTER INSERT ON transactions_232143
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_daily_rollups();
+
+CREATE TRIGGER daily_rollups_update_232143
+    AFTER UPDATE ON transactions_232143
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_daily_rollups();
+
+CREATE TRIGGER daily_rollups_delete_232143
+    AFTER DELETE ON transactions_232143
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_daily_rollups();
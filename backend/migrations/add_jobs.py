@@ -0,0 +1,98 @@
+"""
+Migration script to add the background job queue
+Run this before starting worker.py
+"""
+
+import sys
+import psycopg2
+from psycopg2.extras import RealDictCursor
+from config import Config
+
+def run_migration():
+    """Create jobs_232143 and its indexes"""
+    print("🔄 Starting migration: Adding background job queue...")
+
+    # Connect to database
+    if Config.DATABASE_URL:
+        db = psycopg2.connect(Config.DATABASE_URL, cursor_factory=RealDictCursor)
+    else:
+        db = psycopg2.connect(
+            host=Config.POSTGRES_HOST,
+            user=Config.POSTGRES_USER,
+            password=Config.POSTGRES_PASSWORD,
+            database=Config.POSTGRES_DB,
+            port=Config.POSTGRES_PORT,
+            cursor_factory=RealDictCursor
+        )
+
+    try:
+        with db.cursor() as cursor:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS jobs_232143 (
+                  job_id_232143 VARCHAR(36) NOT NULL DEFAULT gen_random_uuid()::text,
+                  user_id_232143 VARCHAR(36) DEFAULT NULL,
+                  job_type_232143 VARCHAR(50) NOT NULL,
+                  payload_232143 JSONB DEFAULT NULL,
+                  status_232143 VARCHAR(20) NOT NULL DEFAULT 'queued' CHECK (status_232143 IN ('queued','running','succeeded','failed','cancelled')),
+                  priority_232143 INTEGER NOT NULL DEFAULT 0,
+                  attempts_232143 INTEGER NOT NULL DEFAULT 0,
+                  max_attempts_232143 INTEGER NOT NULL DEFAULT 3,
+                  run_at_232143 TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                  locked_at_232143 TIMESTAMP NULL DEFAULT NULL,
+                  locked_by_232143 VARCHAR(100) DEFAULT NULL,
+                  dedupe_key_232143 VARCHAR(255) DEFAULT NULL,
+                  result_232143 JSONB DEFAULT NULL,
+                  error_232143 TEXT DEFAULT NULL,
+                  created_at_232143 TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
+                  updated_at_232143 TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
+                  finished_at_232143 TIMESTAMP NULL DEFAULT NULL,
+                  PRIMARY KEY (job_id_232143),
+                  CONSTRAINT jobs_232143_fk_user FOREIGN KEY (user_id_232143)
+                    REFERENCES users_232143(user_id_232143) ON DELETE CASCADE
+                )
+            """)
+            # Workers claim the highest-priority due job; the partial index
+            # stays small because finished jobs drop out of it
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_jobs_dequeue_232143
+                ON jobs_232143(priority_232143 DESC, run_at_232143)
+                WHERE status_232143 = 'queued'
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_jobs_user_232143
+                ON jobs_232143(user_id_232143, created_at_232143)
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_jobs_running_232143
+                ON jobs_232143(locked_at_232143)
+                WHERE status_232143 = 'running'
+            """)
+            cursor.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_dedupe_232143
+                ON jobs_232143(dedupe_key_232143)
+                WHERE status_232143 IN ('queued','running')
+            """)
+            db.commit()
+
+        print("\n✅ Migration completed successfully!")
+        print("\n📊 Added:")
+        print("   - table jobs_232143")
+        print("   - indexes idx_jobs_dequeue/user/running/dedupe_232143")
+        if not Config.JOBS_ENABLED:
+            print("\n💡 Start worker.py, then set JOBS_ENABLED=True to queue background work")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        import traceback
+        traceback.print_exc()
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("  BACKGROUND JOBS MIGRATION")
+    print("=" * 60)
+    run_migration()
+    print("=" * 60)
@@ -0,0 +1,61 @@
+"""
+Migration script to add indexed transaction search (PostgreSQL version)
+Enables pg_trgm/unaccent/btree_gin and creates the trigram index used by
+the contains and fuzzy search modes
+"""
+
+import sys
+import os
+import psycopg2
+from psycopg2.extras import RealDictCursor
+from config import Config
+
+def run_migration():
+    """Create the search extensions, f_unaccent() and the trigram index"""
+    print("🔄 Starting migration: Adding transaction search index...")
+
+    # Connect to database
+    if Config.DATABASE_URL:
+        db = psycopg2.connect(Config.DATABASE_URL, cursor_factory=RealDictCursor)
+    else:
+        db = psycopg2.connect(
+            host=Config.POSTGRES_HOST,
+            user=Config.POSTGRES_USER,
+            password=Config.POSTGRES_PASSWORD,
+            database=Config.POSTGRES_DB,
+            port=Config.POSTGRES_PORT,
+            cursor_factory=RealDictCursor
+        )
+
+    try:
+        migration_file = os.path.join(os.path.dirname(__file__), 'add_transaction_search.sql')
+        with open(migration_file, 'r', encoding='utf-8') as f:
+            sql_content = f.read()
+
+        # Run the file as one batch: the DO block contains semicolons
+        with db.cursor() as cursor:
+            cursor.execute(sql_content)
+        db.commit()
+
+        print("\n✅ Migration completed successfully!")
+        print("\n📊 Added:")
+        print("   - extensions pg_trgm, unaccent, btree_gin")
+        print("   - function f_unaccent(text)")
+        print("   - index idx_transactions_description_trgm")
+        if not Config.SEARCH_USE_TRIGRAM:
+            print("\n💡 Set SEARCH_USE_TRIGRAM=True to use the index for transaction search")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        print("   Check that the pg_trgm, unaccent and btree_gin extensions are available")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("  TRANSACTION SEARCH MIGRATION")
+    print("=" * 60)
+    run_migration()
+    print("=" * 60)
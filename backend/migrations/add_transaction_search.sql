@@ -0,0 +1,37 @@
+-- Indexed, case- and accent-insensitive search on transaction descriptions
+-- PostgreSQL version (pg_trgm, unaccent and btree_gin ship with Supabase)
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+
+-- unaccent() is only STABLE (it resolves its dictionary through search_path),
+-- so it cannot appear in an index expression. Wrap it with the dictionary
+-- schema-qualified; the schema is looked up because Supabase installs
+-- extensions into "extensions" rather than "public".
+DO $$
+DECLARE
+    ext_schema text;
+BEGIN
+    SELECT n.nspname INTO ext_schema
+    FROM pg_extension e
+    JOIN pg_namespace n ON n.oid = e.extnamespace
+    WHERE e.extname = 'unaccent';
+
+    EXECUTE format(
+        'CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text '
+        'LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT '
+        'AS %L',
+        format('SELECT %I.unaccent(%L::regdictionary, $1)', ext_schema, quote_ident(ext_schema) || '.unaccent')
+    );
+END
+$$;
+
+-- One GIN index serves "user_id = ? AND <normalized description> LIKE '%term%'"
+-- and the trigram similarity operators used by fuzzy search.
+-- btree_gin provides the GIN opclass for the user_id column.
+CREATE INDEX IF NOT EXISTS idx_transactions_description_trgm
+ON transactions_232143 USING gin (
+    user_id_232143,
+    f_unaccent(lower(description_232143)) gin_trgm_ops
+);
@@ -0,0 +1,62 @@
+"""
+Migration script to add per-user data versions for the analytics cache
+Run this before enabling CACHE_ENABLED without CACHE_REDIS_URL
+"""
+
+import sys
+import psycopg2
+from psycopg2.extras import RealDictCursor
+from config import Config
+
+def run_migration():
+    """Create user_data_versions_232143"""
+    print("🔄 Starting migration: Adding user data versions...")
+
+    # Connect to database
+    if Config.DATABASE_URL:
+        db = psycopg2.connect(Config.DATABASE_URL, cursor_factory=RealDictCursor)
+    else:
+        db = psycopg2.connect(
+            host=Config.POSTGRES_HOST,
+            user=Config.POSTGRES_USER,
+            password=Config.POSTGRES_PASSWORD,
+            database=Config.POSTGRES_DB,
+            port=Config.POSTGRES_PORT,
+            cursor_factory=RealDictCursor
+        )
+
+    try:
+        with db.cursor() as cursor:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS user_data_versions_232143 (
+                  user_id_232143 VARCHAR(36) NOT NULL,
+                  version_232143 BIGINT NOT NULL DEFAULT 0,
+                  updated_at_232143 TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
+                  PRIMARY KEY (user_id_232143),
+                  CONSTRAINT user_data_versions_232143_fk_user FOREIGN KEY (user_id_232143)
+                    REFERENCES users_232143(user_id_232143) ON DELETE CASCADE
+                )
+            """)
+            db.commit()
+
+        print("\n✅ Migration completed successfully!")
+        print("\n📊 Table added:")
+        print("   - user_data_versions_232143")
+        if not Config.CACHE_ENABLED:
+            print("\n💡 Set CACHE_ENABLED=True to cache analytics responses")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        import traceback
+        traceback.print_exc()
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("  USER DATA VERSIONS MIGRATION")
+    print("=" * 60)
+    run_migration()
+    print("=" * 60)
@@ -0,0 +1,112 @@
+from .database import get_db
+import json
+
+class AnomalyScanModel:
+    """Checkpoints of the nightly anomaly scan (anomaly_scan_checkpoints_232143)
+
+    One row per scan and shard. record_chunk() writes a chunk's
+    notifications and advances the checkpoint in a single statement, so a
+    chunk is either fully recorded or not at all.
+    """
+
+    _COLUMNS = """
+        scan_id_232143, shard_232143, shard_count_232143, last_user_id_232143,
+        users_scanned_232143, notifications_created_232143,
+        started_at_232143, updated_at_232143, finished_at_232143
+    """
+
+    @staticmethod
+    def get_checkpoint(scan_id, shard):
+        db = get_db()
+        with db.cursor() as cursor:
+            sql = f"""
+            SELECT {AnomalyScanModel._COLUMNS} FROM anomaly_scan_checkpoints_232143
+            WHERE scan_id_232143 = %s AND shard_232143 = %s
+            """
+            cursor.execute(sql, (scan_id, shard))
+            return cursor.fetchone()
+
+    @staticmethod
+    def start(scan_id, shard, shard_count):
+        """Create the shard's checkpoint, or return the existing one to resume from"""
+        db = get_db()
+        with db.cursor() as cursor:
+            sql = """
+            INSERT INTO anomaly_scan_checkpoints_232143 (scan_id_232143, shard_232143, shard_count_232143)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (scan_id_232143, shard_232143) DO NOTHING
+            """
+            cursor.execute(sql, (scan_id, shard, shard_count))
+        db.commit()
+        checkpoint = AnomalyScanModel.get_checkpoint(scan_id, shard)
+        if checkpoint['shard_count_232143'] != shard_count:
+            # The same shard number covers different users under another count
+            raise ValueError(
+                f"Scan {scan_id} was started with {checkpoint['shard_count_232143']} shards, not {shard_count}"
+            )
+        return checkpoint
+
+    @staticmethod
+    def record_chunk(scan_id, shard, last_user_id, users_scanned, notifications):
+        """Insert a chunk's notifications and move the checkpoint past its last user
+
+        Notifications whose dedupe_key the user already has are skipped.
+
+        Returns:
+            int: Number of notifications inserted
+        """
+        db = get_db()
+        with db.cursor() as cursor:
+            sql = """
+            WITH inserted AS (
+                INSERT INTO notifications_232143 (
+                    user_id_232143, type_232143, title_232143, message_232143,
+                    priority_232143, category_232143, dedupe_key_232143
+                )
+                SELECT n.user_id, n.type, n.title, n.message, n.priority, n.category, n.dedupe_key
+                FROM jsonb_to_recordset(%(notifications)s::jsonb) AS n(
+                    user_id text, type text, title text, message text,
+                    priority text, category text, dedupe_key text
+                )
+                ON CONFLICT (user_id_232143, dedupe_key_232143) WHERE dedupe_key_232143 IS NOT NULL
+                DO NOTHING
+                RETURNING 1
+            ), created AS (
+                SELECT COUNT(*) AS count FROM inserted
+            )
+            UPDATE anomaly_scan_checkpoints_232143
+            SET last_user_id_232143 = %(last_user_id)s,
+                users_scanned_232143 = users_scanned_232143 + %(users_scanned)s,
+                notifications_created_232143 = notifications_created_232143 + created.count,
+                updated_at_232143 = CURRENT_TIMESTAMP
+            FROM created
+            WHERE scan_id_232143 = %(scan_id)s AND shard_232143 = %(shard)s
+            RETURNING created.count
+            """
+            cursor.execute(sql, {
+                'scan_id': scan_id,
+                'shard': shard,
+                'last_user_id': last_user_id,
+                'users_scanned': users_scanned,
+                'notifications': json.dumps(notifications),
+            })
+            row = cursor.fetchone()
+        db.commit()
+        return row['count'] if row else 0
+
+    @staticmethod
+    def finish(scan_id, shard):
+        """Mark the shard done and return its checkpoint"""
+        db = get_db()
+        with db.cursor() as cursor:
+            sql = f"""
+            UPDATE anomaly_scan_checkpoints_232143
+            SET finished_at_232143 = COALESCE(finished_at_232143, CURRENT_TIMESTAMP),
+                updated_at_232143 = CURRENT_TIMESTAMP
+            WHERE scan_id_232143 = %s AND shard_232143 = %s
+            RETURNING {AnomalyScanModel._COLUMNS}
+            """
+            cursor.execute(sql, (scan_id, shard))
+            checkpoint = cursor.fetchone()
+        db.commit()
+        return checkpoint
@@ -1,4 +1,5 @@
 from .database import get_db
+from services.cache_service import bump_user_version
 import uuid
 from datetime import datetime, date, timedelta
 from decimal import Decimal
@@ -168,6 +169,7 @@ class BudgetModel:
                 budget_data.get('is_active', True)
             ))
             db.commit()
+            bump_user_version(budget_data['user_id'])
             return budget_id
     
     @staticmethod
@@ -195,6 +197,7 @@ class BudgetModel:
             
             cursor.execute(sql, values)
             db.commit()
+            bump_user_version(user_id)
             return cursor.rowcount > 0
     
     @staticmethod
@@ -208,6 +211,7 @@ class BudgetModel:
             """
             cursor.execute(sql, (budget_id, user_id))
             db.commit()
+            bump_user_version(user_id)
             return cursor.rowcount > 0
     
     @staticmethod
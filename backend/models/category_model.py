@@ -1,4 +1,5 @@
 from .database import get_db
+from services.cache_service import bump_user_version
 import uuid
 from datetime import datetime
 
@@ -15,6 +16,15 @@ class CategoryModel:
             cursor.execute(sql, (user_id,))
             return cursor.fetchall()
 
+    @staticmethod
+    def get_category_name(category_id):
+        db = get_db()
+        with db.cursor() as cursor:
+            sql = "SELECT name_232143 FROM categories_232143 WHERE category_id_232143 = %s"
+            cursor.execute(sql, (category_id,))
+            row = cursor.fetchone()
+            return row['name_232143'] if row else None
+
     @staticmethod
     def create_category(user_id, category_data):
         db = get_db()
@@ -40,7 +50,7 @@ class CategoryModel:
                 category_data.get('budget_period', 'monthly')
             ))
             db.commit()
-            
+            bump_user_version(user_id)
             return category_id
 
     @staticmethod
@@ -75,4 +85,5 @@ class CategoryModel:
                 """
                 cursor.execute(sql, (category_id, user_id, name, type, color, icon, order, True))
             
-            db.commit()
\ No newline at end of file
+            db.commit()
+            bump_user_version(user_id)
\ No newline at end of file
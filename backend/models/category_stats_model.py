@@ -0,0 +1,117 @@
+class CategoryStatsModel:
+    """Running amount statistics per user, type and category (category_stats_232143)
+
+    Each row holds Welford's count, mean and M2 (sum of squared deviations
+    from the mean), so adding or removing one amount is O(1) and the
+    variance stays accurate for large IDR amounts, unlike sum/sum-of-squares.
+    TransactionModel applies every change in the same statement as the
+    transaction write, reading the affected transaction from a CTE named in
+    `source` with user_id_232143, type_232143, category_id_232143 and
+    amount_232143 columns. category_key_232143 is '' for uncategorized.
+    """
+
+    # Add the source rows' amounts; returns the updated stats (the stats
+    # before the add are recovered with prior_stats())
+    ADD_SQL = """
+        INSERT INTO category_stats_232143 AS s (
+            user_id_232143, type_232143, category_key_232143,
+            count_232143, mean_232143, m2_232143
+        )
+        SELECT user_id_232143, type_232143, COALESCE(category_id_232143, ''), 1, amount_232143::float8, 0
+        FROM {source}
+        ON CONFLICT (user_id_232143, type_232143, category_key_232143) DO UPDATE
+        SET count_232143 = s.count_232143 + 1,
+            mean_232143 = s.mean_232143 + (EXCLUDED.mean_232143 - s.mean_232143) / (s.count_232143 + 1),
+            m2_232143 = s.m2_232143 + (EXCLUDED.mean_232143 - s.mean_232143)
+                * (EXCLUDED.mean_232143 - s.mean_232143 - (EXCLUDED.mean_232143 - s.mean_232143) / (s.count_232143 + 1)),
+            updated_at_232143 = CURRENT_TIMESTAMP
+        RETURNING s.count_232143, s.mean_232143, s.m2_232143
+    """
+
+    # Remove the source rows' amounts (the inverse of ADD_SQL)
+    REMOVE_SQL = """
+        UPDATE category_stats_232143 s
+        SET count_232143 = s.count_232143 - 1,
+            mean_232143 = CASE WHEN s.count_232143 > 1
+                THEN (s.count_232143 * s.mean_232143 - r.amount_232143::float8) / (s.count_232143 - 1)
+                ELSE 0 END,
+            m2_232143 = CASE WHEN s.count_232143 > 1
+                THEN GREATEST(s.m2_232143 - (r.amount_232143::float8 - s.mean_232143) ^ 2
+                    * s.count_232143 / (s.count_232143 - 1), 0)
+                ELSE 0 END,
+            updated_at_232143 = CURRENT_TIMESTAMP
+        FROM {source} r
+        WHERE s.user_id_232143 = r.user_id_232143
+            AND s.type_232143 = r.type_232143
+            AND s.category_key_232143 = COALESCE(r.category_id_232143, '')
+    """
+
+    # Move updated transactions between stats, as extra CTEs after the
+    # UPDATE named in `source`. Besides the new user_id_232143, type_232143,
+    # category_id_232143 and amount_232143, it returns old_type,
+    # old_category_id and old_amount. A change within one group replaces x
+    # with y in place (mean += (y - x) / n, M2 += (y - x) * (y - new mean +
+    # x - old mean)); a change of type or category removes from the old
+    # group and adds to the new one. Each CTE touches different rows, as one
+    # statement cannot update a row twice.
+    REPLACE_SQL = """
+        stats_same AS (
+            SELECT * FROM {source}
+            WHERE type_232143 = old_type
+                AND COALESCE(category_id_232143, '') = COALESCE(old_category_id, '')
+        ), stats_moved_out AS (
+            SELECT user_id_232143, old_type AS type_232143,
+                   old_category_id AS category_id_232143, old_amount AS amount_232143
+            FROM {source}
+            WHERE type_232143 <> old_type
+                OR COALESCE(category_id_232143, '') <> COALESCE(old_category_id, '')
+        ), stats_moved_in AS (
+            SELECT user_id_232143, type_232143, category_id_232143, amount_232143
+            FROM {source}
+            WHERE type_232143 <> old_type
+                OR COALESCE(category_id_232143, '') <> COALESCE(old_category_id, '')
+        ), stats_replaced AS (
+            UPDATE category_stats_232143 s
+            SET mean_232143 = s.mean_232143 + (r.amount_232143::float8 - r.old_amount::float8) / s.count_232143,
+                m2_232143 = GREATEST(s.m2_232143 + (r.amount_232143::float8 - r.old_amount::float8) * (
+                    r.amount_232143::float8
+                    - (s.mean_232143 + (r.amount_232143::float8 - r.old_amount::float8) / s.count_232143)
+                    + r.old_amount::float8 - s.mean_232143), 0),
+                updated_at_232143 = CURRENT_TIMESTAMP
+            FROM stats_same r
+            WHERE s.user_id_232143 = r.user_id_232143
+                AND s.type_232143 = r.type_232143
+                AND s.category_key_232143 = COALESCE(r.category_id_232143, '')
+                AND s.count_232143 > 0
+                AND r.amount_232143 <> r.old_amount
+        ), stats_removed AS ({remove}), stats_added AS ({add})
+    """
+
+    @staticmethod
+    def replace_ctes(source):
+        """REPLACE_SQL for the UPDATE CTE named source, ready to follow it in a WITH list"""
+        return CategoryStatsModel.REPLACE_SQL.format(
+            source=source,
+            remove=CategoryStatsModel.REMOVE_SQL.format(source='stats_moved_out'),
+            add=CategoryStatsModel.ADD_SQL.format(source='stats_moved_in')
+        )
+
+    @staticmethod
+    def prior_stats(stats, amount):
+        """
+        Undo one Welford step: the (count, mean, std) before `amount` was added
+
+        Args:
+            stats: Row returned by ADD_SQL
+            amount: The amount that was added
+
+        Returns:
+            tuple: (count, mean, sample standard deviation); std is 0 below 2 values
+        """
+        count = stats['count_232143'] - 1
+        if count < 1:
+            return 0, 0.0, 0.0
+        mean = (stats['count_232143'] * stats['mean_232143'] - amount) / count
+        m2 = stats['m2_232143'] - (amount - mean) * (amount - stats['mean_232143'])
+        std = (max(m2, 0.0) / (count - 1)) ** 0.5 if count > 1 else 0.0
+        return count, mean, std
@@ -0,0 +1,160 @@
+from .database import get_db
+from .transaction_model import TransactionModel
+import config
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+import psycopg2.extras
+
+# Each section is a scalar subquery returning JSON, so any subset of them
+# runs as a single SELECT (one statement, one round trip)
+_SUMMARY_SQL = {
+    'transactions': """
+        SELECT type_232143, SUM(amount_232143) as total_amount, COUNT(*) as transaction_count
+        FROM transactions_232143
+        WHERE user_id_232143 = %(user_id)s
+            AND transaction_date_232143 >= %(month_start)s
+            AND transaction_date_232143 < %(month_end)s
+        GROUP BY type_232143
+    """,
+    'rollups': """
+        SELECT type_232143, SUM(total_amount_232143) as total_amount,
+            SUM(transaction_count_232143)::int as transaction_count
+        FROM daily_rollups_232143
+        WHERE user_id_232143 = %(user_id)s
+            AND rollup_date_232143 >= %(month_start)s
+            AND rollup_date_232143 < %(month_end)s
+        GROUP BY type_232143
+    """
+}
+
+_CATEGORIES_SQL = {
+    'transactions': """
+        SELECT c.name_232143 as category_name, c.color_232143 as category_color,
+            SUM(t.amount_232143) as total_amount, COUNT(*) as transaction_count
+        FROM transactions_232143 t
+        JOIN categories_232143 c ON t.category_id_232143 = c.category_id_232143
+        WHERE t.user_id_232143 = %(user_id)s
+            AND t.type_232143 = 'expense'
+            AND t.transaction_date_232143 BETWEEN %(month_start)s AND %(today)s
+        GROUP BY c.category_id_232143, c.name_232143, c.color_232143
+    """,
+    'rollups': """
+        SELECT c.name_232143 as category_name, c.color_232143 as category_color,
+            SUM(r.total_amount_232143) as total_amount,
+            SUM(r.transaction_count_232143)::int as transaction_count
+        FROM daily_rollups_232143 r
+        JOIN categories_232143 c ON r.category_key_232143 = c.category_id_232143
+        WHERE r.user_id_232143 = %(user_id)s
+            AND r.type_232143 = 'expense'
+            AND r.rollup_date_232143 BETWEEN %(month_start)s AND %(today)s
+        GROUP BY c.category_id_232143, c.name_232143, c.color_232143
+    """
+}
+
+_RECENT_SQL = """
+    SELECT
+        t.*,
+        t.location_name_232143 as location_name,
+        t.latitude_232143 as latitude,
+        t.longitude_232143 as longitude,
+        COALESCE(c.name_232143, 'Uncategorized') as category_name,
+        COALESCE(c.color_232143, '#808080') as category_color
+    FROM transactions_232143 t
+    LEFT JOIN categories_232143 c ON t.category_id_232143 = c.category_id_232143
+    WHERE t.user_id_232143 = %(user_id)s
+    ORDER BY t.transaction_date_232143 DESC, t.created_at_232143 DESC
+    LIMIT %(recent_limit)s
+"""
+
+_BUDGETS_SQL = """
+    SELECT
+        COUNT(*) as total_budgets,
+        SUM(amount_232143) as total_budget,
+        SUM(spent_amount_232143) as total_spent,
+        SUM(remaining_amount_232143) as total_remaining,
+        AVG(CASE WHEN amount_232143 > 0
+            THEN (spent_amount_232143 / amount_232143) * 100
+            ELSE 0 END) as avg_usage_percentage
+    FROM budgets_232143
+    WHERE user_id_232143 = %(user_id)s AND is_active_232143 = TRUE
+"""
+
+_GOALS_SQL = """
+    SELECT
+        COUNT(*) as total_goals,
+        COUNT(*) FILTER (WHERE is_completed_232143) as completed_goals,
+        SUM(target_amount_232143) as total_target,
+        SUM(current_amount_232143) as total_saved,
+        AVG(progress_percentage_232143) as avg_progress
+    FROM financial_goals_232143
+    WHERE user_id_232143 = %(user_id)s
+"""
+
+def _section_sql(section, source):
+    if section == 'summary':
+        return f"(SELECT COALESCE(json_agg(s), '[]'::json) FROM ({_SUMMARY_SQL[source]}) s)"
+    if section == 'categories':
+        return (f"(SELECT COALESCE(json_agg(s ORDER BY s.total_amount DESC), '[]'::json) "
+                f"FROM ({_CATEGORIES_SQL[source]}) s)")
+    if section == 'recent':
+        return (f"(SELECT COALESCE(json_agg(s ORDER BY s.transaction_date_232143 DESC, "
+                f"s.created_at_232143 DESC), '[]'::json) FROM ({_RECENT_SQL}) s)")
+    if section == 'budgets':
+        return f"(SELECT row_to_json(s) FROM ({_BUDGETS_SQL}) s)"
+    if section == 'goals':
+        return f"(SELECT row_to_json(s) FROM ({_GOALS_SQL}) s)"
+    raise ValueError(f'Unknown dashboard section: {section}')
+
+def _loads_decimal(value):
+    # Keep money as Decimal like the per-endpoint queries do
+    return json.loads(value, parse_float=Decimal)
+
+def _decode_recent_dates(transactions):
+    # json_agg renders dates and timestamps as ISO text; turn them back into
+    # date/datetime so jsonify formats them exactly like /transactions/recent
+    for transaction in transactions:
+        if transaction.get('transaction_date_232143'):
+            transaction['transaction_date_232143'] = date.fromisoformat(transaction['transaction_date_232143'])
+        for column in ('created_at_232143', 'updated_at_232143'):
+            if transaction.get(column):
+                transaction[column] = datetime.fromisoformat(transaction[column])
+    return transactions
+
+class DashboardModel:
+    SECTIONS = ('summary', 'categories', 'recent', 'budgets', 'goals')
+
+    @staticmethod
+    def period_bounds(year, month):
+        """(first day, first day of next month, last day counted for categories)
+
+        Category spending runs to today for the current month, like
+        /analytics/categories does by default.
+        """
+        month_start, month_end = TransactionModel._month_bounds(year, month)
+        return month_start, month_end, min(date.today(), month_end - timedelta(days=1))
+
+    @staticmethod
+    def get_dashboard(user_id, sections, year, month, recent_limit=10):
+        """Fetch the requested dashboard sections in a single query
+
+        Returns a dict keyed by section name with the decoded JSON of each.
+        """
+        month_start, month_end, period_end = DashboardModel.period_bounds(year, month)
+        source = 'rollups' if config.Config.ANALYTICS_USE_ROLLUPS else 'transactions'
+        columns = ",\n".join(f"{_section_sql(section, source)} as {section}" for section in sections)
+
+        db = get_db()
+        with db.cursor() as cursor:
+            psycopg2.extras.register_default_json(cursor, loads=_loads_decimal)
+            cursor.execute(f"SELECT {columns}", {
+                'user_id': user_id,
+                'month_start': month_start,
+                'month_end': month_end,
+                'today': period_end,
+                'recent_limit': recent_limit
+            })
+            row = cursor.fetchone()
+        if row.get('recent') is not None:
+            _decode_recent_dates(row['recent'])
+        return row
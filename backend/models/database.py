@@ -1,16 +1,254 @@
 import psycopg2
 from psycopg2 import pool
-from psycopg2.extras import RealDictCursor
-from flask import g
+from flask import g, jsonify
 import config
+from .query_instrumentation import InstrumentedCursor, init_app as init_query_instrumentation
 import os
 import time
 import threading
+from collections import deque
+from urllib.parse import urlparse
 
 # Global connection pool
 _connection_pool = None
 _pool_lock = threading.Lock()
 
+# Any connection last used before this (monotonic) time is validated on checkout.
+# Bumped whenever a broken connection is found, since its siblings are likely dead too
+# (database restart, pooler failover, NAT timeout).
+_stale_before = 0.0
+
+# Process-wide pool instrumentation (each gunicorn worker has its own pool)
+_stats_lock = threading.Lock()
+_pool_stats = {
+    'checkouts': 0,
+    'checkout_failures': 0,
+    'checkout_wait_ms_total': 0.0,
+    'checkout_wait_ms_max': 0.0,
+    'retries': 0,
+    'validations': 0,
+    'stale_discards': 0,
+    'connections_opened': 0,
+    'connections_closed': 0,
+    'pool_timeouts': 0,
+}
+_recent_waits_ms = deque(maxlen=1000)
+
+def _record_stat(name, amount=1):
+    with _stats_lock:
+        _pool_stats[name] += amount
+
+def _record_checkout(wait_ms, success=True):
+    with _stats_lock:
+        if success:
+            _pool_stats['checkouts'] += 1
+        else:
+            _pool_stats['checkout_failures'] += 1
+        _pool_stats['checkout_wait_ms_total'] += wait_ms
+        _pool_stats['checkout_wait_ms_max'] = max(_pool_stats['checkout_wait_ms_max'], wait_ms)
+        _recent_waits_ms.append(wait_ms)
+
+class PoolExhaustedError(pool.PoolError):
+    """Raised when no connection frees up within the checkout timeout"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class _ManagedConnectionPool(pool.ThreadedConnectionPool):
+    """ThreadedConnectionPool that configures each physical connection once,
+    remembers when each connection was last returned, and makes callers wait
+    in a bounded FIFO queue when every connection is checked out"""
+
+    def __init__(self, *args, checkout_timeout=0, max_waiters=0, pool_mode='session', **kwargs):
+        self._last_used = {}
+        self._opened_at = {}
+        self.pool_mode = pool_mode
+        self.checkout_timeout = checkout_timeout
+        self.max_waiters = max_waiters
+        self._waiters = deque()
+        super().__init__(*args, **kwargs)
+        self._available = threading.Condition(self._lock)
+
+    def getconn(self, key=None):
+        """Check out a connection, waiting up to checkout_timeout seconds
+
+        Waiters are served strictly in arrival order, so a burst of requests
+        queues behind the ones already waiting instead of barging past them.
+        With checkout_timeout=0 this fails fast like psycopg2's pool.
+        """
+        with self._available:
+            if not self._waiters and self._has_capacity(key):
+                return self._getconn(key)
+
+            if self.checkout_timeout <= 0 or len(self._waiters) >= self.max_waiters:
+                raise PoolExhaustedError("connection pool exhausted", self._retry_after())
+
+            ticket = object()
+            self._waiters.append(ticket)
+            deadline = time.monotonic() + self.checkout_timeout
+            try:
+                while not (self._waiters[0] is ticket and self._has_capacity(key)):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolExhaustedError(
+                            f"no database connection available within {self.checkout_timeout:g}s",
+                            self._retry_after()
+                        )
+                    self._available.wait(remaining)
+                return self._getconn(key)
+            finally:
+                self._waiters.remove(ticket)
+                # Wake the next waiter in line (it may now be at the head)
+                self._available.notify_all()
+
+    def putconn(self, conn=None, key=None, close=False):
+        with self._available:
+            self._putconn(conn, key, close)
+            self._available.notify_all()
+
+    def _has_capacity(self, key=None):
+        return bool(self._pool) or len(self._used) < self.maxconn or (key is not None and key in self._used)
+
+    def _retry_after(self):
+        return max(1, int(round(self.checkout_timeout or 1)))
+
+    def _connect(self, key=None):
+        conn = super()._connect(key)
+        _configure_connection(conn)
+        now = time.monotonic()
+        self._last_used[id(conn)] = now
+        self._opened_at[id(conn)] = now
+        _record_stat('connections_opened')
+        return conn
+
+    def _putconn(self, conn, key=None, close=False):
+        # psycopg2's own _putconn closes every connection returned while minconn
+        # are already idle, so each burst above minconn reconnected (TLS + auth)
+        # on every request. Keep healthy connections up to maxconn instead.
+        if self.closed:
+            raise pool.PoolError("connection pool is closed")
+
+        if key is None:
+            key = self._rused.get(id(conn))
+            if key is None:
+                raise pool.PoolError("trying to put unkeyed connection")
+
+        if not close and not _is_broken(conn) and conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            # Left inside a transaction by the caller: reset it before reuse
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                close = True
+
+        if not close and not _is_broken(conn) and len(self._pool) < self.maxconn:
+            self._last_used[id(conn)] = time.monotonic()
+            self._pool.append(conn)
+        else:
+            self._last_used.pop(id(conn), None)
+            self._opened_at.pop(id(conn), None)
+            _record_stat('connections_closed')
+            if not conn.closed:
+                conn.close()
+
+        # The key may be gone if closeall() ran while this connection was out
+        if not self.closed or key in self._used:
+            del self._used[key]
+            del self._rused[id(conn)]
+
+    def snapshot(self):
+        """Point-in-time view of pool occupancy and connection ages"""
+        with self._lock:
+            now = time.monotonic()
+            ages = [now - opened for opened in self._opened_at.values()]
+            idle_for = [now - self._last_used.get(id(conn), now) for conn in self._pool]
+            return {
+                'mode': self.pool_mode,
+                'minconn': self.minconn,
+                'maxconn': self.maxconn,
+                'in_use': len(self._used),
+                'idle': len(self._pool),
+                'waiting': len(self._waiters),
+                'checkout_timeout_seconds': self.checkout_timeout,
+                'max_waiters': self.max_waiters,
+                'connection_age_seconds': {
+                    'min': round(min(ages), 1) if ages else None,
+                    'max': round(max(ages), 1) if ages else None,
+                    'avg': round(sum(ages) / len(ages), 1) if ages else None,
+                },
+                'max_idle_seconds': round(max(idle_for), 1) if idle_for else None,
+            }
+
+    def needs_validation(self, conn):
+        last_used = self._last_used.get(id(conn), 0.0)
+        return last_used <= _stale_before or time.monotonic() - last_used > config.Config.DB_POOL_VALIDATE_IDLE_SECONDS
+
+def _configure_connection(conn):
+    """Set session state once per physical connection (not per checkout)"""
+    # psycopg2 autocommit is client-side, so this costs no round trip and is
+    # safe behind a transaction pooler (no SET is sent to the server)
+    conn.autocommit = True
+
+def _resolve_pool_mode(database_url):
+    """Return 'transaction' when running behind a transaction pooler, else 'session'
+
+    'auto' treats the Supabase/PgBouncer pooler port 6543 as transaction pooling.
+    """
+    mode = config.Config.DB_POOL_MODE
+    if mode in ('session', 'transaction'):
+        return mode
+    return 'transaction' if urlparse(database_url).port == 6543 else 'session'
+
+def _resolve_pool_size(is_production):
+    """Size the per-worker pool from gunicorn's worker/thread layout
+
+    A sync worker never serves more than GUNICORN_THREADS requests at once, so
+    it needs at most one connection per thread (plus one for background work).
+    The whole deployment must also stay within DB_MAX_CONNECTIONS, shared by
+    DB_INSTANCE_COUNT instances x WEB_CONCURRENCY workers.
+    """
+    if config.Config.DB_POOL_MAX_SIZE:
+        maxconn = config.Config.DB_POOL_MAX_SIZE
+    elif not is_production:
+        maxconn = 5
+    else:
+        workers = config.Config.WEB_CONCURRENCY * config.Config.DB_INSTANCE_COUNT
+        budget_per_worker = config.Config.DB_MAX_CONNECTIONS // max(1, workers)
+        maxconn = max(1, min(config.Config.GUNICORN_THREADS + 1, budget_per_worker))
+    minconn = min(config.Config.DB_POOL_MIN_SIZE, maxconn)
+    return minconn, maxconn
+
+def _session_connect_kwargs(pool_mode):
+    """Connection parameters that create per-session server state
+
+    These are applied once when the physical connection is opened. Transaction
+    poolers (PgBouncer/Supavisor on 6543) hand each transaction a different
+    server connection and reject unknown startup options, so nothing
+    session-scoped is sent in that mode. psycopg2 interpolates parameters
+    client-side and never creates server-side prepared statements, so plain
+    queries are already pooler-safe.
+    """
+    if pool_mode == 'transaction':
+        return {}
+    kwargs = {}
+    if config.Config.DB_STATEMENT_TIMEOUT_MS:
+        kwargs['options'] = f"-c statement_timeout={config.Config.DB_STATEMENT_TIMEOUT_MS}"
+    return kwargs
+
+def get_pool_mode():
+    """Pool mode of this process ('session' or 'transaction')"""
+    return _connection_pool.pool_mode if _connection_pool is not None else None
+
+def _is_broken(conn):
+    """Check connection health from client-side state only (no round trip)"""
+    return conn.closed or conn.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN
+
+def _mark_pool_stale():
+    """Force validation of every idle connection on its next checkout"""
+    global _stale_before
+    _stale_before = time.monotonic()
+    _record_stat('stale_discards')
+
 def _get_connection_pool():
     """Initialize and return connection pool (thread-safe singleton)"""
     global _connection_pool
@@ -34,27 +272,32 @@ def _get_connection_pool():
                             f"@{config.Config.POSTGRES_HOST}:{config.Config.POSTGRES_PORT}/{config.Config.POSTGRES_DB}"
                         )
                     
-                    # Create connection pool
-                    # For production: minconn=2, maxconn=10 (adjust based on traffic)
-                    # For development: minconn=1, maxconn=5
+                    # Create connection pool sized from the gunicorn layout
+                    # (development: minconn=1, maxconn=5)
                     is_production = os.getenv('PORT') or os.getenv('RENDER')
-                    minconn = 2 if is_production else 1
-                    maxconn = 10 if is_production else 5
+                    minconn, maxconn = _resolve_pool_size(is_production)
+                    pool_mode = _resolve_pool_mode(database_url)
                     
-                    print(f"🔗 Initializing database connection pool (min={minconn}, max={maxconn})...")
+                    print(f"🔗 Initializing database connection pool (min={minconn}, max={maxconn}, mode={pool_mode})...")
                     
-                    _connection_pool = pool.ThreadedConnectionPool(
+                    _connection_pool = _ManagedConnectionPool(
                         minconn=minconn,
                         maxconn=maxconn,
+                        # Bounded, fair wait for a free connection when all are in use
+                        checkout_timeout=config.Config.DB_POOL_CHECKOUT_TIMEOUT,
+                        max_waiters=config.Config.DB_POOL_MAX_WAITERS,
+                        pool_mode=pool_mode,
                         dsn=database_url,
-                        cursor_factory=RealDictCursor,
+                        # RealDictCursor that times every statement (see query_instrumentation)
+                        cursor_factory=InstrumentedCursor,
                         # Connection timeout (seconds)
                         connect_timeout=10,
                         # Keep connections alive
                         keepalives=1,
                         keepalives_idle=30,
                         keepalives_interval=10,
-                        keepalives_count=5
+                        keepalives_count=5,
+                        **_session_connect_kwargs(pool_mode)
                     )
                     
                     print("✅ Database connection pool initialized successfully")
@@ -68,6 +311,7 @@ def _get_connection_pool():
 def get_db():
     """Get database connection from pool (reuses connections efficiently)"""
     if 'db' not in g:
+        checkout_started = time.monotonic()
         try:
             pool = _get_connection_pool()
             
@@ -76,49 +320,56 @@ def get_db():
             retry_delay = 0.5  # seconds
             
             for attempt in range(max_retries):
+                conn = None
                 try:
-                    g.db = pool.getconn()
+                    conn = pool.getconn()
                     
-                    # Test connection is alive
-                    if g.db.closed:
-                        pool.putconn(g.db, close=True)
-                        g.db = pool.getconn()
-                    
-                    # Reset connection state: rollback any pending transaction before setting autocommit
-                    # This prevents "set_session cannot be used inside a transaction" error
-                    try:
-                        if not g.db.autocommit:
-                            g.db.rollback()
-                    except:
-                        pass  # Ignore if rollback fails (connection might already be clean)
-                    
-                    # Set autocommit for better performance
-                    # This must be done BEFORE any queries to avoid transaction conflicts
-                    g.db.autocommit = True
+                    if _is_broken(conn):
+                        pool.putconn(conn, close=True)
+                        _mark_pool_stale()
+                        continue
                     
-                    # Quick ping to ensure connection is working (after autocommit is set)
-                    cursor = g.db.cursor()
-                    cursor.execute("SELECT 1")
-                    cursor.close()
+                    # Only ping connections that sat idle long enough to have been
+                    # dropped by the server or a NAT; hot connections go straight out
+                    if pool.needs_validation(conn):
+                        _record_stat('validations')
+                        with conn.cursor() as cursor:
+                            cursor.execute("SELECT 1")
                     
+                    g.db = conn
                     break  # Success, exit retry loop
                     
                 except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
-                    # Connection might be stale, try to get a new one
-                    if 'db' in g and g.db:
+                    # Connection is stale (or could not be opened), discard it
+                    if conn is not None:
                         try:
-                            pool.putconn(g.db, close=True)
+                            pool.putconn(conn, close=True)
                         except:
                             pass
-                        g.pop('db', None)
+                        _mark_pool_stale()
                     
                     if attempt < max_retries - 1:
+                        _record_stat('retries')
                         time.sleep(retry_delay * (attempt + 1))  # Exponential backoff
                         continue
                     else:
                         raise
+            
+            if 'db' not in g:
+                raise psycopg2.OperationalError("Could not obtain a healthy database connection")
+            
+            _record_checkout((time.monotonic() - checkout_started) * 1000)
                         
+        except PoolExhaustedError as e:
+            _record_checkout((time.monotonic() - checkout_started) * 1000, success=False)
+            _record_stat('pool_timeouts')
+            # Routes catch exceptions themselves, so flag the request and let the
+            # after_request hook turn whatever they return into a 503
+            g.db_pool_exhausted = e
+            print(f"⚠️ Database pool exhausted: {e}")
+            raise e
         except psycopg2.OperationalError as e:
+            _record_checkout((time.monotonic() - checkout_started) * 1000, success=False)
             error_msg = f"❌ Database connection failed: {e}"
             print(error_msg)
             # Provide more helpful error message
@@ -140,25 +391,38 @@ def get_db():
     
     return g.db
 
+def get_pool_stats():
+    """Return connection pool instrumentation for this worker process"""
+    with _stats_lock:
+        stats = dict(_pool_stats)
+        waits = sorted(_recent_waits_ms)
+    
+    checkouts = stats['checkouts'] + stats['checkout_failures']
+    stats['checkout_wait_ms_avg'] = round(stats['checkout_wait_ms_total'] / checkouts, 2) if checkouts else 0.0
+    stats['checkout_wait_ms_p95'] = round(waits[int(len(waits) * 0.95) - 1], 2) if waits else 0.0
+    stats['checkout_wait_ms_total'] = round(stats['checkout_wait_ms_total'], 2)
+    stats['checkout_wait_ms_max'] = round(stats['checkout_wait_ms_max'], 2)
+    stats['pid'] = os.getpid()
+    stats['pool'] = _connection_pool.snapshot() if _connection_pool is not None else None
+    return stats
+
 def close_db(e=None):
     """Return connection to pool (doesn't actually close, just returns to pool)"""
     db = g.pop('db', None)
     if db is not None:
         try:
-            # Reset connection state before returning to pool
-            # Rollback any pending transaction to ensure clean state
-            try:
-                if not db.closed:
-                    if not db.autocommit:
-                        db.rollback()
-                    # Reset autocommit to default (False) for next use
-                    # The next get_db() will set it to True again
-                    db.autocommit = False
-            except:
-                pass  # Ignore errors during cleanup
-            
             pool = _get_connection_pool()
-            # Return connection to pool (reuse for next request)
+            
+            if _is_broken(db):
+                # A query failed because the connection died: drop it and make
+                # the pool re-validate its idle siblings before reusing them
+                pool.putconn(db, close=True)
+                _mark_pool_stale()
+                return
+            
+            # Return connection to pool (reuse for next request). Connections run
+            # in autocommit, so the pool only rolls back if a caller explicitly
+            # opened a transaction and left it open.
             pool.putconn(db)
         except Exception as e:
             # If pool is closed or error, just close the connection
@@ -178,9 +442,31 @@ def close_all_connections():
             pass
         _connection_pool = None
 
+def _pool_exhausted_response(error):
+    response = jsonify({
+        'error': 'Service temporarily unavailable',
+        'message': 'Server is busy, please retry shortly'
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
 def init_app(app):
     """Initialize database for Flask app"""
     app.teardown_appcontext(close_db)
+    init_query_instrumentation(app)
+    
+    # Pool exhaustion becomes a fast 503 + Retry-After instead of a generic 500
+    @app.errorhandler(PoolExhaustedError)
+    def handle_pool_exhausted(error):
+        return _pool_exhausted_response(error)
+    
+    @app.after_request
+    def apply_pool_backpressure(response):
+        error = g.pop('db_pool_exhausted', None)
+        if error is not None:
+            return _pool_exhausted_response(error)
+        return response
     
     # Close all connections on app shutdown
     @app.teardown_appcontext
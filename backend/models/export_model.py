@@ -0,0 +1,82 @@
+from .database import get_db
+from psycopg2 import extensions
+
+class ExportModel:
+    """Server-side cursor reads for the streaming backup export
+
+    Each section query returns the columns DataService's _format_* helpers
+    read, with the same filters and order as the JSON export. The backup
+    format predates some schema columns, so budgets and obligations alias
+    the current columns to the names the format uses.
+    """
+
+    SECTIONS = {
+        'categories': """
+            SELECT name_232143, type_232143, color_232143, icon_232143, is_system_default_232143
+            FROM categories_232143
+            WHERE user_id_232143 = %s AND is_system_default_232143 IS NOT TRUE
+            ORDER BY type_232143, display_order_232143
+        """,
+        'budgets': """
+            SELECT category_id_232143, amount_232143 AS limit_amount_232143,
+                   period_start_232143, period_end_232143, is_active_232143
+            FROM budgets_232143
+            WHERE user_id_232143 = %s AND is_active_232143 = TRUE
+            ORDER BY period_start_232143 DESC
+        """,
+        'goals': """
+            SELECT name_232143, target_amount_232143, current_amount_232143,
+                   target_date_232143, goal_type_232143, description_232143
+            FROM financial_goals_232143
+            WHERE user_id_232143 = %s AND is_completed_232143 = FALSE
+            ORDER BY priority_232143 DESC, target_date_232143 ASC
+        """,
+        'transactions': """
+            SELECT amount_232143, type_232143, category_id_232143, description_232143,
+                   payment_method_232143, transaction_date_232143, location_data_232143
+            FROM transactions_232143
+            WHERE user_id_232143 = %s
+            ORDER BY transaction_date_232143 DESC, created_at_232143 DESC, transaction_id_232143 DESC
+        """,
+        'obligations': """
+            SELECT name_232143, monthly_amount_232143 AS amount_232143,
+                   next_payment_date_232143 AS due_date_232143,
+                   subscription_cycle_232143 AS frequency_232143, category_232143,
+                   status_232143 = 'paid_off' AS is_paid_232143
+            FROM financial_obligations_232143
+            WHERE user_id_232143 = %s AND status_232143 = 'active'
+            ORDER BY next_payment_date_232143 ASC
+        """,
+    }
+
+    @staticmethod
+    def stream_sections(user_id, sections, chunk_size=1000):
+        """
+        Yield (section, rows) with up to chunk_size rows at a time, section by section
+
+        Named cursors only live inside a transaction, so the pooled
+        connection leaves autocommit for one read-only REPEATABLE READ
+        transaction; every section then comes from the same snapshot. The
+        connection is put back in autocommit when the generator finishes or
+        is closed (e.g. the client disconnects).
+        """
+        db = get_db()
+        db.set_session(
+            isolation_level=extensions.ISOLATION_LEVEL_REPEATABLE_READ,
+            readonly=True,
+            autocommit=False
+        )
+        try:
+            for section in sections:
+                with db.cursor(name=f'export_{section}') as cursor:
+                    cursor.itersize = chunk_size
+                    cursor.execute(ExportModel.SECTIONS[section], (user_id,))
+                    while True:
+                        rows = cursor.fetchmany(chunk_size)
+                        if not rows:
+                            break
+                        yield section, rows
+        finally:
+            if not db.closed:
+                db.rollback()
+                db.set_session(isolation_level='DEFAULT', readonly='DEFAULT', autocommit=True)
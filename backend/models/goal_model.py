@@ -1,4 +1,5 @@
 from .database import get_db
+from services.cache_service import bump_user_version
 import uuid
 from datetime import datetime, date, timedelta
 from decimal import Decimal
@@ -160,6 +161,7 @@ class GoalModel:
                 recommended_monthly
             ))
             db.commit()
+            bump_user_version(goal_data['user_id'])
             return goal_id
             
     @staticmethod
@@ -187,6 +189,7 @@ class GoalModel:
                 """
                 cursor.execute(sql, values)
                 db.commit()
+                bump_user_version(user_id)
                 return cursor.rowcount > 0
 
     @staticmethod
@@ -200,6 +203,7 @@ class GoalModel:
                 """
                 cursor.execute(sql, (goal_id, user_id))
                 db.commit()
+                bump_user_version(user_id)
                 return cursor.rowcount > 0
 
     @staticmethod
@@ -260,6 +264,7 @@ class GoalModel:
                 # Continue even if transaction creation fails
             
             db.commit()
+            bump_user_version(user_id)
             
             return {
                 'new_amount': float(new_amount),
@@ -0,0 +1,227 @@
+from .database import get_db
+from flask import json
+
+class JobModel:
+    """Queue operations on jobs_232143
+
+    Jobs move queued -> running -> succeeded | failed, or back to queued with
+    a later run_at when a failed attempt has retries left. Queued jobs can be
+    cancelled.
+    """
+
+    _COLUMNS = """
+        job_id_232143, user_id_232143, job_type_232143, payload_232143, status_232143,
+        priority_232143, attempts_232143, max_attempts_232143, run_at_232143,
+        locked_at_232143, locked_by_232143, result_232143, error_232143,
+        created_at_232143, updated_at_232143, finished_at_232143
+    """
+
+    @staticmethod
+    def enqueue(job_type, payload=None, user_id=None, priority=0, max_attempts=3,
+                delay_seconds=0, dedupe_key=None):
+        """Add a job; with dedupe_key, returns the pending job for that key if there is one"""
+        db = get_db()
+        with db.cursor() as cursor:
+            sql = f"""
+            INSERT INTO jobs_232143 (
+                job_type_232143, payload_232143, user_id_232143, priority_232143,
+                max_attempts_232143, run_at_232143, dedupe_key_232143
+            )
+            VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP + make_interval(secs => %s), %s)
+            ON CONFLICT (dedupe_key_232143) WHERE status_232143 IN ('queued','running')
+            DO NOTHING
+            RETURNING {JobModel._COLUMNS}
+            """
+            cursor.execute(sql, (
+                job_type, json.dumps(payload or {}), user_id, priority,
+                max_attempts, delay_seconds, dedupe_key
+            ))
+            job = cursor.fetchone()
+            if job is None:
+                cursor.execute(f"""
+                    SELECT {JobModel._COLUMNS} FROM jobs_232143
+                    WHERE dedupe_key_232143 = %s AND status_232143 IN ('queued','running')
+                """, (dedupe_key,))
+                job = cursor.fetchone()
+        db.commit()
+        return job
+
+    @staticmethod
+    def claim_next(worker_id, job_types=None):
+        """Lock and return the most urgent due job, or None
+
+        SKIP LOCKED lets any number of workers poll concurrently without
+        blocking on, or double-claiming, each other's rows.
+        """
+        type_filter = "AND job_type_232143 = ANY(%(job_types)s)" if job_types else ""
+        db = get_db()
+        with db.cursor() as cursor:
+            sql = f"""
+            UPDATE jobs_232143
+            SET status_232143 = 'running',
+                attempts_232143 = attempts_232143 + 1,
+                locked_at_232143 = CURRENT_TIMESTAMP,
+                locked_by_232143 = %(worker_id)s,
+                updated_at_232143 = CURRENT_TIMESTAMP
+            WHERE job_id_232143 = (
+                SELECT job_id_232143 FROM jobs_232143
+                WHERE status_232143 = 'queued'
+                    AND run_at_232143 <= CURRENT_TIMESTAMP
+                    {type_filter}
+                ORDER BY priority_232143 DESC, run_at_232143
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING {JobModel._COLUMNS}
+            """
+            cursor.execute(sql, {'worker_id': worker_id, 'job_types': list(job_types or [])})
+            job = cursor.fetchone()
+        db.commit()
+        return job
+
+    @staticmethod
+    def mark_succeeded(job_id, result=None):
+        db = get_db()
+        with db.cursor() as cursor:
+            sql = """
+            UPDATE jobs_232143
+            SET status_232143 = 'succeeded',
+                result_232143 = %s,
+                error_232143 = NULL,
+                locked_at_232143 = NULL,
+                finished_at_232143 = CURRENT_TIMESTAMP,
+                updated_at_232143 = CURRENT_TIMESTAMP
+            WHERE job_id_232143 = %s AND status_232143 = 'running'
+            """
+            cursor.execute(sql, (json.dumps(result), job_id))
+        db.commit()
+
+    @staticmethod
+    def mark_failed(job_id, error, retry_delay_seconds, permanent=False):
+        """Requeue after retry_delay_seconds if attempts remain, otherwise fail for good
+
+        Returns the job's new status.
+        """
+        db = get_db()
+        with db.cursor() as cursor:
+            sql = """
+            UPDATE jobs_232143
+            SET status_232143 = CASE WHEN NOT %(permanent)s AND attempts_232143 < max_attempts_232143
+                                     THEN 'queued' ELSE 'failed' END,
+                run_at_232143 = CURRENT_TIMESTAMP + make_interval(secs => %(delay)s),
+                error_232143 = %(error)s,
+                locked_at_232143 = NULL,
+                locked_by_232143 = NULL,
+                finished_at_232143 = CASE WHEN NOT %(permanent)s AND attempts_232143 < max_attempts_232143
+                                          THEN NULL ELSE CURRENT_TIMESTAMP END,
+                updated_at_232143 = CURRENT_TIMESTAMP
+            WHERE job_id_232143 = %(job_id)s AND status_232143 = 'running'
+            RETURNING status_232143
+            """
+            cursor.execute(sql, {
+                'delay': retry_delay_seconds,
+                'error': str(error)[:2000],
+                'permanent': permanent,
+                'job_id': job_id,
+            })
+            row = cursor.fetchone()
+        db.commit()
+        return row['status_232143'] if row else None
+
+    @staticmethod
+    def requeue_stale(lock_timeout_seconds):
+        """Return jobs whose worker died mid-run to the queue; returns how many"""
+        db = get_db()
+        with db.cursor() as cursor:
+            sql = """
+            UPDATE jobs_232143
+            SET status_232143 = CASE WHEN attempts_232143 < max_attempts_232143
+                                     THEN 'queued' ELSE 'failed' END,
+                error_232143 = 'Worker stopped before the job finished',
+                locked_at_232143 = NULL,
+                locked_by_232143 = NULL,
+                finished_at_232143 = CASE WHEN attempts_232143 < max_attempts_232143
+                                          THEN NULL ELSE CURRENT_TIMESTAMP END,
+                updated_at_232143 = CURRENT_TIMESTAMP
+            WHERE status_232143 = 'running'
+                AND locked_at_232143 < CURRENT_TIMESTAMP - make_interval(secs => %s)
+            """
+            cursor.execute(sql, (lock_timeout_seconds,))
+            count = cursor.rowcount
+        db.commit()
+        return count
+
+    @staticmethod
+    def delete_finished(older_than_days):
+        db = get_db()
+        with db.cursor() as cursor:
+            sql = """
+            DELETE FROM jobs_232143
+            WHERE status_232143 IN ('succeeded','failed','cancelled')
+                AND finished_at_232143 < CURRENT_TIMESTAMP - make_interval(days => %s)
+            """
+            cursor.execute(sql, (older_than_days,))
+            count = cursor.rowcount
+        db.commit()
+        return count
+
+    @staticmethod
+    def get_job(job_id, user_id):
+        db = get_db()
+        with db.cursor() as cursor:
+            sql = f"""
+            SELECT {JobModel._COLUMNS} FROM jobs_232143
+            WHERE job_id_232143 = %s AND user_id_232143 = %s
+            """
+            cursor.execute(sql, (job_id, user_id))
+            return cursor.fetchone()
+
+    @staticmethod
+    def get_user_jobs(user_id, limit=20):
+        """The user's most recent jobs without their (possibly large) results"""
+        db = get_db()
+        with db.cursor() as cursor:
+            sql = """
+            SELECT job_id_232143, job_type_232143, status_232143, attempts_232143,
+                max_attempts_232143, error_232143, created_at_232143, finished_at_232143
+            FROM jobs_232143
+            WHERE user_id_232143 = %s
+            ORDER BY created_at_232143 DESC
+            LIMIT %s
+            """
+            cursor.execute(sql, (user_id, limit))
+            return cursor.fetchall()
+
+    @staticmethod
+    def cancel_job(job_id, user_id):
+        """Cancel a job that has not started; returns True if it was cancelled"""
+        db = get_db()
+        with db.cursor() as cursor:
+            sql = """
+            UPDATE jobs_232143
+            SET status_232143 = 'cancelled',
+                finished_at_232143 = CURRENT_TIMESTAMP,
+                updated_at_232143 = CURRENT_TIMESTAMP
+            WHERE job_id_232143 = %s AND user_id_232143 = %s AND status_232143 = 'queued'
+            """
+            cursor.execute(sql, (job_id, user_id))
+            cancelled = cursor.rowcount == 1
+        db.commit()
+        return cancelled
+
+    @staticmethod
+    def get_queue_stats():
+        db = get_db()
+        with db.cursor() as cursor:
+            sql = """
+            SELECT
+                job_type_232143 as job_type,
+                status_232143 as status,
+                COUNT(*) as count,
+                MIN(run_at_232143) FILTER (WHERE status_232143 = 'queued') as oldest_run_at
+            FROM jobs_232143
+            GROUP BY job_type_232143, status_232143
+            ORDER BY job_type_232143, status_232143
+            """
+            cursor.execute(sql)
+            return cursor.fetchall()
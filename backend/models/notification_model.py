@@ -0,0 +1,36 @@
+from .database import get_db
+
+class NotificationModel:
+    @staticmethod
+    def create_notification(user_id, notification_type, title, message, priority='normal',
+                            category=None, action_url=None, action_label=None, dedupe_key=None):
+        """Insert a notification and return its ID
+
+        With dedupe_key, returns None instead if the user already has a
+        notification with that key; the key needs the dedupe_key_232143
+        column from migrations/add_anomaly_scan.py.
+        """
+        db = get_db()
+        with db.cursor() as cursor:
+            values = [
+                user_id, notification_type, title, message,
+                priority, category, action_url, action_label
+            ]
+            dedupe_column = dedupe_clause = ''
+            if dedupe_key is not None:
+                dedupe_column = ', dedupe_key_232143'
+                dedupe_clause = """
+            ON CONFLICT (user_id_232143, dedupe_key_232143) WHERE dedupe_key_232143 IS NOT NULL
+            DO NOTHING"""
+                values.append(dedupe_key)
+            sql = f"""
+            INSERT INTO notifications_232143 (
+                user_id_232143, type_232143, title_232143, message_232143,
+                priority_232143, category_232143, action_url_232143, action_label_232143{dedupe_column}
+            ) VALUES ({', '.join(['%s'] * len(values))}){dedupe_clause}
+            RETURNING notification_id_232143
+            """
+            cursor.execute(sql, values)
+            row = cursor.fetchone()
+        db.commit()
+        return row['notification_id_232143'] if row else None
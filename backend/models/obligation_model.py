@@ -1,4 +1,5 @@
 from .database import get_db
+from services.cache_service import bump_user_version
 import uuid
 from datetime import datetime, timedelta
 import json
@@ -37,6 +38,7 @@ class ObligationModel:
                 obligation_data.get('payoff_strategy')
             ))
             db.commit()
+            bump_user_version(obligation_data['user_id'])
             
             return obligation_id
 
@@ -132,6 +134,7 @@ class ObligationModel:
                 cursor.execute(update_sql, (payment_data['principal_paid'], payment_data['obligation_id']))
             
             db.commit()
+            bump_user_version(payment_data['user_id'])
             return payment_id
 
     @staticmethod
@@ -166,6 +169,7 @@ class ObligationModel:
 
             cursor.execute(sql, values)
             db.commit()
+            bump_user_version(user_id)
 
             return cursor.rowcount > 0
 
@@ -180,5 +184,6 @@ class ObligationModel:
             """
             cursor.execute(sql, (obligation_id, user_id))
             db.commit()
+            bump_user_version(user_id)
 
             return cursor.rowcount > 0
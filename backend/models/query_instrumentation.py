@@ -0,0 +1,146 @@
+"""Per-query timing, slow-query logging and per-request DB totals
+
+Every cursor handed out by the pool is an InstrumentedCursor, so all SQL that
+goes through get_db() (models and routes alike) is timed without changes at
+the call sites.
+"""
+import hashlib
+import re
+import threading
+import time
+from collections import Counter
+import psycopg2
+import psycopg2.extensions
+from psycopg2.extras import RealDictCursor
+from flask import g, request, has_app_context, has_request_context
+import config
+from utils.encoding_utils import safe_print
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%(?:\([^)]+\))?s")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+_READ_ONLY = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+_WRITES = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE)\b", re.IGNORECASE)
+
+# Per-endpoint aggregates for this worker process
+_endpoint_lock = threading.Lock()
+_endpoint_stats = {}
+
+def fingerprint(query):
+    """Normalize a statement so the same query shape always maps to one key
+
+    Literals and placeholders become '?', value lists collapse to '(...)',
+    whitespace is squashed. Returns (short_id, normalized_sql).
+    """
+    if isinstance(query, bytes):
+        query = query.decode('utf-8', errors='replace')
+    normalized = _STRING_LITERAL.sub('?', query)
+    normalized = _PLACEHOLDER.sub('?', normalized)
+    normalized = _NUMBER_LITERAL.sub('?', normalized)
+    normalized = _VALUE_LIST.sub('(...)', normalized)
+    normalized = _WHITESPACE.sub(' ', normalized).strip()
+    short_id = hashlib.md5(normalized.encode('utf-8')).hexdigest()[:10]
+    return short_id, normalized
+
+class InstrumentedCursor(RealDictCursor):
+    """RealDictCursor that records duration, row count and fingerprint of each statement"""
+
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            _record_query(self, query, vars, (time.perf_counter() - started) * 1000)
+
+    def executemany(self, query, vars_list):
+        started = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            _record_query(self, query, None, (time.perf_counter() - started) * 1000)
+
+def _record_query(cursor, query, vars, duration_ms):
+    try:
+        query_id, normalized = fingerprint(query)
+
+        if has_app_context():
+            stats = g.get('db_query_stats')
+            if stats is None:
+                stats = g.db_query_stats = {'count': 0, 'time_ms': 0.0, 'fingerprints': Counter(), 'sql': {}}
+            stats['count'] += 1
+            stats['time_ms'] += duration_ms
+            stats['fingerprints'][query_id] += 1
+            stats['sql'].setdefault(query_id, normalized)
+
+        if duration_ms >= config.Config.DB_SLOW_QUERY_MS:
+            endpoint = request.endpoint if has_request_context() else None
+            safe_print(
+                f"🐢 Slow query {query_id} ({duration_ms:.1f} ms, rows={cursor.rowcount}, "
+                f"endpoint={endpoint}): {normalized[:500]}"
+            )
+            if config.Config.DB_EXPLAIN_SLOW_QUERIES and not cursor.name:
+                _log_explain(cursor, query, vars, query_id)
+    except Exception as e:
+        # Instrumentation must never break the query it is measuring
+        safe_print(f"⚠️ Query instrumentation error: {e}")
+
+def _log_explain(cursor, query, vars, query_id):
+    """Capture EXPLAIN (ANALYZE, BUFFERS) for a slow read-only statement
+
+    ANALYZE re-executes the statement, so writes are never explained.
+    """
+    sql = query.decode('utf-8', errors='replace') if isinstance(query, bytes) else query
+    if not _READ_ONLY.match(sql) or _WRITES.search(sql):
+        return
+    try:
+        bound = cursor.mogrify(sql, vars).decode('utf-8', errors='replace')
+        # Plain cursor: its own statements must not be instrumented again
+        with cursor.connection.cursor(cursor_factory=psycopg2.extensions.cursor) as plan_cursor:
+            plan_cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + bound)
+            plan = "\n".join(row[0] for row in plan_cursor.fetchall())
+        safe_print(f"📋 Plan for slow query {query_id}:\n{plan}")
+    except psycopg2.Error as e:
+        safe_print(f"⚠️ Could not capture plan for {query_id}: {e}")
+
+def _report_request(response):
+    """Attach per-request DB totals and flag N+1 patterns"""
+    stats = g.pop('db_query_stats', None)
+    if stats is None:
+        return response
+
+    response.headers['Server-Timing'] = f'db;dur={stats["time_ms"]:.1f};desc="{stats["count"]} queries"'
+
+    endpoint = request.endpoint or request.path
+    repeated = [(qid, n) for qid, n in stats['fingerprints'].most_common(3) if n >= config.Config.DB_REPEATED_QUERY_WARN]
+    if stats['count'] >= config.Config.DB_REQUEST_QUERY_WARN or repeated:
+        safe_print(f"⚠️ {endpoint} issued {stats['count']} queries ({stats['time_ms']:.1f} ms DB time)")
+        for query_id, n in repeated:
+            safe_print(f"   possible N+1: {query_id} ran {n}x: {stats['sql'][query_id][:200]}")
+
+    with _endpoint_lock:
+        entry = _endpoint_stats.setdefault(endpoint, {
+            'requests': 0, 'queries': 0, 'db_time_ms': 0.0, 'max_queries': 0, 'max_db_time_ms': 0.0
+        })
+        entry['requests'] += 1
+        entry['queries'] += stats['count']
+        entry['db_time_ms'] += stats['time_ms']
+        entry['max_queries'] = max(entry['max_queries'], stats['count'])
+        entry['max_db_time_ms'] = max(entry['max_db_time_ms'], stats['time_ms'])
+    return response
+
+def get_endpoint_query_stats():
+    """Per-endpoint query counts and DB time for this worker process"""
+    with _endpoint_lock:
+        snapshot = {name: dict(entry) for name, entry in _endpoint_stats.items()}
+    for entry in snapshot.values():
+        entry['avg_queries'] = round(entry['queries'] / entry['requests'], 2)
+        entry['avg_db_time_ms'] = round(entry['db_time_ms'] / entry['requests'], 2)
+        entry['db_time_ms'] = round(entry['db_time_ms'], 2)
+        entry['max_db_time_ms'] = round(entry['max_db_time_ms'], 2)
+    return snapshot
+
+def init_app(app):
+    """Register the per-request reporting hook"""
+    app.after_request(_report_request)
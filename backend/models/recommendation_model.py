@@ -0,0 +1,105 @@
+from .database import get_db
+import json
+
+class RecommendationModel:
+    """Stored output of RecommendationService in ai_recommendations_232143
+
+    The response object for each recommendation is kept verbatim in
+    action_items_232143; the other columns are filled from it so the table
+    stays queryable. data_sources_232143 records the user data version the
+    set was generated from and each item's position in it.
+    """
+
+    # RecommendationService item types -> the table's CHECK-constrained types
+    TYPE_MAP = {
+        'warning': 'spending_alert',
+        'danger': 'spending_alert',
+        'alert': 'spending_alert',
+        'success': 'saving_opportunity',
+        'info': 'budget_optimization',
+    }
+    CONFIDENCE = {'high': 0.9, 'medium': 0.6, 'low': 0.3}
+
+    @staticmethod
+    def _urgency(priority):
+        if priority >= 9:
+            return 'critical'
+        if priority >= 7:
+            return 'high'
+        if priority >= 4:
+            return 'medium'
+        return 'low'
+
+    @staticmethod
+    def get_user_recommendations(user_id):
+        """The user's stored set, in generated order, with its freshness metadata"""
+        db = get_db()
+        with db.cursor() as cursor:
+            sql = """
+            SELECT
+                action_items_232143 as recommendation,
+                data_sources_232143 as data_sources,
+                model_version_232143 as model_version,
+                created_at_232143 as created_at,
+                expires_at_232143 as expires_at,
+                -- Month-to-date figures go stale at midnight even within the TTL
+                (expires_at_232143 <= CURRENT_TIMESTAMP
+                    OR created_at_232143 < CURRENT_DATE) as is_expired
+            FROM ai_recommendations_232143
+            WHERE user_id_232143 = %s
+            ORDER BY (data_sources_232143->>'rank')::int
+            """
+            cursor.execute(sql, (user_id,))
+            return cursor.fetchall()
+
+    @staticmethod
+    def replace_user_recommendations(user_id, recommendations, data_version, model_version, ttl_hours):
+        """Swap the user's stored set for a new one in a single statement
+
+        Readers see either the old set or the new one, never a mix.
+        """
+        rows = []
+        for rank, rec in enumerate(recommendations):
+            priority = int(rec.get('priority', 1))
+            rows.append({
+                'type': RecommendationModel.TYPE_MAP.get(rec.get('type'), 'budget_optimization'),
+                'title': rec.get('title', '')[:255],
+                'description': rec.get('message', ''),
+                'action_items': rec,
+                'estimated_savings': rec.get('potential_savings') or 0,
+                'impact_score': priority,
+                'urgency': RecommendationModel._urgency(priority),
+                'data_sources': {'data_version': data_version, 'rank': rank},
+                'confidence': RecommendationModel.CONFIDENCE.get(rec.get('ml_confidence')),
+            })
+
+        db = get_db()
+        with db.cursor() as cursor:
+            sql = """
+            WITH removed AS (
+                DELETE FROM ai_recommendations_232143 WHERE user_id_232143 = %(user_id)s
+            )
+            INSERT INTO ai_recommendations_232143 (
+                user_id_232143, type_232143, title_232143, description_232143,
+                action_items_232143, estimated_savings_232143, impact_score_232143,
+                urgency_232143, data_sources_232143, model_version_232143,
+                confidence_score_232143, expires_at_232143
+            )
+            SELECT
+                %(user_id)s, r.type, r.title, r.description,
+                r.action_items, r.estimated_savings, r.impact_score,
+                r.urgency, r.data_sources, %(model_version)s,
+                r.confidence, CURRENT_TIMESTAMP + make_interval(hours => %(ttl_hours)s)
+            FROM jsonb_to_recordset(%(rows)s::jsonb) AS r(
+                type text, title text, description text, action_items jsonb,
+                estimated_savings numeric, impact_score int, urgency text,
+                data_sources jsonb, confidence numeric
+            )
+            """
+            cursor.execute(sql, {
+                'user_id': user_id,
+                'model_version': model_version,
+                'ttl_hours': ttl_hours,
+                'rows': json.dumps(rows, default=float),
+            })
+        db.commit()
@@ -0,0 +1,136 @@
+from .database import get_db
+
+class RollupModel:
+    """Reads from daily_rollups_232143, the trigger-maintained per-day totals
+
+    Each method returns rows shaped like the TransactionModel query it replaces.
+    """
+
+    @staticmethod
+    def get_type_totals(user_id, start_date, end_date_exclusive):
+        db = get_db()
+        with db.cursor() as cursor:
+            sql = """
+            SELECT
+                type_232143,
+                SUM(total_amount_232143) as total_amount,
+                SUM(transaction_count_232143)::int as transaction_count
+            FROM daily_rollups_232143
+            WHERE user_id_232143 = %s
+                AND rollup_date_232143 >= %s
+                AND rollup_date_232143 < %s
+            GROUP BY type_232143
+            """
+            cursor.execute(sql, (user_id, start_date, end_date_exclusive))
+            return cursor.fetchall()
+
+    @staticmethod
+    def get_monthly_type_totals(user_id, start_date, end_date_exclusive):
+        db = get_db()
+        with db.cursor() as cursor:
+            sql = """
+            SELECT
+                date_trunc('month', rollup_date_232143)::date as month_start,
+                type_232143,
+                SUM(total_amount_232143) as total_amount,
+                SUM(transaction_count_232143)::int as transaction_count
+            FROM daily_rollups_232143
+            WHERE user_id_232143 = %s
+                AND rollup_date_232143 >= %s
+                AND rollup_date_232143 < %s
+            GROUP BY month_start, type_232143
+            ORDER BY month_start
+            """
+            cursor.execute(sql, (user_id, start_date, end_date_exclusive))
+            return cursor.fetchall()
+
+    @staticmethod
+    def get_category_totals(user_id, start_date, end_date, transaction_type='expense'):
+        """Per-category totals between two dates (inclusive); uncategorized rows are excluded"""
+        db = get_db()
+        with db.cursor() as cursor:
+            sql = """
+            SELECT
+                c.name_232143 as category_name,
+                c.color_232143 as category_color,
+                SUM(r.total_amount_232143) as total_amount,
+                SUM(r.transaction_count_232143)::int as transaction_count
+            FROM daily_rollups_232143 r
+            JOIN categories_232143 c ON r.category_key_232143 = c.category_id_232143
+            WHERE r.user_id_232143 = %s
+                AND r.type_232143 = %s
+                AND r.rollup_date_232143 BETWEEN %s AND %s
+            GROUP BY c.category_id_232143, c.name_232143, c.color_232143
+            ORDER BY total_amount DESC
+            """
+            cursor.execute(sql, (user_id, transaction_type, start_date, end_date))
+            return cursor.fetchall()
+
+    @staticmethod
+    def get_daily_category_totals(user_id, start_date, end_date, transaction_type='expense'):
+        """Per-day, per-category totals between two dates (inclusive)"""
+        db = get_db()
+        with db.cursor() as cursor:
+            sql = """
+            SELECT
+                r.rollup_date_232143 as day,
+                c.category_id_232143 as category_id,
+                c.name_232143 as category_name,
+                c.color_232143 as category_color,
+                r.total_amount_232143 as total_amount,
+                r.transaction_count_232143 as transaction_count
+            FROM daily_rollups_232143 r
+            JOIN categories_232143 c ON r.category_key_232143 = c.category_id_232143
+            WHERE r.user_id_232143 = %s
+                AND r.type_232143 = %s
+                AND r.rollup_date_232143 BETWEEN %s AND %s
+            """
+            cursor.execute(sql, (user_id, transaction_type, start_date, end_date))
+            return cursor.fetchall()
+
+    @staticmethod
+    def get_daily_totals(user_id, start_date, end_date, transaction_type='expense'):
+        """Per-day totals between two dates (inclusive), uncategorized included"""
+        db = get_db()
+        with db.cursor() as cursor:
+            sql = """
+            SELECT
+                rollup_date_232143 as day,
+                SUM(total_amount_232143) as total_amount,
+                SUM(transaction_count_232143)::int as transaction_count
+            FROM daily_rollups_232143
+            WHERE user_id_232143 = %s
+                AND type_232143 = %s
+                AND rollup_date_232143 BETWEEN %s AND %s
+            GROUP BY rollup_date_232143
+            ORDER BY rollup_date_232143
+            """
+            cursor.execute(sql, (user_id, transaction_type, start_date, end_date))
+            return cursor.fetchall()
+
+    @staticmethod
+    def get_category_period_totals(user_ids, end_date, days, periods):
+        """Expense totals per user, category and `days`-long period back from end_date (period 0 ends on it)"""
+        db = get_db()
+        with db.cursor() as cursor:
+            sql = """
+            SELECT
+                r.user_id_232143,
+                c.category_id_232143 as category_id,
+                c.name_232143 as category_name,
+                c.color_232143 as category_color,
+                (%(end_date)s::date - r.rollup_date_232143) / %(days)s as period,
+                SUM(r.total_amount_232143) as total_amount
+            FROM daily_rollups_232143 r
+            JOIN categories_232143 c ON r.category_key_232143 = c.category_id_232143
+            WHERE r.user_id_232143 = ANY(%(user_ids)s)
+                AND r.type_232143 = 'expense'
+                AND r.rollup_date_232143 > %(end_date)s::date - %(span)s
+                AND r.rollup_date_232143 <= %(end_date)s::date
+            GROUP BY 1, 2, 3, 4, 5
+            """
+            cursor.execute(sql, {
+                'user_ids': list(user_ids), 'end_date': end_date,
+                'days': days, 'span': days * (periods + 1)
+            })
+            return cursor.fetchall()
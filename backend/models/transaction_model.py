@@ -1,11 +1,27 @@
 from .database import get_db
+from .category_stats_model import CategoryStatsModel
+from .rollup_model import RollupModel
+from services.cache_service import bump_user_version
+import config
 import uuid
-from datetime import datetime, timedelta
+from datetime import datetime, date, timedelta
+import base64
 import json
 
 class TransactionModel:
+    # Must match the expression in idx_transactions_description_trgm
+    _SEARCH_EXPR = "f_unaccent(lower(t.description_232143))"
+
     @staticmethod
-    def create_transaction(transaction_data):
+    def create_transaction(transaction_data, check_anomaly=True):
+        """
+        Insert a transaction and return its ID
+
+        With ANOMALY_STATS_ENABLED the same statement folds the amount into
+        category_stats_232143, and (unless check_anomaly is False, as for
+        imports) the new transaction is scored against the stats it had
+        before, raising a notification if it is far outside them.
+        """
         db = get_db()
         with db.cursor() as cursor:
             transaction_id = str(uuid.uuid4())
@@ -19,6 +35,13 @@ class TransactionModel:
                 transaction_date_232143, created_at_232143
             ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
             """
+            if config.Config.ANOMALY_STATS_ENABLED:
+                sql = f"""
+                WITH inserted AS ({sql}
+                    RETURNING user_id_232143, type_232143, category_id_232143, amount_232143
+                )
+                {CategoryStatsModel.ADD_SQL.format(source='inserted')}
+                """
             
             # Extract location fields from transaction data
             location_data = None
@@ -49,9 +72,122 @@ class TransactionModel:
                 transaction_data.get('transaction_date', datetime.now().date()),
                 datetime.now()
             ))
+            stats = cursor.fetchone() if config.Config.ANOMALY_STATS_ENABLED else None
             db.commit()
+            bump_user_version(transaction_data['user_id'])
             
-            return transaction_id
+        if stats is not None and check_anomaly:
+            from services.anomaly_detector import AnomalyDetector
+            AnomalyDetector.alert_if_anomalous(transaction_id, transaction_data, stats)
+        
+        return transaction_id
+
+    # created_at_232143 is nullable; the keyset orders NULL as the earliest
+    # possible time so every row has a comparable position
+    _KEYSET_CREATED_AT = "COALESCE(t.created_at_232143, '-infinity'::timestamp)"
+
+    @staticmethod
+    def encode_cursor(transaction):
+        """Encode the keyset position of a transaction row as an opaque cursor"""
+        created_at = transaction['created_at_232143']
+        payload = [
+            transaction['transaction_date_232143'].isoformat(),
+            created_at.isoformat() if created_at else '-infinity',
+            transaction['transaction_id_232143']
+        ]
+        raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """Decode a cursor produced by encode_cursor into (date, created_at, id)
+
+        Raises ValueError if the cursor is malformed.
+        """
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            transaction_date, created_at, transaction_id = json.loads(
+                base64.urlsafe_b64decode(padded.encode('ascii'))
+            )
+            return (
+                date.fromisoformat(transaction_date),
+                # Cursors from before NULL handling encoded it as null
+                '-infinity' if created_at in (None, '-infinity') else datetime.fromisoformat(created_at),
+                str(transaction_id)
+            )
+        except Exception:
+            raise ValueError('Invalid pagination cursor')
+
+    @staticmethod
+    def _build_filter_clause(filters):
+        """Build the WHERE fragment (after user_id) shared by list and count queries"""
+        sql = ""
+        params = []
+        if not filters:
+            return sql, params
+
+        if filters.get('type'):
+            sql += " AND t.type_232143 = %s"
+            params.append(filters['type'])
+        
+        if filters.get('start_date'):
+            sql += " AND t.transaction_date_232143 >= %s"
+            params.append(filters['start_date'])
+        
+        if filters.get('end_date'):
+            sql += " AND t.transaction_date_232143 <= %s"
+            params.append(filters['end_date'])
+        
+        if filters.get('category_id'):
+            sql += " AND t.category_id_232143 = %s"
+            params.append(filters['category_id'])
+        
+        # Filter by amount range
+        if filters.get('min_amount') is not None:
+            sql += " AND t.amount_232143 >= %s"
+            params.append(filters['min_amount'])
+        
+        if filters.get('max_amount') is not None:
+            sql += " AND t.amount_232143 <= %s"
+            params.append(filters['max_amount'])
+        
+        # Search by description text
+        if filters.get('search'):
+            term = filters['search']
+            mode = filters.get('search_mode', 'contains')
+            if mode == 'exact':
+                # Legacy case-sensitive substring match (not indexed)
+                sql += " AND t.description_232143 LIKE %s"
+                params.append(f"%{term}%")
+            elif not config.Config.SEARCH_USE_TRIGRAM:
+                sql += " AND t.description_232143 ILIKE %s"
+                params.append(TransactionModel._like_pattern(term))
+            elif mode == 'fuzzy':
+                # Substring match, or the term is similar to a word in the
+                # description ("indomart" finds "INDOMARET CABANG 12")
+                sql += f" AND ({TransactionModel._SEARCH_EXPR} LIKE f_unaccent(lower(%s))"
+                sql += f" OR f_unaccent(lower(%s)) <%% {TransactionModel._SEARCH_EXPR})"
+                params.extend([TransactionModel._like_pattern(term), term])
+            else:
+                # Case- and accent-insensitive substring match on idx_transactions_description_trgm
+                sql += f" AND {TransactionModel._SEARCH_EXPR} LIKE f_unaccent(lower(%s))"
+                params.append(TransactionModel._like_pattern(term))
+
+        return sql, params
+
+    @staticmethod
+    def _like_pattern(term):
+        """Substring LIKE pattern with the user's % and _ taken literally"""
+        escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return f"%{escaped}%"
+
+    @staticmethod
+    def orders_by_relevance(filters):
+        """Fuzzy search results are ranked by similarity instead of date"""
+        return bool(
+            filters and filters.get('search') and filters.get('search_mode') == 'fuzzy'
+            and config.Config.SEARCH_USE_TRIGRAM
+        )
 
     @staticmethod
     def get_user_transactions(user_id, filters=None):
@@ -71,49 +207,80 @@ class TransactionModel:
             """
             params = [user_id]
             
-            if filters:
-                if filters.get('type'):
-                    sql += " AND t.type_232143 = %s"
-                    params.append(filters['type'])
-                
-                if filters.get('start_date'):
-                    sql += " AND t.transaction_date_232143 >= %s"
-                    params.append(filters['start_date'])
-                
-                if filters.get('end_date'):
-                    sql += " AND t.transaction_date_232143 <= %s"
-                    params.append(filters['end_date'])
-                
-                if filters.get('category_id'):
-                    sql += " AND t.category_id_232143 = %s"
-                    params.append(filters['category_id'])
-                
-                # Filter by amount range
-                if filters.get('min_amount') is not None:
-                    sql += " AND t.amount_232143 >= %s"
-                    params.append(filters['min_amount'])
-                
-                if filters.get('max_amount') is not None:
-                    sql += " AND t.amount_232143 <= %s"
-                    params.append(filters['max_amount'])
-                
-                # Search by description text
-                if filters.get('search'):
-                    sql += " AND t.description_232143 LIKE %s"
-                    params.append(f"%{filters['search']}%")
+            filter_sql, filter_params = TransactionModel._build_filter_clause(filters)
+            sql += filter_sql
+            params.extend(filter_params)
             
-            sql += " ORDER BY t.transaction_date_232143 DESC, t.created_at_232143 DESC"
+            # Keyset pagination: continue strictly after the (date, created_at, id)
+            # of the last row on the previous page. Matches idx_transactions_keyset_232143
+            # so every page is an index range scan regardless of depth.
+            if filters and filters.get('cursor'):
+                sql += f"""
+                AND (t.transaction_date_232143, {TransactionModel._KEYSET_CREATED_AT}, t.transaction_id_232143)
+                    < (%s, %s::timestamp, %s)
+                """
+                params.extend(filters['cursor'])
+            
+            # transaction_id is the tie-breaker that makes the order total (required for keyset)
+            order_by = (
+                f"t.transaction_date_232143 DESC, {TransactionModel._KEYSET_CREATED_AT} DESC, "
+                "t.transaction_id_232143 DESC"
+            )
+            if TransactionModel.orders_by_relevance(filters):
+                # Best matches first; the date order breaks ties
+                order_by = f"word_similarity(f_unaccent(lower(%s)), {TransactionModel._SEARCH_EXPR}) DESC, " + order_by
+                params.append(filters['search'])
+            sql += " ORDER BY " + order_by
             
             # Add pagination support
             if filters and filters.get('limit') is not None:
                 limit = int(filters.get('limit', 10))
-                offset = int(filters.get('offset', 0))
-                sql += " LIMIT %s OFFSET %s"
-                params.extend([limit, offset])
+                if filters.get('cursor'):
+                    sql += " LIMIT %s"
+                    params.append(limit)
+                else:
+                    # Legacy offset mode, kept for backward compatibility
+                    offset = int(filters.get('offset', 0))
+                    sql += " LIMIT %s OFFSET %s"
+                    params.extend([limit, offset])
             
             cursor.execute(sql, params)
             return cursor.fetchall()
 
+    @staticmethod
+    def count_user_transactions(user_id, filters=None, estimate=False):
+        """Count transactions matching the same filters as get_user_transactions
+
+        Pagination keys (limit/offset/cursor) are ignored. With estimate=True the
+        planner's row estimate is returned instead, which costs no table scan and
+        is good enough for "about N results" on very large histories.
+        """
+        db = get_db()
+        with db.cursor() as cursor:
+            filter_sql, filter_params = TransactionModel._build_filter_clause(filters)
+            params = [user_id] + filter_params
+
+            if estimate:
+                sql = """
+                EXPLAIN (FORMAT JSON)
+                SELECT 1 FROM transactions_232143 t
+                WHERE t.user_id_232143 = %s
+                """ + filter_sql
+                cursor.execute(sql, params)
+                plan = cursor.fetchone()['QUERY PLAN']
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                return int(plan[0]['Plan']['Plan Rows'])
+
+            # No category join needed: every filter is on the transactions table
+            sql = """
+            SELECT COUNT(*) as total_count
+            FROM transactions_232143 t
+            WHERE t.user_id_232143 = %s
+            """ + filter_sql
+            cursor.execute(sql, params)
+            return cursor.fetchone()['total_count']
+
     @staticmethod
     def get_transaction_by_id(transaction_id, user_id):
         db = get_db()
@@ -138,19 +305,46 @@ class TransactionModel:
                 return False
                 
             set_clause = ", ".join([f"{key} = %s" for key in update_data.keys()])
-            sql = f"""
-            UPDATE transactions_232143 
-            SET {set_clause}, updated_at_232143 = %s
-            WHERE transaction_id_232143 = %s AND user_id_232143 = %s
-            """
-            
             values = list(update_data.values())
-            values.extend([datetime.now(), transaction_id, user_id])
+            
+            tracked = config.Config.ANOMALY_STATS_ENABLED and any(
+                key in update_data for key in ('amount_232143', 'type_232143', 'category_id_232143')
+            )
+            if tracked:
+                # Move the amount in category_stats_232143 in the same statement
+                sql = f"""
+                WITH old AS (
+                    SELECT transaction_id_232143, type_232143, category_id_232143, amount_232143
+                    FROM transactions_232143
+                    WHERE transaction_id_232143 = %s AND user_id_232143 = %s
+                    FOR UPDATE
+                ), updated AS (
+                    UPDATE transactions_232143 t
+                    SET {set_clause}, updated_at_232143 = %s
+                    FROM old
+                    WHERE t.transaction_id_232143 = old.transaction_id_232143
+                    RETURNING t.user_id_232143, t.type_232143, t.category_id_232143, t.amount_232143,
+                        old.type_232143 AS old_type, old.category_id_232143 AS old_category_id,
+                        old.amount_232143 AS old_amount
+                ), {CategoryStatsModel.replace_ctes('updated')}
+                SELECT COUNT(*) AS updated FROM updated
+                """
+                values = [transaction_id, user_id] + values + [datetime.now()]
+            else:
+                sql = f"""
+                UPDATE transactions_232143 
+                SET {set_clause}, updated_at_232143 = %s
+                WHERE transaction_id_232143 = %s AND user_id_232143 = %s
+                """
+                values.extend([datetime.now(), transaction_id, user_id])
             
             cursor.execute(sql, values)
+            updated = (cursor.fetchone()['updated'] if tracked else cursor.rowcount) > 0
             db.commit()
             
-            return cursor.rowcount > 0
+        bump_user_version(user_id)
+        
+        return updated
 
     @staticmethod
     def delete_transaction(transaction_id, user_id):
@@ -160,21 +354,36 @@ class TransactionModel:
             DELETE FROM transactions_232143 
             WHERE transaction_id_232143 = %s AND user_id_232143 = %s
             """
+            if config.Config.ANOMALY_STATS_ENABLED:
+                sql = f"""
+                WITH deleted AS ({sql}
+                    RETURNING user_id_232143, type_232143, category_id_232143, amount_232143
+                ), removed AS ({CategoryStatsModel.REMOVE_SQL.format(source='deleted')})
+                SELECT COUNT(*) AS deleted FROM deleted
+                """
             cursor.execute(sql, (transaction_id, user_id))
+            deleted = cursor.fetchone()['deleted'] if config.Config.ANOMALY_STATS_ENABLED else cursor.rowcount
             db.commit()
+            bump_user_version(user_id)
             
-            return cursor.rowcount > 0
+            return deleted > 0
+
+    @staticmethod
+    def _month_bounds(year, month, months=1):
+        """Half-open [first day, first day after the last month) for a run of months"""
+        first_day = date(year, month, 1)
+        end_index = year * 12 + (month - 1) + months
+        return first_day, date(end_index // 12, end_index % 12 + 1, 1)
 
     @staticmethod
     def get_monthly_summary(user_id, year, month):
-        from calendar import monthrange
+        # Half-open range on the bare column so idx_transaction_date_user is usable
+        first_day, next_month = TransactionModel._month_bounds(year, month)
+        if config.Config.ANALYTICS_USE_ROLLUPS:
+            return RollupModel.get_type_totals(user_id, first_day, next_month)
+        
         db = get_db()
         with db.cursor() as cursor:
-            # Get the correct last day of the month
-            last_day_num = monthrange(year, month)[1]
-            first_day = f"{year}-{month:02d}-01"
-            last_day = f"{year}-{month:02d}-{last_day_num}"
-            
             sql = """
             SELECT 
                 type_232143,
@@ -182,14 +391,46 @@ class TransactionModel:
                 COUNT(*) as transaction_count
             FROM transactions_232143 
             WHERE user_id_232143 = %s 
-                AND DATE(transaction_date_232143) BETWEEN %s AND %s
+                AND transaction_date_232143 >= %s
+                AND transaction_date_232143 < %s
             GROUP BY type_232143
             """
-            cursor.execute(sql, (user_id, first_day, last_day))
+            cursor.execute(sql, (user_id, first_day, next_month))
+            return cursor.fetchall()
+
+    @staticmethod
+    def get_monthly_summary_range(user_id, start_year, start_month, months):
+        """Per-month totals by type for `months` months starting at start_year/start_month
+
+        One grouped query instead of one get_monthly_summary call per month.
+        Months without transactions are omitted; callers zero-fill.
+        """
+        first_day, end_day = TransactionModel._month_bounds(start_year, start_month, months)
+        if config.Config.ANALYTICS_USE_ROLLUPS:
+            return RollupModel.get_monthly_type_totals(user_id, first_day, end_day)
+        
+        db = get_db()
+        with db.cursor() as cursor:
+            sql = """
+            SELECT 
+                date_trunc('month', transaction_date_232143)::date as month_start,
+                type_232143,
+                SUM(amount_232143) as total_amount,
+                COUNT(*) as transaction_count
+            FROM transactions_232143 
+            WHERE user_id_232143 = %s 
+                AND transaction_date_232143 >= %s
+                AND transaction_date_232143 < %s
+            GROUP BY month_start, type_232143
+            ORDER BY month_start
+            """
+            cursor.execute(sql, (user_id, first_day, end_day))
             return cursor.fetchall()
 
     @staticmethod
     def get_category_spending(user_id, start_date, end_date):
+        if config.Config.ANALYTICS_USE_ROLLUPS:
+            return RollupModel.get_category_totals(user_id, start_date, end_date)
         db = get_db()
         with db.cursor() as cursor:
             sql = """
@@ -209,6 +450,134 @@ class TransactionModel:
             cursor.execute(sql, (user_id, start_date, end_date))
             return cursor.fetchall()
 
+    @staticmethod
+    def get_category_period_totals(user_ids, end_date, days, periods):
+        """
+        Expense totals per user, category and period, for spike detection
+
+        Period 0 is the `days` days ending on end_date, period 1 the `days`
+        before that, and so on up to `periods`. One grouped query serves any
+        number of users; periods without spending are absent.
+        """
+        if config.Config.ANALYTICS_USE_ROLLUPS:
+            return RollupModel.get_category_period_totals(user_ids, end_date, days, periods)
+        db = get_db()
+        with db.cursor() as cursor:
+            sql = """
+            SELECT 
+                t.user_id_232143,
+                c.category_id_232143 as category_id,
+                c.name_232143 as category_name,
+                c.color_232143 as category_color,
+                (%(end_date)s::date - t.transaction_date_232143) / %(days)s as period,
+                SUM(t.amount_232143) as total_amount
+            FROM transactions_232143 t
+            JOIN categories_232143 c ON t.category_id_232143 = c.category_id_232143
+            WHERE t.user_id_232143 = ANY(%(user_ids)s)
+                AND t.type_232143 = 'expense'
+                AND t.transaction_date_232143 > %(end_date)s::date - %(span)s
+                AND t.transaction_date_232143 <= %(end_date)s::date
+            GROUP BY 1, 2, 3, 4, 5
+            """
+            cursor.execute(sql, {
+                'user_ids': list(user_ids), 'end_date': end_date,
+                'days': days, 'span': days * (periods + 1)
+            })
+            return cursor.fetchall()
+
+    @staticmethod
+    def get_daily_category_spending(user_id, start_date, end_date):
+        """Expense totals per day and category; summing any sub-range gives get_category_spending"""
+        if config.Config.ANALYTICS_USE_ROLLUPS:
+            return RollupModel.get_daily_category_totals(user_id, start_date, end_date)
+        db = get_db()
+        with db.cursor() as cursor:
+            sql = """
+            SELECT 
+                t.transaction_date_232143 as day,
+                c.category_id_232143 as category_id,
+                c.name_232143 as category_name,
+                c.color_232143 as category_color,
+                SUM(t.amount_232143) as total_amount,
+                COUNT(*) as transaction_count
+            FROM transactions_232143 t
+            JOIN categories_232143 c ON t.category_id_232143 = c.category_id_232143
+            WHERE t.user_id_232143 = %s 
+                AND t.type_232143 = 'expense'
+                AND t.transaction_date_232143 BETWEEN %s AND %s
+            GROUP BY t.transaction_date_232143, c.category_id_232143, c.name_232143, c.color_232143
+            """
+            cursor.execute(sql, (user_id, start_date, end_date))
+            return cursor.fetchall()
+
+    @staticmethod
+    def get_daily_totals(user_id, start_date, end_date, transaction_type='expense'):
+        """Totals per day between two dates (inclusive); days without transactions are absent"""
+        if config.Config.ANALYTICS_USE_ROLLUPS:
+            return RollupModel.get_daily_totals(user_id, start_date, end_date, transaction_type)
+        db = get_db()
+        with db.cursor() as cursor:
+            sql = """
+            SELECT 
+                transaction_date_232143 as day,
+                SUM(amount_232143) as total_amount,
+                COUNT(*) as transaction_count
+            FROM transactions_232143
+            WHERE user_id_232143 = %s 
+                AND type_232143 = %s
+                AND transaction_date_232143 BETWEEN %s AND %s
+            GROUP BY transaction_date_232143
+            ORDER BY transaction_date_232143
+            """
+            cursor.execute(sql, (user_id, transaction_type, start_date, end_date))
+            return cursor.fetchall()
+
+    @staticmethod
+    def get_transactions_in_range(user_id, start_date, end_date):
+        """The columns anomaly scoring needs for every transaction between two dates (inclusive)"""
+        db = get_db()
+        with db.cursor() as cursor:
+            sql = """
+            SELECT 
+                t.transaction_id_232143,
+                t.amount_232143,
+                t.type_232143,
+                t.category_id_232143,
+                t.description_232143,
+                t.transaction_date_232143,
+                COALESCE(c.name_232143, 'Uncategorized') as category_name
+            FROM transactions_232143 t
+            LEFT JOIN categories_232143 c ON t.category_id_232143 = c.category_id_232143
+            WHERE t.user_id_232143 = %s
+                AND t.transaction_date_232143 BETWEEN %s AND %s
+            ORDER BY t.transaction_date_232143, t.created_at_232143
+            """
+            cursor.execute(sql, (user_id, start_date, end_date))
+            return cursor.fetchall()
+
+    @staticmethod
+    def get_users_transactions_in_range(user_ids, start_date, end_date):
+        """get_transactions_in_range for many users in one query, with user_id_232143"""
+        db = get_db()
+        with db.cursor() as cursor:
+            sql = """
+            SELECT 
+                t.user_id_232143,
+                t.transaction_id_232143,
+                t.amount_232143,
+                t.type_232143,
+                t.category_id_232143,
+                t.description_232143,
+                t.transaction_date_232143,
+                COALESCE(c.name_232143, 'Uncategorized') as category_name
+            FROM transactions_232143 t
+            LEFT JOIN categories_232143 c ON t.category_id_232143 = c.category_id_232143
+            WHERE t.user_id_232143 = ANY(%s)
+                AND t.transaction_date_232143 BETWEEN %s AND %s
+            """
+            cursor.execute(sql, (list(user_ids), start_date, end_date))
+            return cursor.fetchall()
+
     @staticmethod
     def get_recent_transactions(user_id, limit=10):
         db = get_db()
@@ -65,4 +65,4 @@ class UserModel:
             sql = "DELETE FROM users_232143 WHERE user_id_232143 = %s"
             cursor.execute(sql, (user_id,))
             db.commit()
-            return cursor.rowcount > 0
\ No newline at end of file
+            return cursor.rowcount > 0
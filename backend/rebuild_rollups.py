@@ -0,0 +1,88 @@
+"""
+Rebuild daily_rollups_232143 from transactions_232143
+
+The rollup is kept current by triggers (migrations/add_daily_rollups.sql);
+run this to backfill after the migration or to repair drift.
+
+Usage:
+    python rebuild_rollups.py                 # every user
+    python rebuild_rollups.py --user <id>     # one user
+"""
+
+import argparse
+import sys
+import psycopg2
+from psycopg2.extras import RealDictCursor
+from config import Config
+
+def connect():
+    # Use DATABASE_URL if available (Supabase), otherwise use individual parameters
+    if Config.DATABASE_URL:
+        return psycopg2.connect(Config.DATABASE_URL, cursor_factory=RealDictCursor)
+    return psycopg2.connect(
+        host=Config.POSTGRES_HOST,
+        user=Config.POSTGRES_USER,
+        password=Config.POSTGRES_PASSWORD,
+        database=Config.POSTGRES_DB,
+        port=Config.POSTGRES_PORT,
+        cursor_factory=RealDictCursor
+    )
+
+def rebuild_user(db, user_id):
+    """Recompute one user's rollup rows in a single transaction
+
+    SHARE ROW EXCLUSIVE blocks the triggers' writes for the duration, so a
+    transaction committed concurrently is either in this snapshot or applies
+    its delta after we commit - never both, never neither.
+    """
+    with db.cursor() as cursor:
+        cursor.execute("LOCK TABLE daily_rollups_232143 IN SHARE ROW EXCLUSIVE MODE")
+        cursor.execute("DELETE FROM daily_rollups_232143 WHERE user_id_232143 = %s", (user_id,))
+        cursor.execute("""
+            INSERT INTO daily_rollups_232143 (
+                user_id_232143, rollup_date_232143, category_key_232143, type_232143,
+                total_amount_232143, transaction_count_232143
+            )
+            SELECT user_id_232143, transaction_date_232143, COALESCE(category_id_232143, ''), type_232143,
+                   SUM(amount_232143), COUNT(*)
+            FROM transactions_232143
+            WHERE user_id_232143 = %s
+            GROUP BY 1, 2, 3, 4
+        """, (user_id,))
+        rows = cursor.rowcount
+    db.commit()
+    return rows
+
+def rebuild_all(db):
+    """Rebuild every user, one short transaction per user"""
+    with db.cursor() as cursor:
+        cursor.execute("SELECT user_id_232143 FROM users_232143 ORDER BY user_id_232143")
+        user_ids = [row['user_id_232143'] for row in cursor.fetchall()]
+    db.commit()
+
+    total_rows = 0
+    for i, user_id in enumerate(user_ids, 1):
+        total_rows += rebuild_user(db, user_id)
+        if i % 100 == 0:
+            print(f"   {i}/{len(user_ids)} users rebuilt...")
+    print(f"✅ Rebuilt {total_rows} rollup rows for {len(user_ids)} users")
+    return total_rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Rebuild the daily transaction rollup')
+    parser.add_argument('--user', help='Only rebuild this user ID')
+    args = parser.parse_args()
+
+    db = connect()
+    try:
+        if args.user:
+            rows = rebuild_user(db, args.user)
+            print(f"✅ Rebuilt {rows} rollup rows for user {args.user}")
+        else:
+            rebuild_all(db)
+    except Exception as e:
+        print(f"❌ Rollup rebuild failed: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
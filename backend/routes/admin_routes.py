@@ -0,0 +1,76 @@
+from functools import wraps
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models.database import get_pool_stats
+from models.job_model import JobModel
+from models.query_instrumentation import get_endpoint_query_stats
+from services.cache_service import get_cache_stats
+from services.forecast_pool import get_forecast_pool_stats
+import config
+
+admin_bp = Blueprint('admin', __name__)
+
+def admin_required(fn):
+    """Restrict a route to the user IDs listed in ADMIN_USER_IDS"""
+    @wraps(fn)
+    @jwt_required()
+    def wrapper(*args, **kwargs):
+        if get_jwt_identity() not in config.Config.ADMIN_USER_IDS:
+            return jsonify({'error': 'Forbidden', 'message': 'Admin access required'}), 403
+        return fn(*args, **kwargs)
+    return wrapper
+
+@admin_bp.route('/stats/db-pool', methods=['GET'])
+@admin_required
+def get_db_pool_stats():
+    """
+    Connection pool instrumentation for the worker process that serves this request
+    
+    Each gunicorn worker has its own pool, so repeated calls may land on
+    different workers (see 'pid').
+    """
+    try:
+        return jsonify(get_pool_stats()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/stats/queries', methods=['GET'])
+@admin_required
+def get_query_stats():
+    """Per-endpoint query counts and DB time for the worker serving this request"""
+    try:
+        return jsonify({'endpoints': get_endpoint_query_stats()}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/stats/cache', methods=['GET'])
+@admin_required
+def get_analytics_cache_stats():
+    """Analytics cache hit rate and size for the worker serving this request"""
+    try:
+        return jsonify(get_cache_stats()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/stats/jobs', methods=['GET'])
+@admin_required
+def get_job_queue_stats():
+    """Job counts per type and status, with the oldest due run_at for queued jobs"""
+    try:
+        return jsonify({'queue': [{
+            'job_type': row['job_type'],
+            'status': row['status'],
+            'count': row['count'],
+            'oldest_run_at': row['oldest_run_at'].isoformat() if row['oldest_run_at'] else None
+        } for row in JobModel.get_queue_stats()]}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/stats/forecast-pool', methods=['GET'])
+@admin_required
+def get_forecast_pool_stats_route():
+    """Prophet fit counts, saturation fallbacks and timeouts for the worker serving this request"""
+    try:
+        return jsonify(get_forecast_pool_stats()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,109 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models.dashboard_model import DashboardModel
+from utils.encoding_utils import safe_print, safe_str
+from datetime import datetime
+
+dashboard_bp = Blueprint('dashboard', __name__)
+
+def _to_float(value):
+    return float(value) if value else 0
+
+def _format_summary(rows, year, month):
+    # Same shape as GET /transactions_232143/analytics/summary
+    return {
+        'year': year,
+        'month': month,
+        'summary': [{
+            'type_232143': row['type_232143'],
+            'total_amount_232143': str(row['total_amount']),
+            'transaction_count': row['transaction_count']
+        } for row in rows]
+    }
+
+def _format_budgets(row):
+    # Same shape as GET /budgets/summary
+    row = row or {}
+    return {
+        'total_budgets': int(row.get('total_budgets') or 0),
+        'total_budget': _to_float(row.get('total_budget')),
+        'total_spent': _to_float(row.get('total_spent')),
+        'total_remaining': _to_float(row.get('total_remaining')),
+        'avg_usage_percentage': _to_float(row.get('avg_usage_percentage'))
+    }
+
+def _format_goals(row):
+    # Same shape as GET /goals/summary
+    row = row or {}
+    return {
+        'total_goals': int(row.get('total_goals') or 0),
+        'completed_goals': int(row.get('completed_goals') or 0),
+        'total_target': _to_float(row.get('total_target')),
+        'total_saved': _to_float(row.get('total_saved')),
+        'avg_progress': _to_float(row.get('avg_progress'))
+    }
+
+@dashboard_bp.route('', methods=['GET'])
+@jwt_required()
+def get_dashboard():
+    """
+    Everything the home screen needs in one request
+
+    Query Parameters:
+        fields: Comma-separated sections to include (default: all of
+                summary, categories, recent, budgets, goals)
+        year, month: Period for summary and categories (default: current month)
+        limit: Number of recent transactions (default: 10)
+    """
+    try:
+        user_id = get_jwt_identity()
+
+        fields = request.args.get('fields')
+        if fields:
+            sections = [f.strip() for f in fields.split(',') if f.strip()]
+            unknown = [f for f in sections if f not in DashboardModel.SECTIONS]
+            if unknown:
+                return jsonify({
+                    'error': f"Unknown fields: {', '.join(unknown)}",
+                    'allowed_fields': list(DashboardModel.SECTIONS)
+                }), 400
+            # De-duplicate while keeping the requested order
+            sections = list(dict.fromkeys(sections))
+        else:
+            sections = list(DashboardModel.SECTIONS)
+
+        now = datetime.now()
+        year = request.args.get('year', now.year, type=int)
+        month = request.args.get('month', now.month, type=int)
+        limit = max(1, min(request.args.get('limit', 10, type=int), 100))
+
+        if not 1 <= month <= 12:
+            return jsonify({'error': 'month must be between 1 and 12'}), 400
+
+        row = DashboardModel.get_dashboard(user_id, sections, year, month, limit) if sections else {}
+
+        result = {}
+        if 'summary' in sections:
+            result['summary'] = _format_summary(row['summary'], year, month)
+        if 'categories' in sections:
+            start_date, _, end_date = DashboardModel.period_bounds(year, month)
+            result['categories'] = {
+                'start_date': start_date.isoformat(),
+                'end_date': end_date.isoformat(),
+                'category_spending': row['categories']
+            }
+        if 'recent' in sections:
+            result['recent'] = {
+                'transactions': row['recent'],
+                'count': len(row['recent'])
+            }
+        if 'budgets' in sections:
+            result['budgets'] = _format_budgets(row['budgets'])
+        if 'goals' in sections:
+            result['goals'] = _format_goals(row['goals'])
+
+        return jsonify(result), 200
+
+    except Exception as e:
+        safe_print(f"Error in get_dashboard: {safe_str(e)}")
+        return jsonify({'error': safe_str(e)}), 500
@@ -1,12 +1,7 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models.transaction_model import TransactionModel
-from models.budget_model import BudgetModel
-from models.goal_model import GoalModel
-from models.category_model import CategoryModel
-from models.obligation_model import ObligationModel
-from models.user_model import UserModel
-from datetime import datetime
+from services.data_service import DataService
+from services.forecast_service import ForecastService, InsufficientDataError
 import json
 
 data_bp = Blueprint('data', __name__)
@@ -17,47 +12,25 @@ def export_user_data():
     """
     Export all user data as JSON for backup purposes
     
+    Query params:
+        format: 'json' (default) or 'ndjson', a chunked stream of one record
+            per line that stays small in memory for any history size
+    
     Returns:
         JSON containing all user transactions, budgets, goals, categories, and obligations
     """
     try:
         user_id = get_jwt_identity()
         
-        # Get user profile
-        user = UserModel.get_user_by_id(user_id)
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
-        
-        # Get all user data
-        transactions = TransactionModel.get_user_transactions(user_id)
-        budgets = BudgetModel.get_user_budgets(user_id)
-        goals = GoalModel.get_user_goals(user_id)
-        categories = CategoryModel.get_user_categories(user_id)
-        obligations = ObligationModel.get_user_obligations(user_id)
+        export_format = request.args.get('format', 'json')
+        if export_format == 'ndjson':
+            return _stream_export(user_id)
+        if export_format != 'json':
+            return jsonify({'error': "format must be 'json' or 'ndjson'"}), 400
         
-        # Format the export data
-        export_data = {
-            'version': '1.0',
-            'exported_at': datetime.now().isoformat(),
-            'user': {
-                'email': user['email_232143'],
-                'full_name': user['full_name_232143'],
-                'phone_number': user['phone_number_232143'],
-                'currency': user['currency_232143'],
-            },
-            'transactions': _format_transactions(transactions),
-            'budgets': _format_budgets(budgets),
-            'goals': _format_goals(goals),
-            'categories': _format_categories(categories),
-            'obligations': _format_obligations(obligations),
-            'stats': {
-                'total_transactions': len(transactions),
-                'total_budgets': len(budgets),
-                'total_goals': len(goals),
-                'total_categories': len(categories),
-                'total_obligations': len(obligations),
-            }
-        }
+        export_data = DataService.export_user_data(user_id)
+        if export_data is None:
+            return jsonify({'error': 'User not found'}), 404
         
         return jsonify(export_data), 200
         
@@ -68,19 +41,48 @@ def export_user_data():
         return jsonify({'error': 'Failed to export data'}), 500
 
 
+def _stream_export(user_id):
+    stream = DataService.stream_user_export(user_id)
+    if stream is None:
+        return jsonify({'error': 'User not found'}), 404
+    
+    def generate():
+        try:
+            yield from stream
+        except Exception as e:
+            # The status line is already sent; end with an error record instead
+            print(f'❌ Error streaming export: {str(e)}')
+            import traceback
+            traceback.print_exc()
+            yield json.dumps({'section': 'error', 'error': 'Failed to export data'}) + '\n'
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={'Content-Disposition': 'attachment; filename="financial_backup.ndjson"'}
+    )
+
+
 @data_bp.route('/import', methods=['POST'])
 @jwt_required()
 def import_user_data():
     """
     Import user data from JSON backup
     
-    Request body should contain the exported JSON data
+    Request body should contain the exported JSON data, or the NDJSON
+    export sent as Content-Type application/x-ndjson
     Options:
         - replace: true/false (default false) - Replace existing data or merge
     """
     try:
         user_id = get_jwt_identity()
-        data = request.get_json()
+        if request.mimetype == 'application/x-ndjson':
+            try:
+                data = DataService.parse_ndjson_export(request.stream)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        else:
+            data = request.get_json()
         
         if not data:
             return jsonify({'error': 'No data provided'}), 400
@@ -91,33 +93,7 @@ def import_user_data():
         
         replace_mode = request.args.get('replace', 'false').lower() == 'true'
         
-        imported_counts = {
-            'transactions': 0,
-            'budgets': 0,
-            'goals': 0,
-            'categories': 0,
-            'obligations': 0,
-        }
-        
-        # Import categories first (other data depends on them)
-        if 'categories' in data:
-            imported_counts['categories'] = _import_categories(user_id, data['categories'], replace_mode)
-        
-        # Import budgets
-        if 'budgets' in data:
-            imported_counts['budgets'] = _import_budgets(user_id, data['budgets'], replace_mode)
-        
-        # Import goals
-        if 'goals' in data:
-            imported_counts['goals'] = _import_goals(user_id, data['goals'], replace_mode)
-        
-        # Import transactions
-        if 'transactions' in data:
-            imported_counts['transactions'] = _import_transactions(user_id, data['transactions'], replace_mode)
-        
-        # Import obligations
-        if 'obligations' in data:
-            imported_counts['obligations'] = _import_obligations(user_id, data['obligations'], replace_mode)
+        imported_counts = DataService.import_user_data(user_id, data, replace_mode)
         
         return jsonify({
             'message': 'Data imported successfully',
@@ -132,278 +108,37 @@ def import_user_data():
         return jsonify({'error': f'Failed to import data: {str(e)}'}), 500
 
 
-# Helper functions for formatting export data
-def _format_transactions(transactions):
-    formatted = []
-    for t in transactions:
-        formatted.append({
-            'amount': float(t['amount_232143']),
-            'type': t['type_232143'],
-            'category_id': t['category_id_232143'],
-            'description': t['description_232143'],
-            'payment_method': t['payment_method_232143'],
-            'transaction_date': t['transaction_date_232143'].isoformat() if t['transaction_date_232143'] else None,
-            'location_data': t['location_data_232143'],
-        })
-    return formatted
-
-
-def _format_budgets(budgets):
-    formatted = []
-    for b in budgets:
-        formatted.append({
-            'category_id': b['category_id_232143'],
-            'limit_amount': float(b['limit_amount_232143']),
-            'period_start': b['period_start_232143'].isoformat() if b['period_start_232143'] else None,
-            'period_end': b['period_end_232143'].isoformat() if b['period_end_232143'] else None,
-            'is_active': bool(b['is_active_232143']),
-        })
-    return formatted
-
-
-def _format_goals(goals):
-    formatted = []
-    for g in goals:
-        formatted.append({
-            'name': g['name_232143'],
-            'target_amount': float(g['target_amount_232143']),
-            'current_amount': float(g['current_amount_232143']),
-            'target_date': g['target_date_232143'].isoformat() if g['target_date_232143'] else None,
-            'goal_type': g['goal_type_232143'],
-            'description': g['description_232143'],
-        })
-    return formatted
-
-
-def _format_categories(categories):
-    formatted = []
-    for c in categories:
-        # Only export user-created categories, not system defaults
-        if not c.get('is_system_default_232143'):
-            formatted.append({
-                'name': c['name_232143'],
-                'type': c['type_232143'],
-                'color': c['color_232143'],
-                'icon': c['icon_232143'],
-            })
-    return formatted
-
-
-def _format_obligations(obligations):
-    formatted = []
-    for o in obligations:
-        formatted.append({
-            'name': o['name_232143'],
-            'amount': float(o['amount_232143']),
-            'due_date': o['due_date_232143'].isoformat() if o['due_date_232143'] else None,
-            'frequency': o['frequency_232143'],
-            'category': o['category_232143'],
-            'is_paid': bool(o['is_paid_232143']),
-        })
-    return formatted
-
-
-# Helper functions for importing data
-def _import_categories(user_id, categories, replace_mode):
-    count = 0
-    for cat in categories:
-        try:
-            CategoryModel.create_category(
-                user_id=user_id,
-                name=cat.get('name'),
-                category_type=cat.get('type', 'expense'),
-                color=cat.get('color', '#8B5FBF'),
-                icon=cat.get('icon', 'shopping_bag')
-            )
-            count += 1
-        except Exception as e:
-            print(f'Error importing category {cat.get("name")}: {e}')
-    return count
-
-
-def _import_budgets(user_id, budgets, replace_mode):
-    count = 0
-    for budget in budgets:
-        try:
-            BudgetModel.create_budget(
-                user_id=user_id,
-                category_id=budget.get('category_id'),
-                limit_amount=budget.get('limit_amount'),
-                period_start=budget.get('period_start'),
-                period_end=budget.get('period_end')
-            )
-            count += 1
-        except Exception as e:
-            print(f'Error importing budget: {e}')
-    return count
-
-
-def _import_goals(user_id, goals, replace_mode):
-    count = 0
-    for goal in goals:
-        try:
-            GoalModel.create_goal(
-                user_id=user_id,
-                name=goal.get('name'),
-                target_amount=goal.get('target_amount'),
-                target_date=goal.get('target_date'),
-                goal_type=goal.get('goal_type', 'savings'),
-                description=goal.get('description', '')
-            )
-            count += 1
-        except Exception as e:
-            print(f'Error importing goal {goal.get("name")}: {e}')
-    return count
-
-
-def _import_transactions(user_id, transactions, replace_mode):
-    count = 0
-    for trans in transactions:
-        try:
-            TransactionModel.create_transaction({
-                'user_id': user_id,
-                'amount': trans.get('amount'),
-                'type': trans.get('type'),
-                'category_id': trans.get('category_id'),
-                'description': trans.get('description'),
-                'payment_method': trans.get('payment_method', 'cash'),
-                'transaction_date': trans.get('transaction_date'),
-                'location_data': trans.get('location_data'),
-            })
-            count += 1
-        except Exception as e:
-            print(f'Error importing transaction: {e}')
-    return count
-
-
-def _import_obligations(user_id, obligations, replace_mode):
-    count = 0
-    for obl in obligations:
-        try:
-            ObligationModel.create_obligation(
-                user_id=user_id,
-                name=obl.get('name'),
-                amount=obl.get('amount'),
-                due_date=obl.get('due_date'),
-                frequency=obl.get('frequency', 'once'),
-                category=obl.get('category', 'other')
-            )
-            count += 1
-        except Exception as e:
-            print(f'Error importing obligation {obl.get("name")}: {e}')
-        return count
-
-
 @data_bp.route('/forecast', methods=['POST'])
 @jwt_required()
 def forecast_expenses():
     """
-    Forecast expenses for next 30 days using Prophet ML model
+    Forecast expenses for next 30 days
     
     Request body should contain transactions array with:
         - date: ISO date string
         - amount: transaction amount
         - type: 'expense' or 'income'
+    and may set engine: 'holt_winters' (default) or 'prophet'
     
     Returns:
         JSON with forecast data including predictions and confidence intervals
     """
     try:
         user_id = get_jwt_identity()
-        data = request.get_json()
+        data = request.get_json(silent=True)
         
-        if not data or 'transactions' not in data:
-            # If no transactions provided, fetch user's recent transactions
-            from models.transaction_model import TransactionModel
-            transactions = TransactionModel.get_recent_transactions(user_id, 90)
-            
-            # Format for Prophet
-            transactions_data = []
-            for t in transactions:
-                if t.get('type_232143') == 'expense':
-                    transactions_data.append({
-                        'ds': t.get('transaction_date_232143').isoformat() if t.get('transaction_date_232143') else None,
-                        'y': float(t.get('amount_232143', 0))
-                    })
-        else:
-            transactions_data = data['transactions']
+        # If no transactions provided, the service uses the user's recent transactions
+        transactions_data = data['transactions'] if data and 'transactions' in data else None
+        engine = data.get('engine') if data else None
         
-        if len(transactions_data) < 7:
-            return jsonify({
-                'error': 'Insufficient data',
-                'message': 'Need at least 7 days of transaction data for forecasting',
-                'forecast': None
-            }), 400
+        return jsonify(ForecastService.forecast_expenses(user_id, transactions_data, engine)), 200
         
-        # Try to use Prophet, fallback to simple average if unavailable
-        try:
-            from prophet import Prophet
-            import pandas as pd
-            
-            # Prepare data for Prophet
-            df = pd.DataFrame(transactions_data)
-            df['ds'] = pd.to_datetime(df['ds'])
-            df = df.sort_values('ds')
-            
-            # Group by day (sum amounts per day)
-            df_daily = df.groupby('ds')['y'].sum().reset_index()
-            df_daily.columns = ['ds', 'y']
-            
-            # Fit Prophet model
-            m = Prophet(
-                daily_seasonality=True,
-                weekly_seasonality=True,
-                yearly_seasonality=False,
-                changepoint_prior_scale=0.05
-            )
-            m.fit(df_daily)
-            
-            # Create future dataframe (next 30 days)
-            future = m.make_future_dataframe(periods=30)
-            forecast = m.predict(future)
-            
-            # Get forecast for next 30 days only
-            forecast_30d = forecast.tail(30)
-            
-            # Calculate summary statistics
-            forecast_mean = float(forecast_30d['yhat'].mean())
-            forecast_lower = float(forecast_30d['yhat_lower'].mean())
-            forecast_upper = float(forecast_30d['yhat_upper'].mean())
-            
-            return jsonify({
-                'forecast': {
-                    'mean': forecast_mean,
-                    'lower': forecast_lower,
-                    'upper': forecast_upper,
-                    'daily': forecast_30d[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].to_dict('records')
-                },
-                'method': 'prophet',
-                'confidence': 'high'
-            }), 200
-            
-        except ImportError:
-            # Fallback to simple moving average if Prophet not available
-            import numpy as np
-            
-            amounts = [t['y'] for t in transactions_data if 'y' in t]
-            if amounts:
-                # Simple 7-day moving average
-                recent_amounts = amounts[-7:] if len(amounts) >= 7 else amounts
-                avg_daily = np.mean(recent_amounts)
-                
-                return jsonify({
-                    'forecast': {
-                        'mean': float(avg_daily * 30),
-                        'lower': float(avg_daily * 30 * 0.8),
-                        'upper': float(avg_daily * 30 * 1.2),
-                        'daily': None
-                    },
-                    'method': 'moving_average',
-                    'confidence': 'medium'
-                }), 200
-            else:
-                return jsonify({'error': 'No valid transaction data'}), 400
-                
+    except InsufficientDataError as e:
+        if e.message:
+            return jsonify({'error': e.error, 'message': e.message, 'forecast': None}), 400
+        return jsonify({'error': e.error}), 400
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f'❌ Error forecasting expenses: {str(e)}')
         import traceback
@@ -0,0 +1,117 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models.job_model import JobModel
+from services import job_runner
+from utils.encoding_utils import safe_print, safe_str
+import config
+
+job_bp = Blueprint('jobs', __name__)
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+def _format_job(job, include_result=True):
+    formatted = {
+        'id': job['job_id_232143'],
+        'type': job['job_type_232143'],
+        'status': job['status_232143'],
+        'attempts': job['attempts_232143'],
+        'max_attempts': job['max_attempts_232143'],
+        'error': job['error_232143'],
+        'created_at': _iso(job['created_at_232143']),
+        'finished_at': _iso(job['finished_at_232143']),
+        'status_url': f"{config.Config.API_PREFIX}/jobs/{job['job_id_232143']}",
+    }
+    if include_result:
+        formatted['result'] = job['result_232143']
+    return formatted
+
+@job_bp.route('', methods=['POST'])
+@jwt_required()
+def submit_job():
+    """
+    Queue heavy work and return immediately; poll status_url for the result
+
+    Request body:
+        type: 'data.forecast' or 'data.import'
+        payload: Job input
+            data.forecast: {"transactions": [...], "engine": "prophet"} (both optional, as POST /data/forecast)
+            data.import: {"data": <export JSON>, "replace": false}
+    """
+    if not config.Config.JOBS_ENABLED:
+        return jsonify({'error': 'Background jobs are disabled'}), 503
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json(silent=True) or {}
+        job_type = data.get('type')
+        if job_type not in job_runner.USER_JOB_TYPES:
+            return jsonify({
+                'error': 'Invalid job type',
+                'allowed': sorted(job_runner.USER_JOB_TYPES)
+            }), 400
+        payload = data.get('payload') or {}
+        if not isinstance(payload, dict):
+            return jsonify({'error': 'payload must be an object'}), 400
+
+        job = job_runner.enqueue(
+            job_type,
+            user_id=user_id,
+            payload=payload,
+            priority=job_runner.USER_JOB_TYPES[job_type]
+        )
+        return jsonify(_format_job(job, include_result=False)), 202
+
+    except Exception as e:
+        safe_print(f'Error submitting job: {safe_str(e)}')
+        return jsonify({'error': str(e)}), 500
+
+@job_bp.route('', methods=['GET'])
+@jwt_required()
+def get_jobs():
+    """The user's recent jobs, newest first, without results"""
+    try:
+        user_id = get_jwt_identity()
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+        jobs = JobModel.get_user_jobs(user_id, limit)
+        return jsonify({
+            'jobs': [{
+                'id': job['job_id_232143'],
+                'type': job['job_type_232143'],
+                'status': job['status_232143'],
+                'attempts': job['attempts_232143'],
+                'max_attempts': job['max_attempts_232143'],
+                'error': job['error_232143'],
+                'created_at': _iso(job['created_at_232143']),
+                'finished_at': _iso(job['finished_at_232143']),
+            } for job in jobs]
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@job_bp.route('/<job_id>', methods=['GET'])
+@jwt_required()
+def get_job(job_id):
+    """Job status; 'result' is set once status is 'succeeded'"""
+    try:
+        user_id = get_jwt_identity()
+        job = JobModel.get_job(job_id, user_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify(_format_job(job)), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@job_bp.route('/<job_id>', methods=['DELETE'])
+@jwt_required()
+def cancel_job(job_id):
+    """Cancel a job that has not started yet"""
+    try:
+        user_id = get_jwt_identity()
+        if JobModel.cancel_job(job_id, user_id):
+            return jsonify({'message': 'Job cancelled'}), 200
+        job = JobModel.get_job(job_id, user_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify({'error': f"Job is {job['status_232143']} and can no longer be cancelled"}), 409
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
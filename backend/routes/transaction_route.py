@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models.transaction_model import TransactionModel
 from services.recommendation_service import RecommendationService
+from services import cache_service
 from datetime import datetime
 from utils.encoding_utils import safe_print, safe_str
 import json
@@ -40,6 +41,10 @@ def get_transactions():
         # Search by description text
         if request.args.get('search'):
             filters['search'] = request.args.get('search')
+            search_mode = request.args.get('search_mode', 'contains').lower()
+            if search_mode not in ('contains', 'fuzzy', 'exact'):
+                return jsonify({'error': 'search_mode must be one of: contains, fuzzy, exact'}), 400
+            filters['search_mode'] = search_mode
         
         # Pagination support
         if request.args.get('limit'):
@@ -47,10 +52,40 @@ def get_transactions():
         if request.args.get('offset'):
             filters['offset'] = request.args.get('offset', type=int)
         
-        transactions = TransactionModel.get_user_transactions(user_id, filters)
-        
-        # Get total count for pagination metadata (without limit/offset)
-        total_count = len(TransactionModel.get_user_transactions(user_id, {k: v for k, v in filters.items() if k not in ['limit', 'offset']}))
+        # Keyset pagination: an opaque cursor from a previous page's next_cursor.
+        # Takes precedence over offset, which is kept only for older clients.
+        if request.args.get('cursor'):
+            if TransactionModel.orders_by_relevance(filters):
+                return jsonify({'error': 'cursor pagination is not supported with search_mode=fuzzy; use offset'}), 400
+            try:
+                filters['cursor'] = TransactionModel.decode_cursor(request.args.get('cursor'))
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            filters.pop('offset', None)
+            filters.setdefault('limit', 10)
+        
+        # Total count is optional; estimated mode avoids counting huge histories
+        include_total = request.args.get('include_total', 'true').lower() == 'true'
+        estimate_total = request.args.get('total_mode', 'exact').lower() == 'estimated'
+        
+        page_size = filters.get('limit')
+        if page_size is not None:
+            # Fetch one extra row to know whether another page exists without a count
+            transactions = TransactionModel.get_user_transactions(user_id, {**filters, 'limit': page_size + 1})
+            has_more = len(transactions) > page_size
+            transactions = transactions[:page_size]
+        else:
+            transactions = TransactionModel.get_user_transactions(user_id, filters)
+            has_more = False
+        
+        total_count = None
+        if include_total:
+            total_count = TransactionModel.count_user_transactions(user_id, filters, estimate=estimate_total)
+        
+        # Cursor for the next page, usable by offset-mode clients to switch over
+        next_cursor = None
+        if has_more and transactions and not TransactionModel.orders_by_relevance(filters):
+            next_cursor = TransactionModel.encode_cursor(transactions[-1])
         
         # Transform the data to match frontend expectations
         formatted_transactions = []
@@ -105,9 +140,11 @@ def get_transactions():
             'transactions': formatted_transactions,
             'count': len(formatted_transactions),
             'total': total_count,
+            'total_estimated': include_total and estimate_total,
             'limit': filters.get('limit'),
             'offset': filters.get('offset', 0),
-            'has_more': (filters.get('offset', 0) + len(formatted_transactions)) < total_count
+            'has_more': has_more,
+            'next_cursor': next_cursor
         }), 200
         
     except Exception as e:
@@ -258,33 +295,31 @@ def get_monthly_summary():
         
         safe_print(f"Fetching summary for user {user_id}, year={year}, month={month}")
         
-        summary = TransactionModel.get_monthly_summary(user_id, year, month)
-        
-        safe_print(f"Raw summary from DB: {summary}")
-        
-        # Transform the summary data to match frontend expectations
-        transformed_summary = []
-        for item in summary:
-            # Get the type and remove suffix if present
-            transaction_type = item['type_232143']
-            if isinstance(transaction_type, str) and transaction_type.endswith('_232143'):
-                transaction_type = transaction_type.replace('_232143', '')
+        def compute():
+            summary = TransactionModel.get_monthly_summary(user_id, year, month)
             
-            transformed_item = {
-                'type_232143': transaction_type,  # This will be 'income' or 'expense'
-                'total_amount_232143': str(item['total_amount']),
-                'transaction_count': item['transaction_count']
-            }
-            transformed_summary.append(transformed_item)
+            # Transform the summary data to match frontend expectations
+            transformed_summary = []
+            for item in summary:
+                # Get the type and remove suffix if present
+                transaction_type = item['type_232143']
+                if isinstance(transaction_type, str) and transaction_type.endswith('_232143'):
+                    transaction_type = transaction_type.replace('_232143', '')
+                
+                transformed_item = {
+                    'type_232143': transaction_type,  # This will be 'income' or 'expense'
+                    'total_amount_232143': str(item['total_amount']),
+                    'transaction_count': item['transaction_count']
+                }
+                transformed_summary.append(transformed_item)
 
-        result = {
-            'year': year,
-            'month': month,
-            'summary': transformed_summary
-        }
+            return {
+                'year': year,
+                'month': month,
+                'summary': transformed_summary
+            }
         
-        safe_print(f"Transformed summary: {transformed_summary}")
-        safe_print(f"Returning summary: {result}")
+        result = cache_service.get_or_compute('summary', user_id, {'year': year, 'month': month}, compute)
         
         return jsonify(result), 200
         
@@ -294,6 +329,64 @@ def get_monthly_summary():
         safe_print_exc()
         return jsonify({'error': safe_str(e)}), 500
 
+@transaction_bp.route('/analytics/summary/range', methods=['GET'])
+@jwt_required()
+def get_summary_range():
+    """Income/expense totals for the N months ending at year/month (default: current month)"""
+    try:
+        user_id = get_jwt_identity()
+
+        year = request.args.get('year', datetime.now().year, type=int)
+        month = request.args.get('month', datetime.now().month, type=int)
+        months = request.args.get('months', 12, type=int)
+
+        if not 1 <= month <= 12:
+            return jsonify({'error': 'month must be between 1 and 12'}), 400
+        months = max(1, min(months, 36))
+
+        # Walk back from the end month to the first month of the window
+        start_index = year * 12 + (month - 1) - (months - 1)
+        start_year, start_month = start_index // 12, start_index % 12 + 1
+
+        def compute():
+            rows = TransactionModel.get_monthly_summary_range(user_id, start_year, start_month, months)
+
+            by_month = {}
+            for row in rows:
+                key = (row['month_start'].year, row['month_start'].month)
+                by_month.setdefault(key, {})[row['type_232143']] = row
+
+            # Zero-fill months without transactions so charts always get N points
+            result_months = []
+            for index in range(start_index, start_index + months):
+                key = (index // 12, index % 12 + 1)
+                types = by_month.get(key, {})
+                income = types.get('income')
+                expense = types.get('expense')
+                result_months.append({
+                    'year': key[0],
+                    'month': key[1],
+                    'income': float(income['total_amount']) if income else 0.0,
+                    'expense': float(expense['total_amount']) if expense else 0.0,
+                    'income_count': income['transaction_count'] if income else 0,
+                    'expense_count': expense['transaction_count'] if expense else 0
+                })
+
+            return {
+                'start': f"{start_year}-{start_month:02d}",
+                'end': f"{year}-{month:02d}",
+                'months': result_months
+            }
+
+        result = cache_service.get_or_compute(
+            'summary_range', user_id, {'year': year, 'month': month, 'months': months}, compute
+        )
+        return jsonify(result), 200
+
+    except Exception as e:
+        safe_print(f"Error in get_summary_range: {safe_str(e)}")
+        return jsonify({'error': safe_str(e)}), 500
+
 @transaction_bp.route('/analytics/categories', methods=['GET'])
 @jwt_required()
 def get_category_spending():
@@ -303,7 +396,10 @@ def get_category_spending():
         start_date = request.args.get('start_date', datetime.now().replace(day=1).date().isoformat())
         end_date = request.args.get('end_date', datetime.now().date().isoformat())
         
-        category_spending = TransactionModel.get_category_spending(user_id, start_date, end_date)
+        category_spending = cache_service.get_or_compute(
+            'category_spending', user_id, {'start_date': start_date, 'end_date': end_date},
+            lambda: TransactionModel.get_category_spending(user_id, start_date, end_date)
+        )
         
         return jsonify({
             'start_date': start_date,
@@ -337,7 +433,7 @@ def get_ai_recommendations():
     """Get AI-powered financial recommendations based on user's spending patterns"""
     try:
         user_id = get_jwt_identity()
-        recommendations = RecommendationService.generate_recommendations(user_id)
+        recommendations = RecommendationService.get_recommendations(user_id)
         return jsonify(recommendations), 200
         
     except Exception as e:
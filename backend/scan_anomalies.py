@@ -0,0 +1,113 @@
+"""
+Nightly anomaly and spike scan across all users
+
+Scores every user's recent transactions and category spending (see
+services/anomaly_scan.py) and writes the findings to notifications_232143.
+Progress is checkpointed per chunk in anomaly_scan_checkpoints_232143:
+rerunning with the same --scan-id (default: today's date) resumes where an
+interrupted run stopped. Requires migrations/add_anomaly_scan.py.
+
+Usage:
+    python scan_anomalies.py                          # one process
+    python scan_anomalies.py --workers 4              # 4 shards, one process each
+    python scan_anomalies.py --shard 2 --shards 8     # one shard of a scan split across machines
+"""
+
+import argparse
+import multiprocessing
+import signal
+import sys
+from datetime import date
+from app import create_app
+from rebuild_rollups import connect
+from services import anomaly_scan
+
+def run_shard(shard, shard_count, options):
+    """Scan one shard in this process; returns True if it finished"""
+    stopping = {'requested': False}
+
+    def request_stop(signum, frame):
+        print(f"🛑 Stop requested, shard {shard} finishing current chunk...")
+        stopping['requested'] = True
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    app = create_app()
+    # Dedicated connection for the server-side user cursor; scoring and
+    # writes go through the app's pooled connection
+    reader = connect()
+    reader.readonly = True
+    try:
+        with app.app_context():
+            checkpoint = anomaly_scan.scan_shard(
+                reader,
+                options['scan_id'],
+                shard=shard,
+                shard_count=shard_count,
+                chunk_size=options['chunk_size'],
+                since_days=options['since_days'],
+                spike_days=options['spike_days'],
+                spike_periods=options['spike_periods'],
+                should_stop=lambda: stopping['requested']
+            )
+        return checkpoint['finished_at_232143'] is not None
+    finally:
+        reader.close()
+
+def _shard_process(shard, shard_count, options):
+    sys.exit(0 if run_shard(shard, shard_count, options) else 1)
+
+def main():
+    parser = argparse.ArgumentParser(description='Scan all users for anomalies and spending spikes')
+    parser.add_argument('--scan-id', default=date.today().isoformat(),
+                        help='Run identifier; reuse it to resume (default: today)')
+    parser.add_argument('--workers', type=int, default=1, help='Processes, one shard each (default: 1)')
+    parser.add_argument('--shard', type=int, help='Run only this shard (with --shards)')
+    parser.add_argument('--shards', type=int, help='Total shards when using --shard')
+    parser.add_argument('--chunk-size', type=int, default=500, help='Users per grouped query (default: 500)')
+    parser.add_argument('--since-days', type=int,
+                        help='Report anomalous transactions from the last N days (default: all 90 scored)')
+    parser.add_argument('--spike-days', type=int, default=30, help='Spike period length in days (default: 30)')
+    parser.add_argument('--spike-periods', type=int, default=6,
+                        help='Earlier periods in the spike baseline (default: 6)')
+    args = parser.parse_args()
+
+    options = {
+        'scan_id': args.scan_id,
+        'chunk_size': args.chunk_size,
+        'since_days': args.since_days,
+        'spike_days': args.spike_days,
+        'spike_periods': args.spike_periods,
+    }
+
+    if args.shard is not None:
+        if not args.shards or not 0 <= args.shard < args.shards:
+            parser.error('--shard needs --shards and must be between 0 and shards - 1')
+        finished = [run_shard(args.shard, args.shards, options)]
+    elif args.workers > 1:
+        # Workers stop on their own signals after their current chunk; the
+        # parent just waits for them
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        # spawn: each worker builds its own app and connection pool
+        context = multiprocessing.get_context('spawn')
+        workers = [
+            context.Process(target=_shard_process, args=(shard, args.workers, options))
+            for shard in range(args.workers)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        finished = [worker.exitcode == 0 for worker in workers]
+    else:
+        finished = [run_shard(0, 1, options)]
+
+    if not all(finished):
+        print(f"⚠️ Scan {args.scan_id} incomplete; rerun with --scan-id {args.scan_id} to resume")
+        sys.exit(1)
+    print(f"✅ Scan {args.scan_id} complete")
+
+if __name__ == '__main__':
+    main()
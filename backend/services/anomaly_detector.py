@@ -1,66 +1,41 @@
-import numpy as np
 from datetime import datetime, timedelta
+import config
+from models.category_model import CategoryModel
+from models.category_stats_model import CategoryStatsModel
+from models.notification_model import NotificationModel
 from models.transaction_model import TransactionModel
 
 class AnomalyDetector:
     """Service for detecting anomalous transactions and spending patterns"""
     
     @staticmethod
-    def detect_fraud(user_id, transactions=None, z_score_threshold=2.5):
+    def detect_fraud(user_id, transactions=None, z_score_threshold=3.5, days=90):
         """
-        Detect potentially fraudulent transactions using z-score analysis
+        Detect unusually large transactions with robust per-category scores
+        
+        Each transaction is compared with the median and MAD of its own type
+        and category over the window (see services/anomaly_engine.py).
         
         Args:
             user_id: The user's ID
-            transactions: Optional list of transactions (if None, fetches recent)
-            z_score_threshold: Z-score threshold for flagging anomalies (default 2.5)
+            transactions: Optional list of transactions (if None, fetches the last `days` days)
+            z_score_threshold: Robust score above which a transaction is flagged (default 3.5)
+            days: Window to fetch when transactions is None
             
         Returns:
-            list: List of flagged transactions with anomaly scores
+            list: List of flagged transactions with anomaly scores, highest first
         """
         try:
             if transactions is None:
-                # Get last 90 days of transactions
-                transactions = TransactionModel.get_recent_transactions(user_id, 90)
+                today = datetime.now().date()
+                transactions = TransactionModel.get_transactions_in_range(
+                    user_id, (today - timedelta(days=days - 1)).isoformat(), today.isoformat()
+                )
             
             if len(transactions) < 5:
                 return []  # Need at least 5 transactions for meaningful analysis
             
-            # Extract amounts
-            amounts = [float(t.get('amount_232143', 0)) for t in transactions]
-            
-            if not amounts:
-                return []
-            
-            # Calculate mean and standard deviation
-            mean = np.mean(amounts)
-            std = np.std(amounts)
-            
-            if std == 0:
-                return []  # No variance, can't detect anomalies
-            
-            # Calculate z-scores
-            anomalies = []
-            for i, transaction in enumerate(transactions):
-                amount = float(transaction.get('amount_232143', 0))
-                z_score = abs((amount - mean) / std)
-                
-                if z_score > z_score_threshold:
-                    anomalies.append({
-                        'transaction_id': transaction.get('id_232143'),
-                        'amount': amount,
-                        'z_score': float(z_score),
-                        'date': transaction.get('transaction_date_232143'),
-                        'description': transaction.get('description_232143'),
-                        'category': transaction.get('category_name', 'Unknown'),
-                        'severity': 'high' if z_score > 3.5 else 'medium',
-                        'reason': f'Amount ({amount:,.0f}) is {z_score:.2f} standard deviations from mean ({mean:,.0f})'
-                    })
-            
-            # Sort by z-score (highest first)
-            anomalies.sort(key=lambda x: x['z_score'], reverse=True)
-            
-            return anomalies
+            return [anomaly for _, anomaly in AnomalyDetector._flag_transactions(transactions, z_score_threshold)]
             
         except Exception as e:
             print(f'Error detecting fraud: {e}')
@@ -69,61 +44,208 @@ class AnomalyDetector:
             return []
     
     @staticmethod
-    def detect_spending_spikes(user_id, days=30):
+    def fraud_for_users(user_ids, z_score_threshold=3.5, days=90, since=None, today=None):
         """
-        Detect sudden spikes in spending by category
+        detect_fraud for many users from one query and one scoring pass
         
         Args:
-            user_id: The user's ID
-            days: Number of days to analyze
+            user_ids: The users to scan
+            z_score_threshold: Robust score above which a transaction is flagged
+            days: Baseline window ending today
+            since: Optional date; only transactions on or after it are reported
+                (older ones still count towards the baseline)
+            today: End of the window (default: today)
             
         Returns:
-            list: Categories with detected spikes
+            dict: user_id -> flagged transactions, highest score first; users without any are absent
+        """
+        today = today or datetime.now().date()
+        transactions = TransactionModel.get_users_transactions_in_range(
+            user_ids, (today - timedelta(days=days - 1)).isoformat(), today.isoformat()
+        )
+        anomalies = {}
+        for transaction, anomaly in AnomalyDetector._flag_transactions(transactions, z_score_threshold):
+            if since is None or transaction['transaction_date_232143'] >= since:
+                anomalies.setdefault(transaction['user_id_232143'], []).append(anomaly)
+        return anomalies
+    
+    @staticmethod
+    def _flag_transactions(transactions, z_score_threshold):
+        """(transaction, anomaly) pairs for the transactions scoring above the threshold, highest first"""
+        if not transactions:
+            return []
+        
+        # numpy is imported here, not at module load, so web workers
+        # that never run anomaly detection don't pay for it
+        import numpy as np
+        from services.anomaly_engine import score_transactions
+        
+        scores, baselines = score_transactions(transactions)
+        # Only unusually large amounts; NaN (too little data) never compares greater
+        flagged = np.flatnonzero(scores > z_score_threshold)
+        flagged = flagged[np.argsort(-scores[flagged], kind='stable')]
+        
+        pairs = []
+        for i in flagged:
+            transaction = transactions[i]
+            amount = float(transaction.get('amount_232143', 0))
+            z_score = float(scores[i])
+            category = transaction.get('category_name', 'Unknown')
+            pairs.append((transaction, {
+                'transaction_id': transaction.get('transaction_id_232143'),
+                'amount': amount,
+                'z_score': z_score,
+                'baseline': float(baselines[i]),
+                'date': transaction.get('transaction_date_232143'),
+                'description': transaction.get('description_232143'),
+                'category': category,
+                'severity': 'high' if z_score > 2 * z_score_threshold else 'medium',
+                'reason': f'Amount ({amount:,.0f}) is {z_score:.1f} robust deviations above the usual {category} amount ({float(baselines[i]):,.0f})'
+            }))
+        return pairs
+    
+    @staticmethod
+    def alert_if_anomalous(transaction_id, transaction_data, stats):
+        """
+        Score a just-created expense against its category's running stats
+        
+        O(1): uses the category_stats_232143 row returned by the insert, with
+        the new amount backed out, so nothing else is read unless it alerts.
+        Expenses more than ANOMALY_ALERT_Z_SCORE standard deviations above
+        the category mean get a spending_insight notification. The user has
+        just entered the transaction, so it is not a security warning.
+        Never raises; an alert failure must not fail the write.
+        
+        Args:
+            transaction_id: The new transaction's ID
+            transaction_data: The dict passed to TransactionModel.create_transaction
+            stats: Row returned by CategoryStatsModel.ADD_SQL
+            
+        Returns:
+            float: the z-score if a notification was raised, else None
         """
         try:
-            now = datetime.now()
-            start_date = (now - timedelta(days=days)).date()
+            if transaction_data.get('type') != 'expense':
+                return None
+            amount = float(transaction_data['amount'])
+            count, mean, std = CategoryStatsModel.prior_stats(stats, amount)
+            if count < config.Config.ANOMALY_ALERT_MIN_COUNT or std <= 0:
+                return None
             
-            # Get category spending for the period
-            category_spending = TransactionModel.get_category_spending(
-                user_id,
-                start_date.isoformat(),
-                now.date().isoformat()
-            )
+            z_score = (amount - mean) / std
+            if z_score < config.Config.ANOMALY_ALERT_Z_SCORE:
+                return None
             
-            if len(category_spending) < 2:
-                return []
+            category = None
+            if transaction_data.get('category_id'):
+                category = CategoryModel.get_category_name(transaction_data['category_id'])
+            category = category or 'Lainnya'
             
-            # Calculate average spending per category
-            total = sum(float(c.get('total_amount', 0)) for c in category_spending)
-            avg_per_category = total / len(category_spending) if category_spending else 0
+            NotificationModel.create_notification(
+                transaction_data['user_id'],
+                'spending_insight',
+                f'Pengeluaran Tidak Biasa: {category}',
+                f'Transaksi Rp {amount:,.0f} ({transaction_data.get("description") or "-"}) jauh di atas '
+                f'rata-rata {category} Anda (Rp {mean:,.0f}).',
+                priority='normal',
+                category='transaction_anomaly',
+                dedupe_key=f'anomaly:{transaction_id}'
+            )
+            return z_score
             
-            spikes = []
-            for category in category_spending:
-                amount = float(category.get('total_amount', 0))
-                name = category.get('category_name', 'Unknown')
-                
-                # Flag if category is 2x the average
-                if amount > avg_per_category * 2 and avg_per_category > 0:
-                    spikes.append({
-                        'category': name,
-                        'amount': amount,
-                        'average': avg_per_category,
-                        'multiplier': amount / avg_per_category if avg_per_category > 0 else 0,
-                        'message': f'{name} spending ({amount:,.0f}) is {amount/avg_per_category:.1f}x the average'
-                    })
+        except Exception as e:
+            print(f'Error scoring new transaction: {e}')
+            return None
+    
+    @staticmethod
+    def detect_spending_spikes(user_id, days=30, snapshot=None, periods=6):
+        """
+        Detect categories spending far more than in the user's own earlier periods
+        
+        Args:
+            user_id: The user's ID
+            days: Length of the current period and of each earlier one
+            snapshot: Optional UserFinancialSnapshot (its date is used as today)
+            periods: Number of earlier periods forming the baseline
             
-            return spikes
+        Returns:
+            list: Categories with detected spikes, largest multiplier first
+        """
+        try:
+            today = snapshot.today if snapshot is not None else None
+            spikes = AnomalyDetector.spending_spikes_for_users([user_id], days, periods, today)
+            return spikes.get(user_id, [])
             
         except Exception as e:
             print(f'Error detecting spending spikes: {e}')
             return []
     
     @staticmethod
-    def flag_anomalies_in_recommendations(user_id):
+    def spending_spikes_for_users(user_ids, days=30, periods=6, today=None):
+        """
+        Spending spikes for any number of users from one grouped query
+        
+        Each (user, category) gets a row of period totals, the current
+        `days` days first and then `periods` earlier ones, zeros included;
+        every row is scored in one pass by anomaly_engine.spike_scores().
+        
+        Returns:
+            dict: user_id -> spikes, largest multiplier first; users without spikes are absent
+        """
+        import numpy as np
+        from services.anomaly_engine import spike_scores
+        
+        today = today or datetime.now().date()
+        rows = TransactionModel.get_category_period_totals(user_ids, today.isoformat(), days, periods)
+        if not rows:
+            return {}
+        
+        keys, categories = {}, []
+        codes = np.empty(len(rows), dtype=np.int64)
+        for i, row in enumerate(rows):
+            key = (row['user_id_232143'], row['category_id'])
+            code = keys.get(key)
+            if code is None:
+                code = keys[key] = len(categories)
+                categories.append(row)
+            codes[i] = code
+        period_index = np.fromiter((row['period'] for row in rows), dtype=np.int64, count=len(rows))
+        totals = np.zeros((len(categories), periods + 1))
+        totals[codes, period_index] = np.fromiter(
+            (float(row['total_amount']) for row in rows), dtype=np.float64, count=len(rows)
+        )
+        
+        flagged, baselines, multipliers, scores = spike_scores(totals[:, 1:], totals[:, 0])
+        
+        spikes = {}
+        for code in np.flatnonzero(flagged):
+            category = categories[code]
+            name = category['category_name']
+            amount = float(totals[code, 0])
+            baseline = float(baselines[code])
+            multiplier = float(multipliers[code])
+            spikes.setdefault(category['user_id_232143'], []).append({
+                'category': name,
+                'category_id': category['category_id'],
+                'amount': amount,
+                'average': baseline,
+                'multiplier': multiplier,
+                'score': float(scores[code]),
+                'message': f'{name} spending ({amount:,.0f}) in the last {days} days is {multiplier:.1f}x your usual ({baseline:,.0f})'
+            })
+        for user_spikes in spikes.values():
+            user_spikes.sort(key=lambda spike: spike['multiplier'], reverse=True)
+        return spikes
+    
+    @staticmethod
+    def flag_anomalies_in_recommendations(user_id, snapshot=None):
         """
         Flag anomalies and return them as recommendation-style alerts
         
+        Args:
+            user_id: The user's ID
+            snapshot: Optional UserFinancialSnapshot shared with other analyzers
+            
         Returns:
             list: Anomaly recommendations
         """
@@ -131,7 +253,8 @@ class AnomalyDetector:
         
         try:
             # Detect fraud
-            fraud_transactions = AnomalyDetector.detect_fraud(user_id)
+            transactions = snapshot.transactions_in_window(90) if snapshot is not None else None
+            fraud_transactions = AnomalyDetector.detect_fraud(user_id, transactions=transactions)
             for fraud in fraud_transactions[:3]:  # Top 3 anomalies
                 recommendations.append({
                     'type': 'warning' if fraud['severity'] == 'medium' else 'danger',
@@ -143,7 +266,7 @@ class AnomalyDetector:
                 })
             
             # Detect spending spikes
-            spikes = AnomalyDetector.detect_spending_spikes(user_id)
+            spikes = AnomalyDetector.detect_spending_spikes(user_id, snapshot=snapshot)
             for spike in spikes[:2]:  # Top 2 spikes
                 recommendations.append({
                     'type': 'alert',
@@ -0,0 +1,132 @@
+"""Robust anomaly scores for transaction amounts, vectorised with NumPy
+
+Each transaction is scored against the other transactions of the same type
+and category in the window, using the median and the median absolute
+deviation (MAD) instead of the mean and standard deviation. One very large
+purchase then cannot inflate its own baseline and hide itself, and an
+income never shifts the baseline of an expense category.
+
+    score = (amount - group median) / (1.4826 * group MAD)
+
+1.4826 scales the MAD to a standard deviation for normal data, so scores
+read like z-scores; 3.5 is the usual cut-off (Iglewicz and Hoaglin).
+Categories with fewer than min_group_size transactions in the window are
+not scored: a monthly bill (rent, insurance) has only a few rows, and
+measuring it against everyday spending of the same type would flag it every
+month. When more than half a group has the same amount (MAD = 0), the mean
+absolute deviation is used instead. Rows carrying user_id_232143 are grouped
+per user as well, so many users can be scored in one call.
+
+All groups are scored at once: values are sorted by (group, amount) and
+each group's median is read at its middle index, so the whole window costs
+two sorts regardless of how many categories there are.
+
+spike_scores() applies the same median/MAD idea across time: a category's
+spending this period against its own earlier periods, for any number of
+(user, category) rows at once.
+"""
+import numpy as np
+
+# MAD -> standard deviation, and mean absolute deviation -> standard
+# deviation, for normally distributed data
+MAD_SCALE = 1.4826
+MEAN_AD_SCALE = 1.2533
+MIN_GROUP_SIZE = 5
+
+# Spending spikes: the current period must be at least SPIKE_MULTIPLIER times
+# the median of the category's earlier periods and SPIKE_MIN_SCORE robust
+# deviations above it, with spending in SPIKE_MIN_HISTORY earlier periods.
+# The spread is floored at SPIKE_SPREAD_FLOOR of the baseline so a perfectly
+# steady category (rent) still tolerates normal variation.
+SPIKE_MULTIPLIER = 2.0
+SPIKE_MIN_SCORE = 3.5
+SPIKE_MIN_HISTORY = 3
+SPIKE_SPREAD_FLOOR = 0.1
+
+def _group_medians(codes, values, group_count):
+    """Median of values per group code, and the group sizes"""
+    counts = np.bincount(codes, minlength=group_count)
+    sorted_values = values[np.lexsort((values, codes))]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    present = counts > 0
+    lower = starts + (counts - 1) // 2
+    upper = starts + counts // 2
+    medians = np.full(group_count, np.nan)
+    medians[present] = (sorted_values[lower[present]] + sorted_values[upper[present]]) / 2
+    return medians, counts
+
+def robust_scores(codes, values):
+    """
+    Median/MAD score of every value against its own group
+
+    Args:
+        codes: Integer group code per value (0..groups-1)
+        values: Amounts, same length
+
+    Returns:
+        tuple: (scores, group medians, group sizes), each aligned with values
+    """
+    group_count = int(codes.max()) + 1
+    medians, counts = _group_medians(codes, values, group_count)
+    deviations = np.abs(values - medians[codes])
+    mads, _ = _group_medians(codes, deviations, group_count)
+    mean_ads = np.bincount(codes, weights=deviations, minlength=group_count) / np.maximum(counts, 1)
+    spread = np.where(mads > 0, MAD_SCALE * mads, MEAN_AD_SCALE * mean_ads)[codes]
+    scores = np.zeros(len(values))
+    np.divide(values - medians[codes], spread, out=scores, where=spread > 0)
+    return scores, medians[codes], counts[codes]
+
+def score_transactions(transactions, min_group_size=MIN_GROUP_SIZE):
+    """
+    Score transaction rows against their own category's baseline
+
+    Args:
+        transactions: Rows with amount_232143, type_232143 and category_id_232143
+            (and optionally user_id_232143)
+        min_group_size: Smallest category that is scored; smaller ones get NaN
+
+    Returns:
+        tuple: (scores, baselines) as arrays aligned with transactions;
+            scores are NaN where there was too little data
+    """
+    if not transactions:
+        return np.zeros(0), np.zeros(0)
+    count = len(transactions)
+    amounts = np.fromiter((float(t.get('amount_232143') or 0) for t in transactions),
+                          dtype=np.float64, count=count)
+    category_keys = {}
+    category_codes = np.fromiter(
+        (category_keys.setdefault(
+            (t.get('user_id_232143'), t.get('type_232143'), t.get('category_id_232143')), len(category_keys)
+         ) for t in transactions),
+        dtype=np.int64, count=count
+    )
+
+    scores, medians, sizes = robust_scores(category_codes, amounts)
+    scores[sizes < min_group_size] = np.nan
+    return scores, medians
+
+def spike_scores(history, current):
+    """
+    Score each row's current period against its own earlier periods
+
+    Args:
+        history: (rows, periods) array of earlier period totals, zeros included
+        current: (rows,) array of current period totals
+
+    Returns:
+        tuple: (flagged, baselines, multipliers, scores), each aligned with rows
+    """
+    baselines = np.median(history, axis=1)
+    mads = np.median(np.abs(history - baselines[:, None]), axis=1)
+    spread = np.maximum(MAD_SCALE * mads, SPIKE_SPREAD_FLOOR * baselines)
+    scores = np.zeros(len(current))
+    np.divide(current - baselines, spread, out=scores, where=spread > 0)
+    multipliers = np.zeros(len(current))
+    np.divide(current, baselines, out=multipliers, where=baselines > 0)
+    flagged = (
+        ((history > 0).sum(axis=1) >= SPIKE_MIN_HISTORY)
+        & (multipliers >= SPIKE_MULTIPLIER)
+        & (scores >= SPIKE_MIN_SCORE)
+    )
+    return flagged, baselines, multipliers, scores
@@ -0,0 +1,143 @@
+"""Nightly anomaly and spike scan across all users
+
+scan_shard() streams one shard's user IDs from a server-side (named) cursor
+and handles them chunk_size at a time: one grouped query fetches the chunk's
+transaction window and one its category period totals, and each is scored
+for every user in the chunk in a single NumPy pass (AnomalyDetector's
+fraud_for_users() and spending_spikes_for_users()). The chunk's
+notifications are bulk-inserted in the same statement that advances the
+shard's checkpoint, so rerunning a scan ID resumes after the last finished
+chunk and never notifies twice.
+
+Users are split into shards by a hash of their ID. Shards are independent,
+so scan_anomalies.py --workers N runs one process per shard; every shard of
+a scan must use the same shard count.
+"""
+import time
+from datetime import date, timedelta
+from models.anomaly_scan_model import AnomalyScanModel
+from services.anomaly_detector import AnomalyDetector
+from utils.encoding_utils import safe_print
+
+def stream_user_ids(reader, shard, shard_count, after_user_id=None, chunk_size=500):
+    """
+    Yield lists of up to chunk_size user IDs of one shard, in ID order
+
+    Args:
+        reader: Dedicated connection outside autocommit; the named cursor
+            lives in its transaction, which is rolled back at the end
+        shard, shard_count: Which hash slice of the users to read
+        after_user_id: Resume after this user ID
+        chunk_size: Rows fetched per round trip
+    """
+    try:
+        with reader.cursor(name=f'anomaly_scan_users_{shard}') as cursor:
+            cursor.itersize = chunk_size
+            cursor.execute("""
+                SELECT user_id_232143 FROM users_232143
+                WHERE (%(after)s::varchar IS NULL OR user_id_232143 > %(after)s)
+                    AND (hashtext(user_id_232143) & 2147483647) %% %(shard_count)s = %(shard)s
+                ORDER BY user_id_232143
+            """, {'after': after_user_id, 'shard': shard, 'shard_count': shard_count})
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                yield [row['user_id_232143'] for row in rows]
+    finally:
+        reader.rollback()
+
+def build_notifications(anomalies, spikes, today, spike_days):
+    """
+    Notification rows for AnomalyScanModel.record_chunk
+
+    Only high-severity anomalies become security alerts; the rest are
+    reported as spending insights. Anomalies are keyed by transaction (the
+    same key as the write-time alert), spikes by category and
+    spike_days-long bucket, so each is notified at most once.
+    """
+    notifications = []
+    for user_id, user_anomalies in anomalies.items():
+        for anomaly in user_anomalies:
+            category = anomaly['category']
+            message = (f'Transaksi Rp {anomaly["amount"]:,.0f} ({anomaly["description"] or "-"}) pada '
+                       f'{anomaly["date"]} jauh di atas biasanya untuk {category} '
+                       f'(Rp {anomaly["baseline"]:,.0f}).')
+            high = anomaly['severity'] == 'high'
+            notifications.append({
+                'user_id': user_id,
+                'type': 'security_alert' if high else 'spending_insight',
+                'title': f'Transaksi Tidak Biasa: {category}'[:255],
+                'message': f'{message} Jika ini bukan Anda, segera periksa akun Anda.' if high else message,
+                'priority': 'high' if high else 'normal',
+                'category': 'transaction_anomaly',
+                'dedupe_key': f'anomaly:{anomaly["transaction_id"]}',
+            })
+    bucket = today.toordinal() // spike_days
+    for user_id, user_spikes in spikes.items():
+        for spike in user_spikes:
+            category = spike['category']
+            notifications.append({
+                'user_id': user_id,
+                'type': 'spending_insight',
+                'title': f'Peningkatan Pengeluaran {category}'[:255],
+                'message': f'Pengeluaran {category} dalam {spike_days} hari terakhir Rp {spike["amount"]:,.0f}, '
+                           f'{spike["multiplier"]:.1f}x dari biasanya (Rp {spike["average"]:,.0f}).',
+                'priority': 'normal',
+                'category': 'spending_spike',
+                'dedupe_key': f'spike:{spike["category_id"]}:{bucket}',
+            })
+    return notifications
+
+def scan_shard(reader, scan_id, shard=0, shard_count=1, chunk_size=500, since_days=None,
+               anomaly_days=90, spike_days=30, spike_periods=6, today=None,
+               should_stop=lambda: False):
+    """
+    Scan one shard, resuming from its checkpoint; must run in an app context
+
+    Args:
+        reader: Connection for the user ID cursor (see stream_user_ids)
+        scan_id: Identifies the run; reuse it to resume
+        shard, shard_count: This process's slice of the users
+        chunk_size: Users per grouped query
+        since_days: Report anomalous transactions dated in the last since_days
+            days (default: the whole anomaly window). Transactions are often
+            logged days after they happened, and each is notified only once
+            (dedupe_key), so the default reports late entries too
+        anomaly_days: Baseline window for transaction scores
+        spike_days, spike_periods: Spike period length and number of earlier periods
+        today: Scan date (default: today)
+        should_stop: Checked after every chunk; the scan can be resumed later
+
+    Returns:
+        dict: The shard's checkpoint row, with finished_at_232143 set if it completed
+    """
+    checkpoint = AnomalyScanModel.start(scan_id, shard, shard_count)
+    if checkpoint['finished_at_232143'] is not None:
+        safe_print(f"✅ Scan {scan_id} shard {shard}/{shard_count} already finished")
+        return checkpoint
+
+    today = today or date.today()
+    since = today - timedelta(days=(since_days or anomaly_days) - 1)
+    after_user_id = checkpoint['last_user_id_232143']
+    if after_user_id:
+        safe_print(f"♻️ Scan {scan_id} shard {shard}/{shard_count} resuming after {after_user_id}")
+
+    started = time.perf_counter()
+    users = created = 0
+    for user_ids in stream_user_ids(reader, shard, shard_count, after_user_id, chunk_size):
+        anomalies = AnomalyDetector.fraud_for_users(user_ids, days=anomaly_days, since=since, today=today)
+        spikes = AnomalyDetector.spending_spikes_for_users(user_ids, spike_days, spike_periods, today)
+        notifications = build_notifications(anomalies, spikes, today, spike_days)
+        created += AnomalyScanModel.record_chunk(scan_id, shard, user_ids[-1], len(user_ids), notifications)
+        users += len(user_ids)
+        safe_print(f"📊 Shard {shard}/{shard_count}: {users} users, {created} notifications "
+                   f"({users / max(time.perf_counter() - started, 1e-9):.0f} users/s)")
+        if should_stop():
+            safe_print(f"🛑 Scan {scan_id} shard {shard}/{shard_count} stopped after {user_ids[-1]}")
+            return AnomalyScanModel.get_checkpoint(scan_id, shard)
+
+    checkpoint = AnomalyScanModel.finish(scan_id, shard)
+    safe_print(f"✅ Scan {scan_id} shard {shard}/{shard_count} done: {checkpoint['users_scanned_232143']} users, "
+               f"{checkpoint['notifications_created_232143']} notifications")
+    return checkpoint
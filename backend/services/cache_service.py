@@ -0,0 +1,264 @@
+"""Per-user cache for analytics results with write-driven invalidation
+
+Entries are keyed by (namespace, user, data version, parameters). Every model
+write calls bump_user_version(), after which the user's old entries are never
+read again - invalidation is exact, the TTL is only a memory bound. The LRU
+backend also drops a user's older-version entries as soon as an entry for a
+newer version is stored; in Redis they simply expire.
+
+The default backend is an in-process LRU per worker, with versions kept in
+user_data_versions_232143 so a write served by one worker invalidates all of
+them. Setting CACHE_REDIS_URL shares both entries and versions through Redis.
+"""
+import hashlib
+import json
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from flask import g, has_app_context
+import config
+from models.database import get_db
+from utils.encoding_utils import safe_print
+
+class LRUBackend:
+    """Bounded in-process store; versions live in the database"""
+
+    name = 'lru'
+
+    def __init__(self, max_entries):
+        self._entries = OrderedDict()
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        # user_id -> {key: version}, to find a user's superseded entries
+        self._user_keys = {}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            value, expires_at, owner = entry
+            if expires_at and expires_at < time.monotonic():
+                self._remove(key, owner)
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def set(self, key, value, ttl, owner=None):
+        """Store a value; owner=(user_id, version) evicts that user's older versions
+
+        Returns the number of superseded entries evicted.
+        """
+        expires_at = time.monotonic() + ttl if ttl else None
+        evicted = 0
+        with self._lock:
+            if owner is not None:
+                user_id, version = owner
+                for old_key, old_version in list(self._user_keys.get(user_id, {}).items()):
+                    if old_version < version:
+                        self._remove(old_key, (user_id, old_version))
+                        evicted += 1
+                self._user_keys.setdefault(user_id, {})[key] = version
+            self._entries[key] = (value, expires_at, owner)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                old_key, (_, _, old_owner) = self._entries.popitem(last=False)
+                self._remove(old_key, old_owner)
+        return evicted
+
+    def _remove(self, key, owner):
+        self._entries.pop(key, None)
+        if owner is not None:
+            user_keys = self._user_keys.get(owner[0])
+            if user_keys is not None:
+                user_keys.pop(key, None)
+                if not user_keys:
+                    del self._user_keys[owner[0]]
+
+    def size(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get_version(self, user_id):
+        db = get_db()
+        with db.cursor() as cursor:
+            cursor.execute(
+                "SELECT version_232143 FROM user_data_versions_232143 WHERE user_id_232143 = %s",
+                (user_id,)
+            )
+            row = cursor.fetchone()
+            return row['version_232143'] if row else 0
+
+    def bump_version(self, user_id):
+        db = get_db()
+        with db.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO user_data_versions_232143 AS v (user_id_232143, version_232143)
+                VALUES (%s, 1)
+                ON CONFLICT (user_id_232143) DO UPDATE
+                SET version_232143 = v.version_232143 + 1,
+                    updated_at_232143 = CURRENT_TIMESTAMP
+                RETURNING version_232143
+            """, (user_id,))
+            version = cursor.fetchone()['version_232143']
+        db.commit()
+        return version
+
+class RedisBackend:
+    """Shared store for all workers and instances (requires the redis package)"""
+
+    name = 'redis'
+
+    def __init__(self, url):
+        import redis  # Optional dependency, only needed when CACHE_REDIS_URL is set
+        self._client = redis.Redis.from_url(url)
+        self._client.ping()
+
+    def get(self, key):
+        raw = self._client.get(key)
+        if raw is None:
+            return False, None
+        return True, pickle.loads(raw)
+
+    def set(self, key, value, ttl, owner=None):
+        # Older versions are unreachable once bumped and expire by TTL
+        self._client.set(key, pickle.dumps(value), ex=int(ttl) if ttl else None)
+        return 0
+
+    def size(self):
+        return None
+
+    def get_version(self, user_id):
+        return int(self._client.get(f'cache:version:{user_id}') or 0)
+
+    def bump_version(self, user_id):
+        return self._client.incr(f'cache:version:{user_id}')
+
+_backend = None
+_backend_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'bypassed': 0, 'errors': 0, 'invalidations': 0, 'evictions': 0}
+_namespace_stats = {}
+
+def _record(name, namespace=None, amount=1):
+    with _stats_lock:
+        _stats[name] += amount
+        if namespace is not None:
+            counters = _namespace_stats.setdefault(namespace, {'hits': 0, 'misses': 0})
+            counters[name] += amount
+
+def _get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _create_backend()
+    return _backend
+
+def _create_backend():
+    url = config.Config.CACHE_REDIS_URL
+    if url:
+        try:
+            backend = RedisBackend(url)
+            safe_print("✅ Analytics cache using Redis")
+            return backend
+        except Exception as e:
+            safe_print(f"⚠️ Redis cache unavailable ({e}), falling back to in-process LRU")
+    return LRUBackend(config.Config.CACHE_MAX_ENTRIES)
+
+def _make_key(namespace, user_id, version, params):
+    digest = hashlib.sha1(
+        json.dumps(params, sort_keys=True, default=str).encode('utf-8')
+    ).hexdigest()[:16]
+    return f'cache:{namespace}:{user_id}:{version}:{digest}'
+
+def get_user_version(user_id):
+    """Current data version for a user, read at most once per request"""
+    versions = g.setdefault('cache_versions', {}) if has_app_context() else {}
+    if user_id not in versions:
+        versions[user_id] = _get_backend().get_version(user_id)
+    return versions[user_id]
+
+def try_get_user_version(user_id):
+    """get_user_version(), or None when caching is off or the versions can't be read"""
+    if not config.Config.CACHE_ENABLED:
+        return None
+    try:
+        return get_user_version(user_id)
+    except Exception as e:
+        _record('errors')
+        safe_print(f"⚠️ Could not read cache version for user {user_id}: {e}")
+        return None
+
+def bump_user_version(user_id):
+    """Invalidate every cached result for a user
+
+    Call after the write has been committed, so any request that sees the
+    new version also sees the new data.
+    """
+    if not config.Config.CACHE_ENABLED or not user_id:
+        return
+    try:
+        version = _get_backend().bump_version(user_id)
+        _record('invalidations')
+        if has_app_context():
+            g.setdefault('cache_versions', {})[user_id] = version
+    except Exception as e:
+        # The write itself has already succeeded; stale entries expire by TTL
+        _record('errors')
+        safe_print(f"⚠️ Could not bump cache version for user {user_id}: {e}")
+
+def get_or_compute(namespace, user_id, params, compute, ttl=None):
+    """Return the cached result for (namespace, user, params) or compute and store it
+
+    The version is read before computing: if a write lands mid-computation
+    the result is stored under the old version and is never served again.
+    Cached values are shared, so callers must not mutate them.
+    """
+    if not config.Config.CACHE_ENABLED:
+        return compute()
+
+    backend = _get_backend()
+    try:
+        version = get_user_version(user_id)
+        key = _make_key(namespace, user_id, version, params)
+        hit, value = backend.get(key)
+    except Exception as e:
+        _record('errors')
+        _record('bypassed')
+        safe_print(f"⚠️ Cache lookup failed for {namespace}: {e}")
+        return compute()
+
+    if hit:
+        _record('hits', namespace)
+        return value
+
+    _record('misses', namespace)
+    value = compute()
+    try:
+        evicted = backend.set(
+            key, value, ttl if ttl is not None else config.Config.CACHE_TTL_SECONDS,
+            owner=(user_id, version)
+        )
+        if evicted:
+            _record('evictions', amount=evicted)
+    except Exception as e:
+        _record('errors')
+        safe_print(f"⚠️ Cache store failed for {namespace}: {e}")
+    return value
+
+def get_cache_stats():
+    """Hit/miss counters for this worker process"""
+    with _stats_lock:
+        stats = dict(_stats)
+        namespaces = {name: dict(counters) for name, counters in _namespace_stats.items()}
+    for counters in [stats] + list(namespaces.values()):
+        lookups = counters['hits'] + counters['misses']
+        counters['hit_rate'] = round(counters['hits'] / lookups, 4) if lookups else None
+    stats['namespaces'] = namespaces
+    stats['enabled'] = config.Config.CACHE_ENABLED
+    if _backend is not None:
+        stats['backend'] = _backend.name
+        stats['entries'] = _backend.size()
+    return stats
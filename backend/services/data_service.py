@@ -0,0 +1,365 @@
+from models.transaction_model import TransactionModel
+from models.budget_model import BudgetModel
+from models.goal_model import GoalModel
+from models.category_model import CategoryModel
+from models.obligation_model import ObligationModel
+from models.user_model import UserModel
+from models.export_model import ExportModel
+from datetime import datetime
+import json
+import config
+
+class DataService:
+    """Backup export/import shared by /data routes and the job worker"""
+
+    @staticmethod
+    def export_user_data(user_id):
+        """
+        Build the JSON backup of all user data
+
+        Returns:
+            dict: the export document, or None if the user does not exist
+        """
+        # Get user profile
+        user = UserModel.get_user_by_id(user_id)
+        if not user:
+            return None
+
+        # Get all user data
+        transactions = TransactionModel.get_user_transactions(user_id)
+        budgets = BudgetModel.get_user_budgets(user_id)
+        goals = GoalModel.get_user_goals(user_id)
+        categories = CategoryModel.get_user_categories(user_id)
+        obligations = ObligationModel.get_user_obligations(user_id)
+
+        # Format the export data
+        return {
+            'version': '1.0',
+            'exported_at': datetime.now().isoformat(),
+            'user': _format_user(user),
+            'transactions': _format_transactions(transactions),
+            'budgets': _format_budgets(budgets),
+            'goals': _format_goals(goals),
+            'categories': _format_categories(categories),
+            'obligations': _format_obligations(obligations),
+            'stats': {
+                'total_transactions': len(transactions),
+                'total_budgets': len(budgets),
+                'total_goals': len(goals),
+                'total_categories': len(categories),
+                'total_obligations': len(obligations),
+            }
+        }
+
+    @staticmethod
+    def stream_user_export(user_id, chunk_size=None):
+        """
+        The same backup as NDJSON, read section by section through server-side cursors
+
+        Memory stays at one chunk of rows however long the history is. The
+        first line holds the version and profile, then each record is one
+        {"section": ..., "data": ...} line, sections in import order, and the
+        last line holds the stats; a stream without it was cut short.
+
+        Returns:
+            generator of str: NDJSON text, one chunk of records at a time,
+            or None if the user does not exist
+        """
+        user = UserModel.get_user_by_id(user_id)
+        if not user:
+            return None
+        chunk_size = chunk_size or config.Config.EXPORT_STREAM_CHUNK_SIZE
+
+        def generate():
+            yield _ndjson_line({
+                'section': 'export',
+                'version': '1.0',
+                'exported_at': datetime.now().isoformat(),
+                'user': _format_user(user),
+            })
+            stats = {f'total_{section}': 0 for section in _EXPORT_FORMATTERS}
+            for section, rows in ExportModel.stream_sections(user_id, _EXPORT_FORMATTERS, chunk_size):
+                records = _EXPORT_FORMATTERS[section](rows)
+                stats[f'total_{section}'] += len(records)
+                yield ''.join(_ndjson_line({'section': section, 'data': record}) for record in records)
+            yield _ndjson_line({'section': 'stats', 'data': stats})
+
+        return generate()
+
+    @staticmethod
+    def parse_ndjson_export(lines):
+        """
+        Rebuild the JSON backup document from a stream_user_export NDJSON stream
+
+        Records are grouped by section. The header must come first and the
+        stats record last, and the per-section counts must match it, so a
+        truncated or spliced stream is rejected rather than half imported.
+
+        Args:
+            lines: Iterable of NDJSON lines (str or bytes)
+
+        Returns:
+            dict: the same document export_user_data builds, for import_user_data
+
+        Raises:
+            ValueError: the stream is malformed or incomplete
+        """
+        data = None
+        stats = None
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                raise ValueError(f'Line {number} is not valid JSON')
+            section = record.get('section') if isinstance(record, dict) else None
+            if stats is not None:
+                raise ValueError(f'Line {number} follows the stats record')
+            if data is None:
+                if section != 'export' or 'version' not in record:
+                    raise ValueError('Invalid export format - missing version')
+                data = {key: record.get(key) for key in ('version', 'exported_at', 'user')}
+                data.update({name: [] for name in _EXPORT_FORMATTERS})
+            elif section in _EXPORT_FORMATTERS:
+                data[section].append(record.get('data'))
+            elif section == 'stats':
+                stats = record.get('data') or {}
+            elif section == 'error':
+                raise ValueError('The export failed part-way and is incomplete')
+            else:
+                raise ValueError(f'Line {number} has unknown section: {section}')
+
+        if data is None:
+            raise ValueError('Invalid export format - missing version')
+        if stats is None:
+            raise ValueError('The export is incomplete (no stats record)')
+        for name in _EXPORT_FORMATTERS:
+            if stats.get(f'total_{name}') != len(data[name]):
+                raise ValueError(f'The export is incomplete ({name} count does not match its stats)')
+        data['stats'] = stats
+        return data
+
+    @staticmethod
+    def import_user_data(user_id, data, replace_mode=False):
+        """
+        Import a JSON backup produced by export_user_data (or an NDJSON one
+        read back with parse_ndjson_export)
+
+        Returns:
+            dict: number of imported items per section
+        """
+        imported_counts = {
+            'transactions': 0,
+            'budgets': 0,
+            'goals': 0,
+            'categories': 0,
+            'obligations': 0,
+        }
+
+        # Import categories first (other data depends on them)
+        if 'categories' in data:
+            imported_counts['categories'] = _import_categories(user_id, data['categories'], replace_mode)
+
+        # Import budgets
+        if 'budgets' in data:
+            imported_counts['budgets'] = _import_budgets(user_id, data['budgets'], replace_mode)
+
+        # Import goals
+        if 'goals' in data:
+            imported_counts['goals'] = _import_goals(user_id, data['goals'], replace_mode)
+
+        # Import transactions
+        if 'transactions' in data:
+            imported_counts['transactions'] = _import_transactions(user_id, data['transactions'], replace_mode)
+
+        # Import obligations
+        if 'obligations' in data:
+            imported_counts['obligations'] = _import_obligations(user_id, data['obligations'], replace_mode)
+
+        return imported_counts
+
+
+# Helper functions for formatting export data
+def _format_user(user):
+    return {
+        'email': user['email_232143'],
+        'full_name': user['full_name_232143'],
+        'phone_number': user['phone_number_232143'],
+        'currency': user['currency_232143'],
+    }
+
+
+def _format_transactions(transactions):
+    formatted = []
+    for t in transactions:
+        formatted.append({
+            'amount': float(t['amount_232143']),
+            'type': t['type_232143'],
+            'category_id': t['category_id_232143'],
+            'description': t['description_232143'],
+            'payment_method': t['payment_method_232143'],
+            'transaction_date': t['transaction_date_232143'].isoformat() if t['transaction_date_232143'] else None,
+            'location_data': t['location_data_232143'],
+        })
+    return formatted
+
+
+def _format_budgets(budgets):
+    formatted = []
+    for b in budgets:
+        formatted.append({
+            'category_id': b['category_id_232143'],
+            'limit_amount': float(b['limit_amount_232143']),
+            'period_start': b['period_start_232143'].isoformat() if b['period_start_232143'] else None,
+            'period_end': b['period_end_232143'].isoformat() if b['period_end_232143'] else None,
+            'is_active': bool(b['is_active_232143']),
+        })
+    return formatted
+
+
+def _format_goals(goals):
+    formatted = []
+    for g in goals:
+        formatted.append({
+            'name': g['name_232143'],
+            'target_amount': float(g['target_amount_232143']),
+            'current_amount': float(g['current_amount_232143']),
+            'target_date': g['target_date_232143'].isoformat() if g['target_date_232143'] else None,
+            'goal_type': g['goal_type_232143'],
+            'description': g['description_232143'],
+        })
+    return formatted
+
+
+def _format_categories(categories):
+    formatted = []
+    for c in categories:
+        # Only export user-created categories, not system defaults
+        if not c.get('is_system_default_232143'):
+            formatted.append({
+                'name': c['name_232143'],
+                'type': c['type_232143'],
+                'color': c['color_232143'],
+                'icon': c['icon_232143'],
+            })
+    return formatted
+
+
+def _format_obligations(obligations):
+    formatted = []
+    for o in obligations:
+        formatted.append({
+            'name': o['name_232143'],
+            'amount': float(o['amount_232143']),
+            'due_date': o['due_date_232143'].isoformat() if o['due_date_232143'] else None,
+            'frequency': o['frequency_232143'],
+            'category': o['category_232143'],
+            'is_paid': bool(o['is_paid_232143']),
+        })
+    return formatted
+
+
+def _ndjson_line(record):
+    return json.dumps(record, ensure_ascii=False, default=str) + '\n'
+
+
+# Streamed export sections, in import order (categories first)
+_EXPORT_FORMATTERS = {
+    'categories': _format_categories,
+    'budgets': _format_budgets,
+    'goals': _format_goals,
+    'transactions': _format_transactions,
+    'obligations': _format_obligations,
+}
+
+
+# Helper functions for importing data
+def _import_categories(user_id, categories, replace_mode):
+    count = 0
+    for cat in categories:
+        try:
+            CategoryModel.create_category(
+                user_id=user_id,
+                name=cat.get('name'),
+                category_type=cat.get('type', 'expense'),
+                color=cat.get('color', '#8B5FBF'),
+                icon=cat.get('icon', 'shopping_bag')
+            )
+            count += 1
+        except Exception as e:
+            print(f'Error importing category {cat.get("name")}: {e}')
+    return count
+
+
+def _import_budgets(user_id, budgets, replace_mode):
+    count = 0
+    for budget in budgets:
+        try:
+            BudgetModel.create_budget(
+                user_id=user_id,
+                category_id=budget.get('category_id'),
+                limit_amount=budget.get('limit_amount'),
+                period_start=budget.get('period_start'),
+                period_end=budget.get('period_end')
+            )
+            count += 1
+        except Exception as e:
+            print(f'Error importing budget: {e}')
+    return count
+
+
+def _import_goals(user_id, goals, replace_mode):
+    count = 0
+    for goal in goals:
+        try:
+            GoalModel.create_goal(
+                user_id=user_id,
+                name=goal.get('name'),
+                target_amount=goal.get('target_amount'),
+                target_date=goal.get('target_date'),
+                goal_type=goal.get('goal_type', 'savings'),
+                description=goal.get('description', '')
+            )
+            count += 1
+        except Exception as e:
+            print(f'Error importing goal {goal.get("name")}: {e}')
+    return count
+
+
+def _import_transactions(user_id, transactions, replace_mode):
+    count = 0
+    for trans in transactions:
+        try:
+            TransactionModel.create_transaction({
+                'user_id': user_id,
+                'amount': trans.get('amount'),
+                'type': trans.get('type'),
+                'category_id': trans.get('category_id'),
+                'description': trans.get('description'),
+                'payment_method': trans.get('payment_method', 'cash'),
+                'transaction_date': trans.get('transaction_date'),
+                'location_data': trans.get('location_data'),
+            }, check_anomaly=False)
+            count += 1
+        except Exception as e:
+            print(f'Error importing transaction: {e}')
+    return count
+
+
+def _import_obligations(user_id, obligations, replace_mode):
+    count = 0
+    for obl in obligations:
+        try:
+            ObligationModel.create_obligation(
+                user_id=user_id,
+                name=obl.get('name'),
+                amount=obl.get('amount'),
+                due_date=obl.get('due_date'),
+                frequency=obl.get('frequency', 'once'),
+                category=obl.get('category', 'other')
+            )
+            count += 1
+        except Exception as e:
+            print(f'Error importing obligation {obl.get("name")}: {e}')
+        return count
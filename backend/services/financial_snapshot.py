@@ -0,0 +1,126 @@
+"""Per-request view of one user's financial data
+
+RecommendationService runs several analyzers over overlapping data. A
+UserFinancialSnapshot is built once per generate_recommendations() call and
+handed to each of them; every dataset is loaded on first use and memoized, so
+nothing is fetched twice and nothing an analyzer skips is fetched at all.
+"""
+from datetime import date, timedelta
+from models.transaction_model import TransactionModel
+from models.budget_model import BudgetModel
+from models.goal_model import GoalModel
+from services.forecast_service import ForecastService
+
+class UserFinancialSnapshot:
+    """Lazily loaded, memoized datasets for one user"""
+
+    # Daily category totals are loaded once for this many days back from today.
+    # 31 covers both "last 30 days" and "month to date".
+    CATEGORY_WINDOW_DAYS = 31
+    # Recent transactions are loaded at least this deep (the largest limit
+    # the analyzers ask for) so smaller requests are slices of one query
+    RECENT_PREFETCH = 30
+
+    def __init__(self, user_id, today=None):
+        self.user_id = user_id
+        self.today = today or date.today()
+        self._loaded = {}
+
+    def _memo(self, key, loader):
+        if key not in self._loaded:
+            self._loaded[key] = loader()
+        return self._loaded[key]
+
+    def recent_transactions(self, limit):
+        """Latest `limit` transactions, newest first (as get_recent_transactions)
+
+        Smaller limits are served by slicing a larger list already loaded.
+        """
+        loaded = self._loaded.get('recent')
+        if loaded is None or (loaded['limit'] < limit and len(loaded['rows']) >= loaded['limit']):
+            depth = max(limit, self.RECENT_PREFETCH)
+            rows = TransactionModel.get_recent_transactions(self.user_id, depth)
+            loaded = self._loaded['recent'] = {'limit': depth, 'rows': rows}
+        return loaded['rows'][:limit]
+
+    def monthly_summaries(self, start_year, start_month, months):
+        """{(year, month): rows shaped like get_monthly_summary} for a run of months"""
+        def load():
+            summaries = {}
+            year, month = start_year, start_month
+            for _ in range(months):
+                summaries[(year, month)] = []
+                year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+            for row in TransactionModel.get_monthly_summary_range(
+                    self.user_id, start_year, start_month, months):
+                key = (row['month_start'].year, row['month_start'].month)
+                summaries[key].append({
+                    'type_232143': row['type_232143'],
+                    'total_amount': row['total_amount'],
+                    'transaction_count': row['transaction_count']
+                })
+            return summaries
+        return self._memo(('monthly', start_year, start_month, months), load)
+
+    def category_spending(self, start_date, end_date):
+        """Expense totals per category between two dates (as get_category_spending)
+
+        Ranges inside the recent window are summed from one daily query.
+        """
+        start_date, end_date = self._as_date(start_date), self._as_date(end_date)
+        window_start = self.today - timedelta(days=self.CATEGORY_WINDOW_DAYS)
+        if start_date < window_start or end_date > self.today:
+            return self._memo(
+                ('categories', start_date, end_date),
+                lambda: TransactionModel.get_category_spending(
+                    self.user_id, start_date.isoformat(), end_date.isoformat()
+                )
+            )
+
+        daily = self._memo(
+            'daily_categories',
+            lambda: TransactionModel.get_daily_category_spending(
+                self.user_id, window_start.isoformat(), self.today.isoformat()
+            )
+        )
+        totals = {}
+        for row in daily:
+            if not start_date <= row['day'] <= end_date:
+                continue
+            entry = totals.get(row['category_id'])
+            if entry is None:
+                entry = totals[row['category_id']] = {
+                    'category_name': row['category_name'],
+                    'category_color': row['category_color'],
+                    'total_amount': 0,
+                    'transaction_count': 0
+                }
+            entry['total_amount'] += row['total_amount']
+            entry['transaction_count'] += row['transaction_count']
+        return sorted(totals.values(), key=lambda c: c['total_amount'], reverse=True)
+
+    def transactions_in_window(self, days):
+        """Every transaction of the last `days` days up to today, oldest first"""
+        return self._memo(
+            ('window', days),
+            lambda: TransactionModel.get_transactions_in_range(
+                self.user_id, (self.today - timedelta(days=days - 1)).isoformat(), self.today.isoformat()
+            )
+        )
+
+    def daily_expenses(self, days):
+        """Zero-filled daily expense totals ending today (ForecastService.daily_expense_series)"""
+        return self._memo(
+            ('daily_expenses', days),
+            lambda: ForecastService.daily_expense_series(self.user_id, days, self.today)
+        )
+
+    def budgets(self):
+        return self._memo('budgets', lambda: BudgetModel.get_user_budgets(self.user_id))
+
+    def goals(self):
+        return self._memo('goals', lambda: GoalModel.get_user_goals(self.user_id))
+
+    @staticmethod
+    def _as_date(value):
+        return date.fromisoformat(value) if isinstance(value, str) else value
@@ -0,0 +1,159 @@
+"""Holt-Winters expense forecasting in NumPy
+
+The default forecaster for the online path. Prophet needs pandas, Stan and
+seconds of CPU per fit; this needs a few milliseconds and no extra process.
+
+The model is additive exponential smoothing with a damped trend and a weekly
+season (ETS(A,Ad,A)) over the daily expense totals, zero-filled so that days
+without spending count as zero. Smoothing parameters are chosen per series
+by a grid search on one-step-ahead squared error; the grid is evaluated in
+one vectorised pass, every candidate as a column of the same arrays.
+
+Prediction intervals come from the in-sample one-step residuals, widened
+with the horizon as the smoothing recursion propagates errors forward. The
+output rows match services/forecast_fit.py, so callers can use either.
+"""
+from datetime import date, datetime, timedelta
+import numpy as np
+
+SEASON_LENGTH = 7
+# Two-sided 80% interval, Prophet's default interval_width
+INTERVAL_Z = 1.2816
+
+_ALPHAS = (0.05, 0.1, 0.2, 0.3, 0.5)
+_BETAS = (0.0, 0.02, 0.05, 0.1)
+_GAMMAS = (0.0, 0.05, 0.1, 0.2, 0.3)
+_PHIS = (0.8, 0.9, 0.98)
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+def fill_days(points, start, end):
+    """
+    Sum [(date, amount)] per day over start..end (inclusive), zero on days without any
+
+    Points outside the range are dropped.
+    """
+    values = np.zeros((end - start).days + 1)
+    if points:
+        offsets = np.fromiter(((_as_date(d) - start).days for d, _ in points), dtype=np.int64, count=len(points))
+        amounts = np.fromiter((y for _, y in points), dtype=np.float64, count=len(points))
+        inside = (offsets >= 0) & (offsets < len(values))
+        np.add.at(values, offsets[inside], amounts[inside])
+    return values
+
+def daily_series(points):
+    """
+    Sum [(date or ISO string, amount)] per day and fill the gaps with zeros
+
+    Returns:
+        tuple: (first date, np.ndarray of daily totals), or (None, empty array)
+    """
+    points = [(_as_date(d), float(y)) for d, y in points if d]
+    if not points:
+        return None, np.zeros(0)
+    days = [d for d, _ in points]
+    start = min(days)
+    return start, fill_days(points, start, max(days))
+
+def _grid(seasonal):
+    gammas = _GAMMAS if seasonal else (0.0,)
+    alpha, beta, gamma, phi = np.meshgrid(_ALPHAS, _BETAS, gammas, _PHIS, indexing='ij')
+    return alpha.ravel(), beta.ravel(), gamma.ravel(), phi.ravel()
+
+def _fit(y, season_length):
+    """Run the recursion for every grid candidate at once; keep the best by SSE"""
+    n = len(y)
+    seasonal = n >= 2 * season_length
+    m = season_length if seasonal else 1
+    alpha, beta, gamma, phi = _grid(seasonal)
+    candidates = len(alpha)
+
+    # Classical start: level = first season's mean, trend = season-on-season
+    # change, seasonal indices = first season's deviations from its mean
+    first = y[:m] if seasonal else y[:1]
+    level = np.full(candidates, first.mean())
+    if seasonal:
+        trend = np.full(candidates, (y[m:2 * m].mean() - first.mean()) / m)
+        season = np.tile(first - first.mean(), (candidates, 1))
+    else:
+        trend = np.zeros(candidates)
+        season = np.zeros((candidates, 1))
+
+    sse = np.zeros(candidates)
+    for t in range(n):
+        s = t % m
+        damped = phi * trend
+        error = y[t] - (level + damped + season[:, s])
+        if t >= m:
+            sse += error * error
+        new_level = alpha * (y[t] - season[:, s]) + (1 - alpha) * (level + damped)
+        trend = beta * (new_level - level) + (1 - beta) * damped
+        season[:, s] = gamma * (y[t] - new_level) + (1 - gamma) * season[:, s]
+        level = new_level
+
+    best = int(np.argmin(sse))
+    residual_count = max(1, n - m)
+    return {
+        'alpha': float(alpha[best]),
+        'beta': float(beta[best]),
+        'gamma': float(gamma[best]),
+        'phi': float(phi[best]),
+        'level': float(level[best]),
+        'trend': float(trend[best]),
+        # season[:, s] holds the index for days t with t % m == s
+        'season': season[best].copy(),
+        'next_index': n % m,
+        'sigma': float(np.sqrt(sse[best] / residual_count)),
+    }
+
+def holt_winters_forecast(points, periods, season_length=SEASON_LENGTH):
+    """
+    Forecast `periods` days past the last observed day
+
+    Args:
+        points: [(date or ISO string, amount)]; amounts on the same day are summed
+        periods: Number of future days to return
+        season_length: Days per season (7 for weekly)
+
+    Returns:
+        list: {'ds', 'yhat', 'yhat_lower', 'yhat_upper'} for each future day
+    """
+    start, y = daily_series(points)
+    if start is None:
+        return []
+    if len(y) < 2:
+        level, sigma = float(y.mean()), float(y.mean())
+        mean = np.full(periods, level)
+        half_width = np.full(periods, INTERVAL_Z * sigma)
+    else:
+        fit = _fit(y, season_length)
+        m = len(fit['season'])
+        h = np.arange(1, periods + 1)
+        # phi + phi^2 + ... + phi^h
+        damping = np.cumsum(fit['phi'] ** h)
+        season = fit['season'][(fit['next_index'] + h - 1) % m]
+        mean = fit['level'] + damping * fit['trend'] + season
+
+        # Forecast variance: sigma^2 * (1 + sum over j < h of c_j^2)
+        c = fit['alpha'] * (1 + fit['beta'] * damping[:-1])
+        if m > 1:
+            c = c + fit['gamma'] * (1 - fit['alpha']) * (h[:-1] % m == 0)
+        variance = np.concatenate(([1.0], 1 + np.cumsum(c * c)))
+        half_width = INTERVAL_Z * fit['sigma'] * np.sqrt(variance)
+
+    # Spending is never negative
+    yhat = np.maximum(mean, 0)
+    lower = np.maximum(mean - half_width, 0)
+    upper = np.maximum(mean + half_width, 0)
+    last = datetime.combine(start, datetime.min.time()) + timedelta(days=len(y) - 1)
+    return [{
+        'ds': last + timedelta(days=i + 1),
+        'yhat': float(yhat[i]),
+        'yhat_lower': float(lower[i]),
+        'yhat_upper': float(upper[i]),
+    } for i in range(periods)]
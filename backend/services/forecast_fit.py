@@ -0,0 +1,56 @@
+"""Prophet fit executed inside the forecast pool's processes
+
+Kept apart from forecast_pool so a pool process only imports pandas and
+Prophet, not the Flask app or the database layer.
+"""
+
+def serve(conn):
+    """
+    Pool process main loop: import Prophet, report ready, then fit requests
+
+    Each request is (points, periods, prophet_kwargs) and is answered with
+    ('ok', rows) or ('error', exception). Returns when the parent closes
+    its end of the pipe.
+    """
+    try:
+        import pandas  # noqa: F401
+        import prophet  # noqa: F401
+    except Exception as e:
+        conn.send(('error', e))
+        return
+    conn.send(('ready', None))
+    while True:
+        try:
+            points, periods, prophet_kwargs = conn.recv()
+        except EOFError:
+            return
+        try:
+            conn.send(('ok', fit_and_predict(points, periods, prophet_kwargs)))
+        except Exception as e:
+            try:
+                conn.send(('error', e))
+            except Exception:
+                # The exception itself did not pickle
+                conn.send(('error', RuntimeError(f'{type(e).__name__}: {e}')))
+
+def fit_and_predict(points, periods, prophet_kwargs):
+    """Runs in the pool process: fit on [(iso_ds, y)] and return the last `periods` rows"""
+    import logging
+    import pandas as pd
+    from prophet import Prophet
+
+    logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
+    df = pd.DataFrame(points, columns=['ds', 'y'])
+    df['ds'] = pd.to_datetime(df['ds'])
+    # Sum amounts sharing a timestamp (per day for date-only input)
+    df_daily = df.sort_values('ds').groupby('ds')['y'].sum().reset_index()
+    m = Prophet(**prophet_kwargs)
+    m.fit(df_daily)
+    future = m.make_future_dataframe(periods=periods)
+    forecast = m.predict(future).tail(periods)
+    return [{
+        'ds': row.ds.to_pydatetime(),
+        'yhat': float(row.yhat),
+        'yhat_lower': float(row.yhat_lower),
+        'yhat_upper': float(row.yhat_upper),
+    } for row in forecast.itertuples()]
@@ -0,0 +1,191 @@
+"""Prophet model fitting in separate, reusable processes
+
+A Prophet fit takes seconds of CPU. Run inline, it holds one of the few
+request threads (and the GIL) for all of that time. forecast() sends the fit
+to a spawned fit process instead (services/forecast_fit.serve), with three
+guards:
+
+- each caller checks out a process of its own, at most FORECAST_POOL_WORKERS
+  per web/worker process; past that ForecastUnavailable is raised at once,
+  so no fit ever waits in a queue
+- the FORECAST_FIT_TIMEOUT_SECONDS clock starts once the process has spawned
+  and imported Prophet; a fit that overruns is cancelled by terminating
+  that caller's process only, and a new one is spawned on next use
+- a crashed process raises ForecastUnavailable rather than a 500
+
+Idle processes stay warm for the next fit. Callers catch ForecastUnavailable
+and fall back to their cheap estimator.
+"""
+import atexit
+import hashlib
+import importlib.util
+import json
+import multiprocessing
+import threading
+import config
+from services import cache_service
+from services.forecast_fit import serve
+from utils.encoding_utils import safe_print
+
+# Spawning a process and importing pandas and Prophet; not part of the fit timeout
+_STARTUP_TIMEOUT_SECONDS = 120
+
+class ForecastUnavailable(RuntimeError):
+    """The pool is saturated, the fit timed out, or the fit process died"""
+
+class _FitProcess:
+    """One spawned fit process and its end of the pipe"""
+
+    def __init__(self):
+        # spawn: children must not inherit the parent's DB connections or locks
+        context = multiprocessing.get_context('spawn')
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=serve, args=(child_conn,), name='forecast-fit', daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+
+    def _receive(self, timeout):
+        if not self.conn.poll(timeout):
+            raise TimeoutError
+        return self.conn.recv()
+
+    def wait_ready(self):
+        if not self.ready:
+            status, value = self._receive(_STARTUP_TIMEOUT_SECONDS)
+            if status != 'ready':
+                raise value
+            self.ready = True
+
+    def fit(self, points, periods, prophet_kwargs, timeout):
+        self.conn.send((points, periods, prophet_kwargs))
+        return self._receive(timeout)
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join(timeout=1)
+        self.conn.close()
+
+_idle = []
+_idle_lock = threading.Lock()
+_slots = None
+_stats_lock = threading.Lock()
+_stats = {'fits': 0, 'saturated': 0, 'timeouts': 0, 'failures': 0}
+
+def _record(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+def is_available():
+    """True if Prophet is installed (checked without importing it)"""
+    return importlib.util.find_spec('prophet') is not None
+
+def _get_slots():
+    global _slots
+    if _slots is None:
+        with _idle_lock:
+            if _slots is None:
+                _slots = threading.BoundedSemaphore(max(1, config.Config.FORECAST_POOL_WORKERS))
+    return _slots
+
+def _checkout():
+    with _idle_lock:
+        if _idle:
+            return _idle.pop()
+    return _FitProcess()
+
+def _checkin(worker):
+    with _idle_lock:
+        _idle.append(worker)
+
+def forecast(points, periods, **prophet_kwargs):
+    """
+    Fit Prophet on a series in a fit process and forecast `periods` days ahead
+
+    Args:
+        points: [(date or ISO string, amount)]; amounts on the same ds are summed
+        periods: Number of future days to return
+        prophet_kwargs: Passed to Prophet()
+
+    Returns:
+        list: {'ds', 'yhat', 'yhat_lower', 'yhat_upper'} for each future day
+
+    Raises:
+        ImportError: Prophet is not installed
+        ForecastUnavailable: saturated, timed out or crashed
+    """
+    if not is_available():
+        raise ImportError('prophet is not installed')
+
+    slots = _get_slots()
+    if not slots.acquire(blocking=False):
+        _record('saturated')
+        raise ForecastUnavailable('Forecast pool is busy')
+    try:
+        points = [(d if isinstance(d, str) else d.isoformat(), float(y)) for d, y in points if d]
+        worker = _checkout()
+        try:
+            worker.wait_ready()
+            status, value = worker.fit(points, periods, prophet_kwargs, config.Config.FORECAST_FIT_TIMEOUT_SECONDS)
+        except TimeoutError:
+            _record('timeouts')
+            worker.kill()
+            safe_print(f"⚠️ Prophet fit exceeded {config.Config.FORECAST_FIT_TIMEOUT_SECONDS}s, cancelled")
+            raise ForecastUnavailable('Forecast timed out')
+        except Exception as e:
+            # Startup failed, or the process died (EOFError/OSError on the pipe)
+            _record('failures')
+            worker.kill()
+            raise ForecastUnavailable(f'Forecast process died: {e}')
+        _checkin(worker)
+        if status == 'error':
+            raise value
+        _record('fits')
+        return value
+    finally:
+        slots.release()
+
+def _fingerprint(points, periods, prophet_kwargs):
+    """Stable digest of the fit inputs; the same series in any order matches"""
+    canonical = json.dumps(
+        [sorted(points), periods, sorted(prophet_kwargs.items())],
+        separators=(',', ':')
+    )
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+def cached_forecast(user_id, points, periods, **prophet_kwargs):
+    """
+    forecast() through the analytics cache, keyed by user, horizon and series
+
+    Repeat requests for an unchanged series (the forecast screen reopened,
+    a recommendation refresh) reuse the stored output instead of refitting.
+    Entries also carry the user's data version, so any write retires them.
+    Failures (ForecastUnavailable, ImportError) are not cached.
+    """
+    points = [(d if isinstance(d, str) else d.isoformat(), float(y)) for d, y in points if d]
+    params = {
+        'horizon': periods,
+        'series': _fingerprint(points, periods, prophet_kwargs),
+    }
+    return cache_service.get_or_compute(
+        'forecast', user_id, params,
+        lambda: forecast(points, periods, **prophet_kwargs)
+    )
+
+def get_forecast_pool_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['pool_workers'] = config.Config.FORECAST_POOL_WORKERS
+    stats['timeout_seconds'] = config.Config.FORECAST_FIT_TIMEOUT_SECONDS
+    with _idle_lock:
+        stats['idle_processes'] = len(_idle)
+    return stats
+
+@atexit.register
+def _shutdown():
+    with _idle_lock:
+        workers = list(_idle)
+        _idle.clear()
+    for worker in workers:
+        worker.kill()
@@ -0,0 +1,136 @@
+from datetime import date, timedelta
+import config
+from models.transaction_model import TransactionModel
+from services import forecast_pool
+from services.forecast_pool import ForecastUnavailable
+
+ENGINES = ('holt_winters', 'prophet')
+
+class InsufficientDataError(ValueError):
+    """Raised when there is too little transaction data to forecast"""
+
+    def __init__(self, error, message=None):
+        super().__init__(message or error)
+        self.error = error
+        self.message = message
+
+class ForecastService:
+    """Expense forecasting shared by /data/forecast and the job worker"""
+
+    # Days of history the forecasts are fitted on
+    HISTORY_DAYS = 90
+
+    @staticmethod
+    def daily_expense_series(user_id, days=HISTORY_DAYS, today=None):
+        """
+        The user's expense total for every day of the last `days` days
+
+        One grouped query returns the days that had spending; the others are
+        filled with zeros. The series starts at the first day with spending
+        in the window (empty days before a new account's first expense are
+        not zeros) and always ends today.
+
+        Returns:
+            list: [(date, amount)] in date order, or [] with no expenses in the window
+        """
+        from services.forecast_engine import fill_days
+
+        today = today or date.today()
+        rows = TransactionModel.get_daily_totals(user_id, today - timedelta(days=days - 1), today)
+        if not rows:
+            return []
+        start = rows[0]['day']
+        totals = fill_days([(row['day'], float(row['total_amount'])) for row in rows], start, today)
+        return [(start + timedelta(days=i), float(amount)) for i, amount in enumerate(totals)]
+
+    @staticmethod
+    def forecast_daily(user_id, points, periods, engine=None, **prophet_kwargs):
+        """
+        Forecast daily totals with the requested (or configured) engine
+
+        'prophet' fits in the forecast pool through the analytics cache and
+        falls back to Holt-Winters when Prophet is missing, busy or too slow.
+
+        Args:
+            user_id: The user's ID (for the forecast cache)
+            points: [(date or ISO string, amount)]
+            periods: Number of future days
+            engine: 'holt_winters' or 'prophet'; defaults to FORECAST_ENGINE
+            prophet_kwargs: Passed to Prophet()
+
+        Returns:
+            tuple: ({'ds', 'yhat', 'yhat_lower', 'yhat_upper'} rows, engine used)
+
+        Raises:
+            ValueError: unknown engine
+        """
+        # The engines (numpy; pandas and Prophet in the pool) load on the first
+        # forecast rather than when the routes import this module
+        from services.forecast_engine import holt_winters_forecast
+
+        engine = engine or config.Config.FORECAST_ENGINE
+        if engine not in ENGINES:
+            raise ValueError(f'Unknown forecast engine: {engine}')
+
+        if engine == 'prophet':
+            try:
+                return forecast_pool.cached_forecast(user_id, points, periods, **prophet_kwargs), 'prophet'
+            except (ImportError, ForecastUnavailable):
+                pass
+        return holt_winters_forecast(points, periods), 'holt_winters'
+
+    @staticmethod
+    def forecast_expenses(user_id, transactions_data=None, engine=None):
+        """
+        Forecast expenses for the next 30 days
+
+        Args:
+            user_id: The user's ID
+            transactions_data: Optional [{'ds', 'y'}] list; defaults to daily_expense_series()
+            engine: Optional engine name, see forecast_daily()
+
+        Returns:
+            dict: forecast (mean/lower/upper daily averages and the daily rows), method and confidence
+
+        Raises:
+            InsufficientDataError: fewer than 7 data points, or none usable
+            ValueError: unknown engine
+        """
+        if transactions_data is None:
+            points = ForecastService.daily_expense_series(user_id)
+            data_points = sum(1 for _, amount in points if amount)
+        else:
+            points = [(t.get('ds'), t.get('y', 0)) for t in transactions_data]
+            data_points = len(points)
+
+        if data_points < 7:
+            raise InsufficientDataError(
+                'Insufficient data',
+                'Need at least 7 days of transaction data for forecasting'
+            )
+
+        daily, method = ForecastService.forecast_daily(
+            user_id,
+            points,
+            30,
+            engine=engine,
+            daily_seasonality=True,
+            weekly_seasonality=True,
+            yearly_seasonality=False,
+            changepoint_prior_scale=0.05
+        )
+        if not daily:
+            raise InsufficientDataError('No valid transaction data')
+
+        # Calculate summary statistics
+        count = len(daily)
+        return {
+            'forecast': {
+                'mean': sum(row['yhat'] for row in daily) / count,
+                'lower': sum(row['yhat_lower'] for row in daily) / count,
+                'upper': sum(row['yhat_upper'] for row in daily) / count,
+                'daily': daily
+            },
+            'method': method,
+            'confidence': 'high'
+        }
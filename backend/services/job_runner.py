@@ -0,0 +1,145 @@
+"""Background jobs on a Postgres queue (jobs_232143)
+
+Web requests enqueue work with enqueue() and return at once; worker.py runs
+run_worker(), which claims jobs with FOR UPDATE SKIP LOCKED, runs the handler
+registered for the job type and stores its JSON result for the client to poll
+through /api/v1/jobs/<job_id>.
+
+Handlers take (user_id, payload) and return a JSON-serializable result. A
+ValueError means the input is bad and fails the job immediately; any other
+exception is retried with exponential backoff until max_attempts is reached.
+"""
+import os
+import socket
+import time
+import config
+from models.job_model import JobModel
+from utils.encoding_utils import safe_print
+
+def _refresh_recommendations(user_id, payload):
+    from services.recommendation_service import RecommendationService
+    recommendations = RecommendationService.refresh_recommendations(user_id)
+    return {'count': len(recommendations)}
+
+def _forecast_expenses(user_id, payload):
+    from services.forecast_service import ForecastService
+    return ForecastService.forecast_expenses(user_id, payload.get('transactions'), payload.get('engine'))
+
+def _import_user_data(user_id, payload):
+    from services.data_service import DataService
+    data = payload.get('data')
+    if not data or 'version' not in data:
+        raise ValueError('Invalid export format - missing version')
+    replace_mode = bool(payload.get('replace', False))
+    return {
+        'message': 'Data imported successfully',
+        'imported': DataService.import_user_data(user_id, data, replace_mode),
+        'mode': 'replace' if replace_mode else 'merge'
+    }
+
+# job type -> handler
+HANDLERS = {
+    'recommendations.refresh': _refresh_recommendations,
+    'data.forecast': _forecast_expenses,
+    'data.import': _import_user_data,
+}
+
+# Job types clients may submit through POST /api/v1/jobs, with their priority
+# (higher runs first). Interactive requests outrank background refreshes.
+USER_JOB_TYPES = {
+    'data.forecast': 10,
+    'data.import': 5,
+}
+
+def enqueue(job_type, user_id=None, payload=None, priority=0, dedupe_key=None, delay_seconds=0):
+    """Queue a job for worker.py and return its row"""
+    if job_type not in HANDLERS:
+        raise ValueError(f'Unknown job type: {job_type}')
+    return JobModel.enqueue(
+        job_type,
+        payload=payload,
+        user_id=user_id,
+        priority=priority,
+        max_attempts=config.Config.JOB_MAX_ATTEMPTS,
+        delay_seconds=delay_seconds,
+        dedupe_key=dedupe_key
+    )
+
+def retry_delay(attempts):
+    """Exponential backoff: base, 2x base, 4x base... capped at one hour"""
+    return min(config.Config.JOB_RETRY_BASE_SECONDS * 2 ** max(0, attempts - 1), 3600)
+
+def run_job(job):
+    """Run one claimed job and record the outcome; returns the final status"""
+    job_id = job['job_id_232143']
+    job_type = job['job_type_232143']
+    handler = HANDLERS.get(job_type)
+    started = time.perf_counter()
+    try:
+        if handler is None:
+            raise ValueError(f'Unknown job type: {job_type}')
+        result = handler(job['user_id_232143'], job['payload_232143'] or {})
+    except ValueError as e:
+        # Bad input will not get better on retry
+        JobModel.mark_failed(job_id, e, 0, permanent=True)
+        safe_print(f"❌ Job {job_id} ({job_type}) rejected: {e}")
+        return 'failed'
+    except Exception as e:
+        status = JobModel.mark_failed(job_id, e, retry_delay(job['attempts_232143']))
+        safe_print(f"⚠️ Job {job_id} ({job_type}) attempt {job['attempts_232143']} failed: {e} -> {status}")
+        return status
+
+    JobModel.mark_succeeded(job_id, result)
+    safe_print(f"✅ Job {job_id} ({job_type}) done in {time.perf_counter() - started:.2f}s")
+    return 'succeeded'
+
+def default_worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+def run_worker(app, worker_id=None, job_types=None, once=False, should_stop=lambda: False):
+    """Claim and run jobs until should_stop() is true (or the queue is empty, with once)
+
+    Each job runs in its own app context so its pooled connection is
+    returned as soon as it finishes. A database error (pool timeout, pooler
+    reset) is logged and the loop backs off before trying again, so a
+    transient outage does not kill the worker; a job it interrupted is
+    requeued by requeue_stale once its lock times out.
+    """
+    worker_id = worker_id or default_worker_id()
+    poll_interval = config.Config.JOB_POLL_INTERVAL_SECONDS
+    last_maintenance = 0.0
+    processed = 0
+    failures = 0
+
+    safe_print(f"👷 Job worker {worker_id} started (types: {', '.join(job_types or HANDLERS)})")
+    while not should_stop():
+        job = None
+        try:
+            with app.app_context():
+                if time.monotonic() - last_maintenance > 60:
+                    requeued = JobModel.requeue_stale(config.Config.JOB_LOCK_TIMEOUT_SECONDS)
+                    if requeued:
+                        safe_print(f"♻️ Requeued {requeued} job(s) abandoned by a stopped worker")
+                    JobModel.delete_finished(config.Config.JOB_RETENTION_DAYS)
+                    last_maintenance = time.monotonic()
+
+                job = JobModel.claim_next(worker_id, job_types)
+                if job is not None:
+                    run_job(job)
+                    processed += 1
+            failures = 0
+        except Exception as e:
+            failures += 1
+            # poll interval, doubling per consecutive failure, capped at a minute
+            delay = min(poll_interval * 2 ** (failures - 1), 60)
+            safe_print(f"⚠️ Job worker {worker_id} error ({failures} in a row), retrying in {delay:g}s: {e}")
+            time.sleep(delay)
+            continue
+
+        if job is None:
+            if once:
+                break
+            time.sleep(poll_interval)
+
+    safe_print(f"👷 Job worker {worker_id} stopped after {processed} job(s)")
+    return processed
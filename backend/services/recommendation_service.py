@@ -1,11 +1,101 @@
+import threading
 from datetime import datetime, timedelta
-from models.transaction_model import TransactionModel
-from models.budget_model import BudgetModel
-from models.goal_model import GoalModel
+from flask import current_app
+import config
+from models.recommendation_model import RecommendationModel
+from services import cache_service
+from services.financial_snapshot import UserFinancialSnapshot
+from services.forecast_service import ForecastService
+from utils.encoding_utils import safe_print
+
+# Users with a background refresh in flight in this process
+_refreshing = set()
+_refreshing_lock = threading.Lock()
 
 class RecommendationService:
     """Service for generating AI-powered financial recommendations"""
     
+    @staticmethod
+    def get_recommendations(user_id):
+        """
+        Return the user's stored recommendations, regenerating them as needed
+        
+        The first request for a user generates synchronously. After that the
+        stored set is always returned at once; when it has expired or was built
+        from an older data version it is returned anyway and a background
+        refresh replaces it (stale-while-revalidate). Without a data version
+        (caching off, or its table not migrated yet) only expiry triggers a
+        refresh.
+        """
+        version = cache_service.try_get_user_version(user_id)
+        stored = RecommendationModel.get_user_recommendations(user_id)
+        if not stored:
+            return RecommendationService.refresh_recommendations(user_id, version)
+        
+        head = stored[0]
+        is_stale = (
+            head['is_expired']
+            or head['model_version'] != config.Config.RECOMMENDATIONS_MODEL_VERSION
+            or (version is not None and (head['data_sources'] or {}).get('data_version') != version)
+        )
+        if is_stale:
+            RecommendationService._refresh_in_background(user_id)
+        return [row['recommendation'] for row in stored]
+    
+    @staticmethod
+    def refresh_recommendations(user_id, version=None):
+        """Generate recommendations now and store them; returns the new set"""
+        # Read the version first: a write during generation leaves the stored
+        # set one version behind, so the next request refreshes again
+        if version is None:
+            version = cache_service.try_get_user_version(user_id)
+        recommendations = RecommendationService.generate_recommendations(user_id)
+        if any(rec.get('type') == 'error' for rec in recommendations):
+            return recommendations  # Keep the previous set rather than store a failure
+        RecommendationModel.replace_user_recommendations(
+            user_id,
+            recommendations,
+            data_version=version,
+            model_version=config.Config.RECOMMENDATIONS_MODEL_VERSION,
+            ttl_hours=config.Config.RECOMMENDATIONS_TTL_HOURS
+        )
+        return recommendations
+    
+    @staticmethod
+    def _refresh_in_background(user_id):
+        """Queue a refresh for worker.py, or run it on a thread when jobs are disabled"""
+        if config.Config.JOBS_ENABLED:
+            try:
+                from services import job_runner
+                # The dedupe key collapses repeated stale reads into one pending job
+                job_runner.enqueue(
+                    'recommendations.refresh',
+                    user_id=user_id,
+                    dedupe_key=f'recommendations.refresh:{user_id}'
+                )
+                return
+            except Exception as e:
+                safe_print(f'⚠️ Could not queue recommendation refresh, using a thread: {e}')
+        
+        # One refresh per user per process, on a daemon thread with its own app context
+        with _refreshing_lock:
+            if user_id in _refreshing:
+                return
+            _refreshing.add(user_id)
+        app = current_app._get_current_object()
+        
+        def run():
+            try:
+                with app.app_context():
+                    RecommendationService.refresh_recommendations(user_id)
+            except Exception as e:
+                safe_print(f'⚠️ Background recommendation refresh failed for {user_id}: {e}')
+            finally:
+                with _refreshing_lock:
+                    _refreshing.discard(user_id)
+        
+        threading.Thread(target=run, name=f'recommendations-{user_id}', daemon=True).start()
+    
     @staticmethod
     def generate_recommendations(user_id, limit=5):
         """
@@ -20,30 +110,32 @@ class RecommendationService:
         """
         try:
             recommendations = []
+            # Every analyzer reads from this, so each dataset is queried once
+            snapshot = UserFinancialSnapshot(user_id)
             
             # 1. Analyze budgets
-            budget_recs = RecommendationService._analyze_budgets(user_id)
+            budget_recs = RecommendationService._analyze_budgets(snapshot)
             recommendations.extend(budget_recs)
             
             # 2. Analyze goals
-            goal_recs = RecommendationService._analyze_goals(user_id)
+            goal_recs = RecommendationService._analyze_goals(snapshot)
             recommendations.extend(goal_recs)
             
             # 3. Analyze spending trends
-            trend_recs = RecommendationService._analyze_trends(user_id)
+            trend_recs = RecommendationService._analyze_trends(snapshot)
             recommendations.extend(trend_recs)
             
             # 4. Analyze savings rate
-            savings_recs = RecommendationService._analyze_savings(user_id)
+            savings_recs = RecommendationService._analyze_savings(snapshot)
             recommendations.extend(savings_recs)
             
             # 5. Detect anomalies (using ML-based anomaly detection)
             from services.anomaly_detector import AnomalyDetector
-            anomaly_recs = AnomalyDetector.flag_anomalies_in_recommendations(user_id)
+            anomaly_recs = AnomalyDetector.flag_anomalies_in_recommendations(user_id, snapshot=snapshot)
             recommendations.extend(anomaly_recs)
             
             # 6. Legacy anomaly detection (fallback)
-            legacy_anomaly_recs = RecommendationService._detect_anomalies(user_id)
+            legacy_anomaly_recs = RecommendationService._detect_anomalies(snapshot)
             recommendations.extend(legacy_anomaly_recs)
             
             # Sort by priority and return top recommendations
@@ -70,11 +162,11 @@ class RecommendationService:
             }]
     
     @staticmethod
-    def _analyze_budgets(user_id):
+    def _analyze_budgets(snapshot):
         """Analyze budget usage and generate alerts"""
         recommendations = []
         try:
-            budgets = BudgetModel.get_user_budgets(user_id)
+            budgets = snapshot.budgets()
             
             for budget in budgets:
                 if not budget.get('is_active_232143'):
@@ -117,11 +209,11 @@ class RecommendationService:
         return recommendations
     
     @staticmethod
-    def _analyze_goals(user_id):
+    def _analyze_goals(snapshot):
         """Analyze financial goals and suggest actions"""
         recommendations = []
         try:
-            goals = GoalModel.get_user_goals(user_id)
+            goals = snapshot.goals()
             
             for goal in goals:
                 if goal.get('is_completed_232143'):
@@ -166,92 +258,62 @@ class RecommendationService:
         return recommendations
     
     @staticmethod
-    def _analyze_trends(user_id):
-        """Analyze spending trends using Prophet ML for better trend detection"""
+    def _analyze_trends(snapshot):
+        """Analyze spending trends with a weekly-seasonal forecast of daily expenses"""
         recommendations = []
         try:
-            # Try to use Prophet for trend analysis
-            try:
-                from prophet import Prophet
-                import pandas as pd
-                import numpy as np
+            # Forecast the next week with the configured engine (Holt-Winters
+            # by default, Prophet when FORECAST_ENGINE asks for it) from the
+            # last 90 days of daily expense totals, zeros included
+            daily = snapshot.daily_expenses(ForecastService.HISTORY_DAYS)
+            
+            # Need at least 2 weeks of history, with some spending in it
+            if len(daily) >= 14 and sum(1 for _, amount in daily if amount) >= 7:
+                # Predict next 7 days
+                forecast, _ = ForecastService.forecast_daily(
+                    snapshot.user_id,
+                    daily,
+                    7,
+                    daily_seasonality=True,
+                    weekly_seasonality=True,
+                    changepoint_prior_scale=0.05
+                )
                 
-                # Get last 90 days of transactions
-                transactions = TransactionModel.get_recent_transactions(user_id, 90)
+                # Get trend direction
+                recent = [amount for _, amount in daily[-7:]]
+                recent_actual = sum(recent) / len(recent)
+                predicted = sum(row['yhat'] for row in forecast) / len(forecast)
                 
-                if len(transactions) >= 14:  # Need at least 2 weeks of data
-                    # Prepare data
-                    expense_data = []
-                    for t in transactions:
-                        if t.get('type_232143') == 'expense':
-                            date = t.get('transaction_date_232143')
-                            if date:
-                                expense_data.append({
-                                    'ds': date,
-                                    'y': float(t.get('amount_232143', 0))
-                                })
-                    
-                    if len(expense_data) >= 14:
-                        df = pd.DataFrame(expense_data)
-                        df['ds'] = pd.to_datetime(df['ds'])
-                        df = df.sort_values('ds')
-                        
-                        # Group by day
-                        df_daily = df.groupby('ds')['y'].sum().reset_index()
-                        df_daily.columns = ['ds', 'y']
-                        
-                        # Fit Prophet model
-                        m = Prophet(
-                            daily_seasonality=True,
-                            weekly_seasonality=True,
-                            changepoint_prior_scale=0.05
-                        )
-                        m.fit(df_daily)
-                        
-                        # Predict next 7 days
-                        future = m.make_future_dataframe(periods=7)
-                        forecast = m.predict(future)
-                        
-                        # Get trend direction
-                        recent_actual = df_daily['y'].tail(7).mean()
-                        predicted = forecast['yhat'].tail(7).mean()
-                        
-                        trend_change = ((predicted - recent_actual) / recent_actual) * 100 if recent_actual > 0 else 0
-                        
-                        if trend_change > 15:
-                            recommendations.append({
-                                'type': 'warning',
-                                'title': 'Prediksi: Pengeluaran Akan Meningkat',
-                                'message': f'Berdasarkan pola pengeluaran, diprediksi akan naik {trend_change:.0f}% dalam 7 hari ke depan. Perhatikan pengeluaran Anda.',
-                                'priority': 8,
-                                'potential_savings': predicted - recent_actual if predicted > recent_actual else 0,
-                                'ml_confidence': 'high'
-                            })
-                        elif trend_change < -10:
-                            recommendations.append({
-                                'type': 'success',
-                                'title': 'Prediksi: Tren Penghematan Positif',
-                                'message': f'Berdasarkan analisis ML, pengeluaran diprediksi turun {abs(trend_change):.0f}% dalam 7 hari ke depan. Pertahankan!',
-                                'priority': 4,
-                                'potential_savings': 0,
-                                'ml_confidence': 'high'
-                            })
-            except ImportError:
-                # Fallback to simple month-over-month comparison
-                pass
+                trend_change = ((predicted - recent_actual) / recent_actual) * 100 if recent_actual > 0 else 0
+                
+                if trend_change > 15:
+                    recommendations.append({
+                        'type': 'warning',
+                        'title': 'Prediksi: Pengeluaran Akan Meningkat',
+                        'message': f'Berdasarkan pola pengeluaran, diprediksi akan naik {trend_change:.0f}% dalam 7 hari ke depan. Perhatikan pengeluaran Anda.',
+                        'priority': 8,
+                        'potential_savings': predicted - recent_actual if predicted > recent_actual else 0,
+                        'ml_confidence': 'high'
+                    })
+                elif trend_change < -10:
+                    recommendations.append({
+                        'type': 'success',
+                        'title': 'Prediksi: Tren Penghematan Positif',
+                        'message': f'Berdasarkan analisis ML, pengeluaran diprediksi turun {abs(trend_change):.0f}% dalam 7 hari ke depan. Pertahankan!',
+                        'priority': 4,
+                        'potential_savings': 0,
+                        'ml_confidence': 'high'
+                    })
             
-            # Fallback: Compare this month vs last month (if Prophet not used)
+            # Fallback: Compare this month vs last month (too little data to forecast)
             if not recommendations:
                 now = datetime.now()
                 this_month_start = now.replace(day=1)
                 last_month_start = (this_month_start - timedelta(days=1)).replace(day=1)
                 
-                this_month_summary = TransactionModel.get_monthly_summary(user_id, now.year, now.month)
-                last_month_summary = TransactionModel.get_monthly_summary(
-                    user_id, 
-                    last_month_start.year, 
-                    last_month_start.month
-                )
+                summaries = snapshot.monthly_summaries(last_month_start.year, last_month_start.month, 2)
+                this_month_summary = summaries[(now.year, now.month)]
+                last_month_summary = summaries[(last_month_start.year, last_month_start.month)]
                 
                 this_expenses = sum(float(s.get('total_amount', 0)) for s in this_month_summary if s.get('type_232143') == 'expense')
                 last_expenses = sum(float(s.get('total_amount', 0)) for s in last_month_summary if s.get('type_232143') == 'expense')
@@ -283,11 +345,11 @@ class RecommendationService:
         return recommendations
     
     @staticmethod
-    def _analyze_savings(user_id):
+    def _analyze_savings(snapshot):
         """Analyze savings rate"""
         recommendations = []
         try:
-            transactions = TransactionModel.get_recent_transactions(user_id, 30)
+            transactions = snapshot.recent_transactions(30)
             
             total_income = sum(float(t.get('amount_232143', 0)) for t in transactions if t.get('type_232143') == 'income')
             total_expenses = sum(float(t.get('amount_232143', 0)) for t in transactions if t.get('type_232143') == 'expense')
@@ -326,14 +388,13 @@ class RecommendationService:
         return recommendations
     
     @staticmethod
-    def _detect_anomalies(user_id):
+    def _detect_anomalies(snapshot):
         """Detect unusual spending patterns"""
         recommendations = []
         try:
             # Get category spending for this month
             now = datetime.now()
-            category_spending = TransactionModel.get_category_spending(
-                user_id,
+            category_spending = snapshot.category_spending(
                 now.replace(day=1).date().isoformat(),
                 now.date().isoformat()
             )
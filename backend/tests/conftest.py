@@ -0,0 +1,58 @@
+"""Shared fixtures for the backend tests
+
+Run from backend/ with `python -m pytest tests`. Tests that need PostgreSQL
+use the database from the usual DATABASE_URL / POSTGRES_* settings and are
+skipped when it cannot be reached.
+"""
+import os
+import sys
+import uuid
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture(scope='session')
+def app():
+    import psycopg2
+    from app import create_app
+    from rebuild_rollups import connect
+    try:
+        connect().close()
+    except psycopg2.OperationalError as e:
+        pytest.skip(f'PostgreSQL not available: {e}')
+    return create_app()
+
+@pytest.fixture
+def db(app):
+    """The app's pooled connection inside an app context"""
+    from models.database import get_db
+    with app.app_context():
+        yield get_db()
+
+@pytest.fixture
+def user_id(db):
+    """A throwaway user; deleting it cascades to everything it owns"""
+    user_id = str(uuid.uuid4())
+    with db.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO users_232143 (user_id_232143, email_232143, password_hash_232143, full_name_232143)
+            VALUES (%s, %s, 'x', 'Test User')
+        """, (user_id, f'{user_id}@test.local'))
+    db.commit()
+    yield user_id
+    with db.cursor() as cursor:
+        cursor.execute("DELETE FROM users_232143 WHERE user_id_232143 = %s", (user_id,))
+    db.commit()
+
+@pytest.fixture
+def category_ids(db, user_id):
+    """Two expense categories for user_id"""
+    ids = [str(uuid.uuid4()), str(uuid.uuid4())]
+    with db.cursor() as cursor:
+        for category_id, name in zip(ids, ('Makan', 'Sewa')):
+            cursor.execute("""
+                INSERT INTO categories_232143 (category_id_232143, user_id_232143, name_232143, type_232143)
+                VALUES (%s, %s, %s, 'expense')
+            """, (category_id, user_id, name))
+    db.commit()
+    return ids
@@ -0,0 +1,172 @@
+"""Running per-category stats (CategoryStatsModel) against direct computation"""
+import statistics
+import pytest
+import config
+from models.category_stats_model import CategoryStatsModel
+
+AMOUNTS = [25000, 48000, 31500, 77000, 52000, 19900, 64000]
+
+def welford_row(values):
+    """The stats row ADD_SQL keeps for values: count, mean and M2"""
+    mean = statistics.fmean(values) if values else 0.0
+    return {
+        'count_232143': len(values),
+        'mean_232143': mean,
+        'm2_232143': sum((value - mean) ** 2 for value in values),
+    }
+
+def assert_row_matches(row, values):
+    expected = welford_row(values)
+    assert row['count_232143'] == expected['count_232143']
+    assert row['mean_232143'] == pytest.approx(expected['mean_232143'], rel=1e-12, abs=1e-6)
+    assert row['m2_232143'] == pytest.approx(expected['m2_232143'], rel=1e-9, abs=1e-3)
+
+@pytest.mark.parametrize('values', [
+    AMOUNTS,
+    [1500000, 1500000, 1500000, 2750000],
+    [10, 20],
+    [125000000.0, 3000.0, 98000000.0, 450000.0, 1200.0],
+])
+def test_prior_stats_undoes_the_last_add(values):
+    count, mean, std = CategoryStatsModel.prior_stats(welford_row(values), values[-1])
+    before = values[:-1]
+    assert count == len(before)
+    assert mean == pytest.approx(statistics.fmean(before))
+    expected_std = statistics.stdev(before) if len(before) > 1 else 0.0
+    assert std == pytest.approx(expected_std, rel=1e-9, abs=1e-6)
+
+def test_prior_stats_of_the_first_amount_is_empty():
+    assert CategoryStatsModel.prior_stats(welford_row([42000]), 42000) == (0, 0.0, 0.0)
+
+# --- SQL, against PostgreSQL -------------------------------------------------
+
+@pytest.fixture
+def stats_table(db):
+    with db.cursor() as cursor:
+        cursor.execute("SELECT to_regclass('category_stats_232143') AS name")
+        if cursor.fetchone()['name'] is None:
+            pytest.skip('category_stats_232143 missing; run migrations/add_category_stats.py')
+
+def stats_rows(db, user_id):
+    with db.cursor() as cursor:
+        cursor.execute("""
+            SELECT type_232143, category_key_232143, count_232143, mean_232143, m2_232143
+            FROM category_stats_232143 WHERE user_id_232143 = %s
+        """, (user_id,))
+        return {(row['type_232143'], row['category_key_232143']): row for row in cursor.fetchall()}
+
+def seed_stats(db, user_id, groups):
+    with db.cursor() as cursor:
+        for (type_, key), values in groups.items():
+            cursor.execute("""
+                INSERT INTO category_stats_232143 (
+                    user_id_232143, type_232143, category_key_232143, count_232143, mean_232143, m2_232143
+                ) VALUES (%(user_id)s, %(type)s, %(key)s, %(count_232143)s, %(mean_232143)s, %(m2_232143)s)
+            """, dict(welford_row(values), user_id=user_id, type=type_, key=key))
+    db.commit()
+
+def run_replace(db, user_id, old, new):
+    """Apply REPLACE_SQL to a stand-in for the UPDATE's RETURNING row"""
+    with db.cursor() as cursor:
+        cursor.execute(f"""
+            WITH updated AS (
+                SELECT %(user_id)s::varchar AS user_id_232143, %(type)s::varchar AS type_232143,
+                       %(category)s::varchar AS category_id_232143, %(amount)s::numeric AS amount_232143,
+                       %(old_type)s::varchar AS old_type, %(old_category)s::varchar AS old_category_id,
+                       %(old_amount)s::numeric AS old_amount
+            ), {CategoryStatsModel.replace_ctes('updated')}
+            SELECT 1
+        """, {
+            'user_id': user_id,
+            'type': new[0], 'category': new[1] or None, 'amount': new[2],
+            'old_type': old[0], 'old_category': old[1] or None, 'old_amount': old[2],
+        })
+    db.commit()
+
+# Each case moves AMOUNTS[2] (31500) out of ('expense', 'a') to a new
+# (type, category, amount); 'a' and 'b' stand for real category IDs, '' is
+# uncategorized
+@pytest.mark.parametrize('new', [
+    ('expense', 'a', 95000),
+    ('expense', 'a', 1000),
+    ('expense', 'a', 31500),
+    ('expense', 'b', 31500),
+    ('expense', 'b', 88000),
+    ('expense', '', 40000),
+    ('income', 'a', 31500),
+], ids=['same-up', 'same-down', 'same-unchanged', 'move', 'move-and-change', 'uncategorized', 'type'])
+def test_replace_matches_recomputed_stats(db, user_id, category_ids, stats_table, new):
+    names = {'a': category_ids[0], 'b': category_ids[1], '': ''}
+    groups = {
+        ('expense', names['a']): list(AMOUNTS),
+        ('expense', names['b']): [120000, 95000, 130000],
+    }
+    seed_stats(db, user_id, groups)
+
+    new_group = (new[0], names[new[1]])
+    run_replace(db, user_id, ('expense', names['a'], AMOUNTS[2]), (new[0], names[new[1]], new[2]))
+
+    groups[('expense', names['a'])].remove(AMOUNTS[2])
+    groups.setdefault(new_group, []).append(new[2])
+    rows = stats_rows(db, user_id)
+    assert set(rows) == set(groups)
+    for group, values in groups.items():
+        assert_row_matches(rows[group], values)
+
+def test_replace_moves_the_only_amount_out_of_a_group(db, user_id, category_ids, stats_table):
+    seed_stats(db, user_id, {('expense', category_ids[0]): [3000000]})
+    run_replace(db, user_id, ('expense', category_ids[0], 3000000), ('expense', category_ids[1], 3100000))
+    rows = stats_rows(db, user_id)
+    assert_row_matches(rows[('expense', category_ids[0])], [])
+    assert_row_matches(rows[('expense', category_ids[1])], [3100000])
+
+def test_transaction_writes_match_the_migration_backfill(db, user_id, category_ids, stats_table, monkeypatch):
+    """create -> update -> delete through TransactionModel leaves the stats the backfill would build"""
+    from models.transaction_model import TransactionModel
+    monkeypatch.setattr(config.Config, 'ANOMALY_STATS_ENABLED', True)
+
+    def assert_matches_backfill():
+        # The SELECT of migrations/add_category_stats.py, for this user
+        with db.cursor() as cursor:
+            cursor.execute("""
+                SELECT type_232143, COALESCE(category_id_232143, '') AS category_key_232143,
+                       COUNT(*) AS count_232143, AVG(amount_232143)::float8 AS mean_232143,
+                       COALESCE(VAR_POP(amount_232143) * COUNT(*), 0)::float8 AS m2_232143
+                FROM transactions_232143
+                WHERE user_id_232143 = %s
+                GROUP BY 1, 2
+            """, (user_id,))
+            backfill = {(row['type_232143'], row['category_key_232143']): row for row in cursor.fetchall()}
+        live = {group: row for group, row in stats_rows(db, user_id).items() if row['count_232143'] > 0}
+        assert set(live) == set(backfill)
+        for group, row in backfill.items():
+            assert live[group]['count_232143'] == row['count_232143']
+            assert live[group]['mean_232143'] == pytest.approx(row['mean_232143'], rel=1e-9)
+            assert live[group]['m2_232143'] == pytest.approx(row['m2_232143'], rel=1e-6, abs=1e-3)
+
+    transaction_ids = [
+        TransactionModel.create_transaction({
+            'user_id': user_id,
+            'amount': amount,
+            'type': 'expense',
+            'category_id': category_ids[index % 2] if index % 3 else None,
+            'description': f'Test {index}',
+        }, check_anomaly=False)
+        for index, amount in enumerate(AMOUNTS)
+    ]
+    assert_matches_backfill()
+
+    assert TransactionModel.update_transaction(transaction_ids[1], user_id, {'amount_232143': 99000})
+    assert_matches_backfill()
+    assert TransactionModel.update_transaction(transaction_ids[2], user_id, {
+        'category_id_232143': category_ids[0], 'amount_232143': 12500
+    })
+    assert_matches_backfill()
+    assert TransactionModel.update_transaction(transaction_ids[3], user_id, {'type_232143': 'income'})
+    assert_matches_backfill()
+    assert TransactionModel.update_transaction(transaction_ids[4], user_id, {'description_232143': 'Renamed'})
+    assert_matches_backfill()
+
+    for transaction_id in transaction_ids[:4]:
+        assert TransactionModel.delete_transaction(transaction_id, user_id)
+        assert_matches_backfill()
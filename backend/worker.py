@@ -0,0 +1,44 @@
+"""
+Background job worker
+
+Drains jobs_232143 (see services/job_runner.py). Run one or more next to the
+web process; they coordinate through FOR UPDATE SKIP LOCKED, so scaling out
+is just starting more of them. SIGTERM/SIGINT finish the current job first.
+
+Usage:
+    python worker.py                          # run until stopped
+    python worker.py --once                   # drain the queue and exit
+    python worker.py --types data.forecast    # only these job types
+"""
+
+import argparse
+import signal
+from app import create_app
+from services import job_runner
+
+def main():
+    parser = argparse.ArgumentParser(description='Run background jobs')
+    parser.add_argument('--once', action='store_true', help='Exit when the queue is empty')
+    parser.add_argument('--types', nargs='+', choices=sorted(job_runner.HANDLERS),
+                        help='Only run these job types (default: all)')
+    args = parser.parse_args()
+
+    stopping = {'requested': False}
+
+    def request_stop(signum, frame):
+        print("🛑 Stop requested, finishing current job...")
+        stopping['requested'] = True
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    app = create_app()
+    job_runner.run_worker(
+        app,
+        job_types=args.types,
+        once=args.once,
+        should_stop=lambda: stopping['requested']
+    )
+
+if __name__ == '__main__':
+    main()